@@ -4,7 +4,9 @@ import os
 import sys
 import types
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+import numpy as np
 
 # FreeCAD mock must be present before importing freecad.Composites package.
 if "FreeCAD" not in sys.modules:
@@ -19,7 +21,9 @@ _REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..",
 if _REPO_ROOT not in sys.path:
     sys.path.insert(0, _REPO_ROOT)
 
+from freecad.Composites.fem import drape_laminate_provider  # noqa: E402
 from freecad.Composites.fem.drape_laminate_provider import (  # noqa: E402
+    get_drape_lcs,
     register_drape_laminate_providers,
 )
 
@@ -55,3 +59,67 @@ class TestDrapeLaminateProviderRegistration(unittest.TestCase):
         self.assertEqual(called_orientation[0][0], "compositeswb.drape")
         self.assertEqual(called_section[0][0], "compositeswb.laminate")
         self.assertEqual(called_indirect[0][0], "compositeswb.laminate")
+
+
+class _FakeProxy:
+    def __init__(self):
+        self.calls = []
+
+    def get_drape_lcs_batch(self, centers, normals):
+        self.calls.append((centers, normals))
+        return np.stack([np.eye(3) * (i + 1) for i in range(len(centers))])
+
+
+class TestGetDrapeLcs(unittest.TestCase):
+    def setUp(self):
+        def node(x, y, z):
+            return types.SimpleNamespace(x=x, y=y, z=z)
+
+        self.femmesh = types.SimpleNamespace(
+            Nodes={
+                1: node(0.0, 0.0, 0.0),
+                2: node(3.0, 0.0, 0.0),
+                3: node(0.0, 3.0, 0.0),
+                4: node(3.0, 3.0, 0.0),
+                5: node(1.5, 0.0, 0.0),
+            },
+            getElementNodes={
+                10: (1, 2, 3),
+                11: (2, 4, 3, 1),
+                12: (1, 2, 3, 5, 4, 4),
+            }.get,
+        )
+        self.compshell = types.SimpleNamespace(Proxy=_FakeProxy())
+
+    def test_single_batched_call(self):
+        with patch.object(drape_laminate_provider, "matrix_to_rotation", lambda m: m):
+            result = get_drape_lcs(self.compshell, self.femmesh, [10, 11, 12])
+
+        self.assertEqual(len(self.compshell.Proxy.calls), 1)
+        centers, normals = self.compshell.Proxy.calls[0]
+        np.testing.assert_allclose(centers[0], [1.0, 1.0, 0.0])
+        np.testing.assert_allclose(centers[1], [1.5, 1.5, 0.0])
+        np.testing.assert_allclose(normals, [[0, 0, 1], [0, 0, 1], [0, 0, 1]])
+        self.assertEqual(list(result), [10, 11, 12])
+        np.testing.assert_allclose(result[11], np.eye(3) * 2)
+
+    def test_nodes_read_once(self):
+        nodes = self.femmesh.Nodes
+        reads = []
+
+        class _Mesh:
+            getElementNodes = self.femmesh.getElementNodes
+
+            @property
+            def Nodes(self):
+                reads.append(1)
+                return dict(nodes)
+
+        with patch.object(drape_laminate_provider, "matrix_to_rotation", lambda m: m):
+            get_drape_lcs(self.compshell, _Mesh(), [10, 11, 12])
+        self.assertEqual(len(reads), 1)
+
+    def test_invalid_draper_gives_none(self):
+        self.compshell.Proxy.get_drape_lcs_batch = lambda c, n: None
+        result = get_drape_lcs(self.compshell, self.femmesh, [10, 11])
+        self.assertEqual(result, {10: None, 11: None})
@@ -0,0 +1,1853 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+"""
+Tests for the batched drape calculations in util/drape_util.py.
+
+The per-facet Draper reference path is exercised with small pure-Python
+stand-ins for FreeCAD.Vector and FreeCAD.Rotation so that the batched
+results can be checked against it without a FreeCAD runtime.
+"""
+
+import contextlib
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# FreeCAD mock must be present before importing freecad.Composites package.
+if "FreeCAD" not in sys.modules:
+    freecad_mock = MagicMock()
+    freecad_mock.__unit_test__ = []
+    freecad_mock.Base = MagicMock()
+    freecad_mock.ParamGet.return_value = MagicMock(
+        SetString=lambda *args, **kwargs: None
+    )
+    sys.modules["FreeCAD"] = freecad_mock
+for _name in ("flatmesh", "Part", "Mesh", "MeshPart"):
+    sys.modules.setdefault(_name, MagicMock())
+
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from freecad.Composites.tools import dart  # noqa: E402
+from freecad.Composites.tools import draper as draper_mod  # noqa: E402
+from freecad.Composites.tools import drape_scheduler  # noqa: E402
+from freecad.Composites.tools import rosette_search  # noqa: E402
+from freecad.Composites.util import mesh_util  # noqa: E402
+from freecad.Composites.util import cache_util  # noqa: E402
+from freecad.Composites.util import drape_util  # noqa: E402
+from freecad.Composites.util import flatten_util  # noqa: E402
+from freecad.Composites.util import hotspot_util  # noqa: E402
+from freecad.Composites.util import kinematic_util  # noqa: E402
+from freecad.Composites.util import mesh_arrays  # noqa: E402
+from freecad.Composites.util import projection_util  # noqa: E402
+from freecad.Composites.util import unwrap_util  # noqa: E402
+from freecad.Composites.util.cache_util import (  # noqa: E402
+    ArrayCache,
+    make_key,
+)
+from freecad.Composites.util.drape_util import (  # noqa: E402
+    FacetLocator,
+    calc_facet_strains,
+    fabric_axes_mapped,
+    facet_jacobians,
+    jacobian_axes,
+    calc_quad_strains,
+    pair_triangles,
+    quad_jacobians,
+)
+
+# ---------------------------------------------------------------------------
+# Minimal Vector / Rotation stand-ins
+# ---------------------------------------------------------------------------
+
+
+class _Vector:
+    __array_ufunc__ = None
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        c = [float(a) for a in args] + [0.0] * (3 - len(args))
+        self.x, self.y, self.z = c
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __add__(self, o):
+        return _Vector(self.x + o.x, self.y + o.y, self.z + o.z)
+
+    def __sub__(self, o):
+        return _Vector(self.x - o.x, self.y - o.y, self.z - o.z)
+
+    def __mul__(self, s):
+        return _Vector(self.x * s, self.y * s, self.z * s)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, s):
+        return _Vector(self.x / s, self.y / s, self.z / s)
+
+    def dot(self, o):
+        return self.x * o.x + self.y * o.y + self.z * o.z
+
+    def cross(self, o):
+        return _Vector(*np.cross(list(self), list(o)))
+
+    def normalize(self):
+        n = math.sqrt(self.dot(self))
+        self.x, self.y, self.z = self.x / n, self.y / n, self.z / n
+        return self
+
+    def distanceToPoint(self, o):
+        return math.sqrt((self - o).dot(self - o))
+
+
+class _Rotation:
+    def __init__(self, *args):
+        if len(args) == 4:
+            z = np.array(list(args[2]))
+            z = z / np.linalg.norm(z)
+            x = np.array(list(args[0]))
+            x = x - x.dot(z) * z
+            x = x / np.linalg.norm(x)
+            self.M = np.stack([x, np.cross(z, x), z], axis=1)
+        elif len(args) == 2:
+            a = math.radians(args[1])
+            c, s = math.cos(a), math.sin(a)
+            self.M = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+        else:
+            self.M = np.eye(3)
+
+    def inverted(self):
+        r = _Rotation()
+        r.M = self.M.T
+        return r
+
+    def __mul__(self, v):
+        return _Vector(*(self.M @ np.array(list(v))))
+
+
+def _reference_draper(points, facets, fabric, quads=False):
+    d = draper_mod.Draper.__new__(draper_mod.Draper)
+    d.fabric_points = np.asarray(fabric, dtype=np.float64)
+    d.points = np.asarray(points, dtype=np.float64)
+    d.facets = np.asarray(facets, dtype=np.int32)
+    d.locator = FacetLocator(d.points, d.facets)
+    d.set_quads(*(pair_triangles(d.points, d.facets) if quads else (None, None)))
+    d.solve_strains()
+    return d
+
+
+def _patched_freecad_types():
+    return [
+        patch.object(draper_mod, "Vector", _Vector),
+        patch.object(draper_mod, "Rotation", _Rotation),
+        patch.object(mesh_util, "Vector", _Vector),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Test meshes
+# ---------------------------------------------------------------------------
+
+
+def _grid(nx=4, ny=3):
+    xs, ys = np.meshgrid(
+        np.arange(nx + 1, dtype=float),
+        np.arange(ny + 1, dtype=float),
+    )
+    points = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=-1)
+    facets = []
+    for j in range(ny):
+        for i in range(nx):
+            a = j * (nx + 1) + i
+            b, c, d = a + 1, a + nx + 2, a + nx + 1
+            facets += [(a, b, c), (a, c, d)]
+    return points, np.array(facets, dtype=np.int32)
+
+
+def _cylinder_patch(n_theta=6, n_z=3, radius=5.0):
+    points, facets = _grid(n_theta, n_z)
+    theta = points[:, 0] * 0.15
+    curved = np.stack(
+        [radius * np.sin(theta), points[:, 1], radius * (1.0 - np.cos(theta))],
+        axis=-1,
+    )
+    # approximate flattening: arc length along x, slightly perturbed
+    rng = np.random.default_rng(3)
+    fabric = np.stack(
+        [radius * theta, points[:, 1], np.zeros(len(points))],
+        axis=-1,
+    )
+    fabric[:, :2] += rng.normal(scale=0.01, size=(len(points), 2))
+    return curved, facets, fabric
+
+
+def _random_rotation(seed=0):
+    q, _ = np.linalg.qr(np.random.default_rng(seed).normal(size=(3, 3)))
+    if np.linalg.det(q) < 0:
+        q[:, 0] = -q[:, 0]
+    return q
+
+
+class TestCalcFacetStrains(unittest.TestCase):
+    def test_identity_drape_has_no_strain(self):
+        points, facets = _grid()
+        strains = calc_facet_strains(points[facets], points[facets])
+        self.assertEqual(strains.shape, (len(facets), 3))
+        np.testing.assert_allclose(strains, 0.0, atol=1e-12)
+
+    def test_uniform_stretch(self):
+        points, facets = _grid()
+        stretched = points * np.array([1.01, 0.98, 1.0])
+        strains = calc_facet_strains(stretched[facets], points[facets])
+        np.testing.assert_allclose(strains[:, 0], 0.01, atol=1e-12)
+        np.testing.assert_allclose(strains[:, 1], -0.02, atol=1e-12)
+        np.testing.assert_allclose(strains[:, 2], 0.0, atol=1e-12)
+
+    def test_rigid_motion_of_global_mesh_is_strain_free(self):
+        points, facets, fabric = _cylinder_patch()
+        R = _random_rotation()
+        moved = points @ R.T + np.array([10.0, -3.0, 7.0])
+        np.testing.assert_allclose(
+            calc_facet_strains(moved[facets], fabric[facets]),
+            calc_facet_strains(points[facets], fabric[facets]),
+            atol=1e-10,
+        )
+
+    def test_zero_area_triangle_raises(self):
+        points, facets = _grid(1, 1)
+        fabric = points.copy()
+        fabric[2] = fabric[0]
+        with self.assertRaises(ValueError):
+            calc_facet_strains(points[facets], fabric[facets])
+
+    def test_fabric_axes_of_identity_are_unit(self):
+        points, facets = _grid()
+        d = fabric_axes_mapped(points[facets], points[facets])
+        np.testing.assert_allclose(
+            d[:, :2, :],
+            np.broadcast_to(np.eye(2), (len(facets), 2, 2)),
+        )
+        np.testing.assert_allclose(d[:, 2, :], 0.0)
+
+    def test_matches_per_facet_reference(self):
+        points, facets, fabric = _cylinder_patch()
+        draper = _reference_draper(points, facets, fabric)
+        patches = _patched_freecad_types()
+        for p in patches:
+            p.start()
+        try:
+            expected = np.vstack([draper.calc_strain(i) for i in range(len(facets))])
+        finally:
+            for p in patches:
+                p.stop()
+        # reference uses a 1e-4 finite difference for the fabric axes
+        np.testing.assert_allclose(
+            calc_facet_strains(points[facets], fabric[facets]),
+            expected,
+            atol=1e-8,
+        )
+
+
+class TestDraperLcsBatch(unittest.TestCase):
+    def test_matches_per_element_reference(self):
+        points, facets, fabric = _cylinder_patch()
+        draper = _reference_draper(points, facets, fabric)
+        rng = np.random.default_rng(11)
+        idx = rng.integers(len(facets), size=25)
+        w = rng.dirichlet([1.0, 1.0, 1.0], size=len(idx))
+        centers = np.einsum("qv,qvj->qj", w, points[facets[idx]])
+        normals = drape_util.facet_normals(points[facets[idx]])
+
+        patches = _patched_freecad_types()
+        for p in patches:
+            p.start()
+        try:
+            # finite difference reference on the located facets
+            located, _ = draper.locator.locate(centers)
+            expected = np.stack(
+                [
+                    draper._rotation_from_tris(
+                        _Vector(*c), _Vector(*n), *draper._get_tris(f)
+                    ).M
+                    for c, n, f in zip(centers, normals, located)
+                ]
+            )
+            single = np.stack(
+                [
+                    draper._get_lcs_at_point(_Vector(*c), _Vector(*n)).M
+                    for c, n in zip(centers, normals)
+                ]
+            )
+        finally:
+            for p in patches:
+                p.stop()
+
+        result = draper.get_lcs_batch(centers, normals)
+        self.assertEqual(result.shape, (len(idx), 3, 3))
+        np.testing.assert_allclose(result, expected, atol=1e-8)
+        np.testing.assert_allclose(single, result, atol=1e-12)
+
+
+class TestFacetJacobians(unittest.TestCase):
+    def test_matches_finite_difference(self):
+        points, facets, fabric = _cylinder_patch()
+        J = facet_jacobians(points[facets], fabric[facets])
+        self.assertEqual(J.shape, (len(facets), 2, 3))
+        lam = np.array([0.2, 0.3, 0.5])
+        with patch.object(mesh_util, "Vector", _Vector):
+            for n in range(0, len(facets), 5):
+                tri_g = [_Vector(*p) for p in points[facets[n]]]
+                tri_f = [_Vector(*p) for p in fabric[facets[n]]]
+                d = mesh_util.axes_mapped(lam, tri_f, tri_g)
+                np.testing.assert_allclose(
+                    [list(v)[:2] for v in d],
+                    J[n][:, :2].T,
+                    atol=1e-8,
+                )
+
+    def test_axes_are_in_plane_inverse(self):
+        points, facets, fabric = _cylinder_patch()
+        J = facet_jacobians(points[facets], fabric[facets])
+        A = jacobian_axes(J)
+        np.testing.assert_allclose(
+            J @ A, np.broadcast_to(np.eye(2), (len(facets), 2, 2)), atol=1e-12
+        )
+        normals = drape_util.facet_normals(points[facets])
+        np.testing.assert_allclose(np.einsum("nij,ni->nj", A, normals), 0.0, atol=1e-12)
+        # displacements along the normal do not move the fabric point
+        np.testing.assert_allclose(np.einsum("nij,nj->ni", J, normals), 0.0, atol=1e-12)
+
+
+class TestQuadDominant(unittest.TestCase):
+    def test_grid_pairs_into_cells(self):
+        points, facets = _grid(4, 3)
+        quads, pairs = pair_triangles(points, facets)
+        self.assertEqual(quads.shape, (12, 4))
+        self.assertEqual(sorted(pairs.ravel()), list(range(len(facets))))
+        corners = points[quads]
+        # unit cells, ordered counter clockwise like the facets
+        np.testing.assert_allclose(
+            drape_util.quad_normals(corners), [[0, 0, 1]] * 12, atol=1e-12
+        )
+        np.testing.assert_allclose(
+            np.ptp(corners[:, :, :2], axis=1), np.ones((12, 2)), atol=1e-12
+        )
+        for quad, (a, b) in zip(quads, pairs):
+            self.assertEqual(set(quad), set(facets[a]) | set(facets[b]))
+
+    def test_folded_pair_is_not_merged(self):
+        points = np.array(
+            [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        )
+        facets = np.array([[0, 1, 2], [1, 0, 3]], dtype=np.int32)
+        quads, pairs = pair_triangles(points, facets)
+        self.assertEqual(quads.shape, (0, 4))
+        self.assertEqual(pairs.shape, (0, 2))
+
+    def test_affine_quad_matches_its_triangles(self):
+        points, facets = _grid(3, 2)
+        A = np.array([[1.03, 0.02, 0.0], [-0.01, 0.96, 0.0], [0.0, 0.0, 0.0]])
+        fabric = points @ A.T
+        quads, pairs = pair_triangles(points, facets)
+        J = facet_jacobians(points[facets], fabric[facets])
+        Jq = quad_jacobians(points[quads], fabric[quads])
+        np.testing.assert_allclose(Jq, J[pairs[:, 0]], atol=1e-12)
+        np.testing.assert_allclose(
+            calc_quad_strains(points[quads], fabric[quads]),
+            calc_facet_strains(points[facets], fabric[facets])[pairs[:, 0]],
+            atol=1e-12,
+        )
+
+    def test_draper_quad_strains_and_orientations(self):
+        points, facets, fabric = _cylinder_patch()
+        draper = _reference_draper(points, facets, fabric, quads=True)
+        self.assertEqual(len(draper.quads), len(facets) // 2)
+        a, b = draper.quad_facets.T
+        np.testing.assert_array_equal(draper.strains[a], draper.strains[b])
+
+        # one orientation per quad, as for a quad shell element
+        centers = np.concatenate(
+            [points[facets[a]].mean(axis=1), points[facets[b]].mean(axis=1)]
+        )
+        normals = np.tile(drape_util.quad_normals(points[draper.quads]), (2, 1))
+        frames = draper.get_lcs_batch(centers, normals).reshape(2, -1, 3, 3)
+        np.testing.assert_allclose(frames[0], frames[1], atol=1e-12)
+
+        # close to the average of the two constant strain triangles
+        triangles = _reference_draper(points, facets, fabric).strains
+        np.testing.assert_allclose(
+            draper.strains[a], 0.5 * (triangles[a] + triangles[b]), atol=5e-3
+        )
+
+
+class TestShearAngles(unittest.TestCase):
+    def _sheared(self, gamma_deg):
+        # fabric whose weft is drawn at 90 - gamma degrees from the warp
+        g = math.radians(gamma_deg)
+        axes = np.array([[1.0, math.sin(g)], [0.0, math.cos(g)]])
+        points, facets = _grid(6, 5)
+        fabric = points.copy()
+        fabric[:, :2] = points[:, :2] @ np.linalg.inv(axes).T
+        return points, facets, fabric
+
+    def test_uniform_shear(self):
+        points, facets, fabric = self._sheared(25.0)
+        jacobians = facet_jacobians(points[facets], fabric[facets])
+        np.testing.assert_allclose(drape_util.shear_angles(jacobians), 25.0)
+        _, _, fabric = self._sheared(-10.0)
+        jacobians = facet_jacobians(points[facets], fabric[facets])
+        np.testing.assert_allclose(drape_util.shear_angles(jacobians), -10.0)
+
+    def test_rigid_drape_is_unsheared(self):
+        points, facets, fabric = _cylinder_patch()
+        R = _random_rotation(2)
+        jacobians = facet_jacobians((points @ R.T)[facets], points[facets])
+        np.testing.assert_allclose(drape_util.shear_angles(jacobians), 0.0, atol=1e-9)
+
+    def test_vertex_average(self):
+        points, facets = _grid(3, 2)
+        values = np.arange(len(facets), dtype=float)
+        averaged = drape_util.vertex_average(points, facets, values)
+        # corner 0 is in facets 0 and 1 of equal area
+        self.assertAlmostEqual(averaged[0], 0.5)
+        np.testing.assert_allclose(
+            drape_util.vertex_average(points, facets, np.full(len(facets), 3.0)), 3.0
+        )
+
+    def test_draper_shear_angles(self):
+        points, facets, fabric = self._sheared(20.0)
+        for quads in (False, True):
+            draper = _reference_draper(points, facets, fabric, quads=quads)
+            np.testing.assert_allclose(draper.shear_angles, 20.0)
+            np.testing.assert_allclose(draper.get_vertex_shear_angles(), 20.0)
+
+    def test_shear_measured_between_ply_fibres(self):
+        # a 45 degree ply whose weft closes 30 degrees onto its warp: the
+        # fabric's 0/90 axes stay square, the ply's fibres shear
+        p, g = math.radians(45.0), math.radians(30.0)
+        u = np.array([math.cos(p), math.sin(p)])
+        v = np.array([-math.sin(p), math.cos(p)])
+        drawn = np.column_stack([u, math.sin(g) * u + math.cos(g) * v])
+        fabric, facets = _grid(6, 5)
+        points = fabric.copy()
+        points[:, :2] = fabric[:, :2] @ (drawn @ np.column_stack([u, v]).T).T
+        for quads in (False, True):
+            draper = _reference_draper(points, facets, fabric, quads=quads)
+            np.testing.assert_allclose(draper.shear_angles, 0.0, atol=1e-9)
+            np.testing.assert_allclose(draper.get_shear_angles(45.0), 30.0)
+            np.testing.assert_allclose(draper.get_vertex_shear_angles(45.0), 30.0)
+            self.assertIs(draper.get_shear_angles(45), draper.get_shear_angles(45.0))
+            # a locked 45 degree ply is found only in its own frame
+            self.assertEqual(draper.find_hotspots(locking_angle=25.0), [])
+            hotspots = draper.find_hotspots(angles=(0.0, 45.0), locking_angle=25.0)
+            self.assertEqual([h.kind for h in hotspots], ["locking"])
+            self.assertAlmostEqual(hotspots[0].peak, 30.0)
+
+
+class TestMeshArrays(unittest.TestCase):
+    def setUp(self):
+        self.points, self.facets = _grid(4, 3)
+        self.mesh = mesh_arrays.MeshArrays(self.points, self.facets)
+
+    def test_types_and_facet_geometry(self):
+        self.assertEqual(self.mesh.points.dtype, np.float64)
+        self.assertEqual(self.mesh.facets.dtype, np.int32)
+        np.testing.assert_allclose(self.mesh.areas, 0.5)
+        np.testing.assert_allclose(self.mesh.normals, [[0, 0, 1]] * 24)
+        np.testing.assert_allclose(
+            self.mesh.centroids, self.points[self.facets].mean(axis=1)
+        )
+
+    def test_edges_and_boundary(self):
+        mesh = self.mesh
+        # horizontal, vertical and diagonal edges
+        self.assertEqual(len(mesh.edges), 4 * 4 + 5 * 3 + 4 * 3)
+        self.assertEqual(mesh.boundary.sum(), 2 * (4 + 3))
+        for f, facet in enumerate(self.facets):
+            for j in range(3):
+                self.assertEqual(
+                    set(mesh.edges[mesh.facet_edges[f, j]]),
+                    {facet[j], facet[(j + 1) % 3]},
+                )
+        self.assertTrue(np.all(mesh.edge_facets[~mesh.boundary] == 2))
+
+    def test_vertex_facets(self):
+        mesh = self.mesh
+        ptr = mesh.vertex_facets_ptr
+        for i in range(len(self.points)):
+            expected = np.flatnonzero(np.any(self.facets == i, axis=1))
+            np.testing.assert_array_equal(
+                np.sort(mesh.vertex_facets[ptr[i] : ptr[i + 1]]), expected
+            )
+        np.testing.assert_array_equal(mesh.point_facets([0, 1]), [0, 1, 2, 3])
+
+    def test_facet_pairs(self):
+        pairs = self.mesh.facet_pairs
+        # cell diagonals, then vertical and horizontal interior edges
+        self.assertEqual(len(pairs), 4 * 3 + 3 * 3 + 4 * 2)
+        shared = [set(self.facets[a]) & set(self.facets[b]) for a, b in pairs.tolist()]
+        self.assertTrue(all(len(edge) == 2 for edge in shared))
+        counts = np.diff(self.mesh.facet_facets_ptr)
+        self.assertEqual(counts.sum(), 2 * len(pairs))
+        self.assertLessEqual(counts.max(), 3)
+
+    def test_from_mesh_and_coord_index(self):
+        fake = MagicMock(
+            Topology=(
+                [_Vector(*p) for p in self.points],
+                [tuple(int(i) for i in f) for f in self.facets],
+            )
+        )
+        mesh = mesh_arrays.MeshArrays.from_mesh(fake)
+        np.testing.assert_array_equal(mesh.points, self.points)
+        np.testing.assert_array_equal(mesh.facets, self.facets)
+        np.testing.assert_array_equal(mesh.coord_index[:8], [0, 1, 6, -1, 0, 6, 5, -1])
+
+
+class TestDart(unittest.TestCase):
+    def setUp(self):
+        # dart along the middle row of points, x from 0 to 2
+        self.mesh = mesh_arrays.MeshArrays(*_grid(4, 2))
+        self.dart = frozenset([5, 6, 7])
+
+    def test_dart_polys_touch_dart(self):
+        polys = dart.get_dart_polys(self.mesh, self.dart)
+        expected = np.flatnonzero(
+            np.any(np.isin(self.mesh.facets, list(self.dart)), axis=1)
+        )
+        self.assertEqual([p.poly_idx for p in polys], expected.tolist())
+        for p in polys:
+            facet = set(self.mesh.facets[p.poly_idx].tolist())
+            self.assertEqual(p.dart_points, self.dart & facet)
+
+    def test_delta_points_away_from_facets(self):
+        chain = [
+            [dart.DartPoly(f, set(), frozenset([6])) for f in (0, 3)],
+            [dart.DartPoly(f, set(), frozenset([6])) for f in (8, 11)],
+        ]
+        delta = dart.get_delta(self.mesh, chain)
+        self.assertGreater(delta[(6, 0)][1], 0)
+        self.assertLess(delta[(6, 1)][1], 0)
+
+    def test_generate_moves_split_points_only(self):
+        delta = {(6, 0): np.array([0.0, -1.0, 0.0])}
+        with patch.object(dart, "Mesh") as fake_mesh:
+            dart.generate_dart_mesh(self.mesh, {6: [0]}, {0: 0, 3: 0, 8: 1}, delta, 0.5)
+        tris = np.array(fake_mesh.Mesh.call_args[0][0]).reshape(-1, 3, 3)
+        expected = self.mesh.points[self.mesh.facets]
+        expected[0, 2] -= [0, 0.5, 0]
+        expected[3, 2] -= [0, 0.5, 0]
+        np.testing.assert_allclose(tris, expected)
+
+
+class TestHotspots(unittest.TestCase):
+    def setUp(self):
+        # unit cells of two triangles, facets 2 * (j * 6 + i) + (0, 1)
+        self.points, self.facets = _grid(6, 5)
+        self.strains = np.zeros((len(self.facets), 3))
+
+    def _cells(self, *cells):
+        return np.array([2 * (j * 6 + i) + k for i, j in cells for k in (0, 1)])
+
+    def test_union_find_matches_scipy(self):
+        rng = np.random.default_rng(5)
+        pairs = rng.integers(0, 200, size=(150, 2))
+        expected = hotspot_util.label_components(200, pairs)
+        with patch.object(hotspot_util, "connected_components", None):
+            labels = hotspot_util.label_components(200, pairs)
+        # same partition, labels in order of first node
+        np.testing.assert_array_equal(labels, expected)
+
+    def test_regions_ranked_by_area(self):
+        small = self._cells((0, 0))
+        large = self._cells((3, 2), (4, 2), (4, 3))
+        self.strains[small, 0] = -0.01
+        self.strains[large, 1] = -0.002
+        self.strains[large[-1], 1] = -0.02
+        self.strains[self._cells((1, 4), (2, 4)), 0] = 0.005
+        finder = hotspot_util.HotspotFinder(
+            mesh_arrays.MeshArrays(self.points, self.facets)
+        )
+        hotspots = finder.find(self.strains, tension=0.001, compression=0.001)
+
+        self.assertEqual(
+            [(h.kind, h.area) for h in hotspots],
+            [("wrinkling", 3.0), ("bridging", 2.0), ("wrinkling", 1.0)],
+        )
+        np.testing.assert_array_equal(np.sort(hotspots[0].facets), large)
+        np.testing.assert_allclose(hotspots[0].centroid, [12.5 / 3, 8.5 / 3, 0.0])
+        self.assertEqual(hotspots[0].peak, -0.02)
+        self.assertEqual(hotspots[2].peak, -0.01)
+        self.assertEqual(finder.find(self.strains), [])
+
+    def test_draper_shear_and_locking_hotspots(self):
+        draper = _reference_draper(self.points, self.facets, self.points)
+        draper.strains[self._cells((2, 2)), 2] = 0.2
+        draper.shear_angles[self._cells((5, 0), (5, 1))] = -50.0
+        hotspots = draper.find_hotspots(shear=0.1, locking_angle=45.0)
+        self.assertEqual(
+            [(h.kind, h.area, h.peak) for h in hotspots],
+            [("locking", 2.0, -50.0), ("shear", 1.0, 0.2)],
+        )
+        self.assertIs(draper.hotspot_finder, draper.hotspot_finder)
+
+
+def _rotation_4x4(angle_deg):
+    T = np.eye(4)
+    T[:3, :3] = _Rotation(None, angle_deg).M
+    return T
+
+
+class _Lcs:
+    def __init__(self, base, angle_deg):
+        self.placement = MagicMock()
+        self.placement.Base = _Vector(*base)
+        self.placement.Rotation = _Placement(_rotation_4x4(angle_deg))
+
+    def getGlobalPlacement(self):
+        return self.placement
+
+
+class TestDraperPlace(unittest.TestCase):
+    def test_flat_sheet_fabric_matches_lcs_coordinates(self):
+        points, facets = _grid(6, 5)
+        draper = _reference_draper(points, facets, points)
+        draper.ze_nodes = points[:, :2]
+        base = np.array([2.3, 1.6, 0.0])
+        with _numpy_placement():
+            draper.place(_Lcs(base, 30.0))
+        R = _Rotation(None, 30.0).M
+        np.testing.assert_allclose(
+            draper.fabric_points, (points - base) @ R, atol=1e-12
+        )
+        np.testing.assert_allclose(draper.strains, 0.0, atol=1e-12)
+        self.assertEqual(draper.jacobians.shape, (len(facets), 2, 3))
+
+
+class _Placement:
+    def __init__(self, matrix):
+        self.A = tuple(np.asarray(matrix).ravel())
+
+    def toMatrix(self):
+        return self
+
+
+@contextlib.contextmanager
+def _numpy_placement():
+    # placements as _Placement of a numpy matrix. draper_mod.Base is
+    # whichever FreeCAD mock was installed first, which may lack
+    # Placement, hence create=True.
+    with patch.object(
+        draper_mod.Base, "Placement", _Placement, create=True
+    ), patch.object(draper_mod, "Matrix", lambda *a: np.reshape(a, (4, 4))):
+        yield
+
+
+class TestDraperArrays(unittest.TestCase):
+    def setUp(self):
+        points, facets, fabric = _cylinder_patch()
+        self.draper = _reference_draper(points, facets, fabric)
+        # fabric origin placement p -> R (p - origin)
+        R = _Rotation(None, 40.0).M
+        origin = np.array([0.4, 1.2, 0.0])
+        self.T = np.eye(4)
+        self.T[:3, :3] = R
+        self.T[:3, 3] = -R @ origin
+        self.draper.T_fo = _Placement(self.T)
+        self.draper.flat_boundaries = [fabric[:4, :2], fabric[-3:, :2]]
+
+    def test_tex_coords_array_rotates_fabric_points(self):
+        # into the fibre frame, fibres at +30 degrees become the s axis
+        Rz = _Rotation(None, -30.0).M
+        result = self.draper.get_tex_coords_array(30.0)
+        self.assertEqual(result.shape, self.draper.fabric_points.shape)
+        np.testing.assert_allclose(result, self.draper.fabric_points @ Rz.T)
+
+    def test_tex_coords_vectors_match_array(self):
+        with patch.object(draper_mod, "Vector", _Vector):
+            vectors = self.draper.get_tex_coords(15.0)
+        np.testing.assert_allclose(
+            [list(v) for v in vectors],
+            self.draper.get_tex_coords_array(15.0),
+        )
+
+    def test_boundaries_rotate_before_fabric_placement(self):
+        Rz = _Rotation(None, 20.0).M
+        result = self.draper.get_boundaries_array(-20.0)
+        self.assertEqual(len(result), 2)
+        for edge, flat in zip(result, self.draper.flat_boundaries):
+            flat3 = np.column_stack([flat, np.zeros(len(flat))])
+            expected = (flat3 @ Rz.T) @ self.T[:3, :3].T + self.T[:3, 3]
+            np.testing.assert_allclose(edge, expected)
+
+    def test_tex_coord_at_point_interpolates_facet(self):
+        facet = 7
+        tri = self.draper.points[self.draper.facets[facet]]
+        w = np.array([0.2, 0.5, 0.3])
+        with patch.object(draper_mod, "Vector", _Vector):
+            coord = self.draper.get_tex_coord_at_point(_Vector(*(w @ tri)))
+        expected = w @ self.draper.fabric_points[self.draper.facets[facet]]
+        np.testing.assert_allclose(list(coord), expected, atol=1e-9)
+
+    def test_from_cache_places_flat_nodes(self):
+        data = {
+            "points": self.draper.points,
+            "facets": self.draper.facets,
+            "ze_nodes": self.draper.fabric_points[:, :2],
+            "boundary_nodes": np.empty((0, 2)),
+            "boundary_offsets": np.array([0]),
+            "T_fo": self.T,
+            "strains": np.zeros((len(self.draper.facets), 3)),
+        }
+        with _numpy_placement():
+            restored = draper_mod.Draper.from_cache(data, shape=None)
+        self.assertEqual(restored.fabric_points.dtype, np.float64)
+        self.assertEqual(restored.quads.shape, (0, 4))
+        np.testing.assert_allclose(
+            restored.fabric_points,
+            self.draper.fabric_points @ self.T[:3, :3].T + self.T[:3, 3],
+        )
+
+    def test_quad_drape_round_trips_through_cache(self):
+        points, facets, fabric = _cylinder_patch()
+        draper = _reference_draper(points, facets, fabric, quads=True)
+        draper.ze_nodes = fabric[:, :2]
+        draper.flat_boundaries = []
+        draper.T_fo = _Placement(np.eye(4))
+        with _numpy_placement():
+            restored = draper_mod.Draper.from_cache(draper.to_cache(), shape=None)
+        np.testing.assert_array_equal(restored.quads, draper.quads)
+        np.testing.assert_array_equal(restored.facet_quads, draper.facet_quads)
+        np.testing.assert_allclose(restored.quad_jacobians, draper.quad_jacobians)
+
+
+class _FakeFace:
+    # analytic face S(u, v) = origin + surface(u, v), counting evaluations
+    def __init__(self, surface, normal, ranges, origin=(0.0, 0.0, 0.0)):
+        self.surface = surface
+        self.normal = normal
+        self.origin = np.array(origin)
+        self.ParameterRange = ranges
+        self.calls = 0
+        u = np.linspace(ranges[0], ranges[1], 50)
+        v = np.linspace(ranges[2], ranges[3], 50)
+        pts = np.array([self.valueAt(a, b) for a in u for b in v])
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        self.BoundBox = MagicMock(
+            XMin=lo[0], YMin=lo[1], ZMin=lo[2], XMax=hi[0], YMax=hi[1], ZMax=hi[2]
+        )
+        self.calls = 0
+
+    def valueAt(self, u, v):
+        self.calls += 1
+        return tuple(self.origin + self.surface(u, v))
+
+    def normalAt(self, u, v):
+        return tuple(self.normal(u, v))
+
+    def isPartOfDomain(self, u, v):
+        return True
+
+
+def _cylinder_face(radius=5.0, origin=(0.0, 0.0, 0.0)):
+    return _FakeFace(
+        lambda u, v: np.array([radius * np.sin(u), v, radius * (1.0 - np.cos(u))]),
+        lambda u, v: np.array([-np.sin(u), 0.0, np.cos(u)]),
+        (-0.6, 0.6, 0.0, 4.0),
+        origin,
+    )
+
+
+def _plane_face(origin):
+    return _FakeFace(
+        lambda u, v: np.array([u, v, 0.0]),
+        lambda u, v: np.array([0.0, 0.0, 1.0]),
+        (0.0, 3.0, 0.0, 4.0),
+        origin,
+    )
+
+
+class TestSurfaceProjector(unittest.TestCase):
+    def setUp(self):
+        self.cylinder = _cylinder_face()
+        self.plane = _plane_face((40.0, 0.0, 0.0))
+        self.shape = MagicMock(Faces=[self.cylinder, self.plane])
+
+    def _queries(self, n=20):
+        rng = np.random.default_rng(2)
+        u = rng.uniform(-0.5, 0.5, n)
+        v = rng.uniform(0.2, 3.8, n)
+        offset = rng.uniform(-0.3, 0.3, n)
+        on = np.array([self.cylinder.surface(a, b) for a, b in zip(u, v)])
+        normals = np.array([self.cylinder.normal(a, b) for a, b in zip(u, v)])
+        return on + offset[:, None] * normals, on, normals
+
+    def test_projects_onto_nearest_face(self):
+        query, on, normals = self._queries()
+        faces, uv, projected, result_normals = projection_util.SurfaceProjector(
+            self.shape
+        ).project(query)
+        np.testing.assert_array_equal(faces, 0)
+        np.testing.assert_allclose(projected, on, atol=1e-6)
+        np.testing.assert_allclose(result_normals, normals, atol=1e-6)
+
+    def test_far_faces_are_culled(self):
+        projector = projection_util.SurfaceProjector(self.shape)
+        self.plane.calls = 0
+        projector.project(self._queries()[0])
+        self.assertEqual(self.plane.calls, 0)
+
+    def test_seeds_are_nearest_samples_in_chunks(self):
+        projector = projection_util.SurfaceProjector(self.shape)
+        projector.chunk_size = 3
+        query = np.concatenate(
+            [self._queries()[0], [[41.0, 2.0, 0.5], [42.5, 3.5, -0.2]]]
+        )
+        candidates = np.ones((len(query), 2), dtype=bool)
+        candidates[0, 1] = False
+        seeds = projector._seeds(query, candidates)
+        self.assertEqual(seeds[0, 1], -1)
+        for i, samples in enumerate(projector.sample_slices):
+            np.testing.assert_array_equal(projector.sample_face[samples], i)
+            d = np.linalg.norm(
+                query[:, None] - projector.sample_points[None, samples], axis=-1
+            )
+            expected = samples.start + np.argmin(d, axis=1)
+            np.testing.assert_array_equal(
+                seeds[candidates[:, i], i], expected[candidates[:, i]]
+            )
+
+    def test_second_face_and_fallback_without_scipy(self):
+        query = np.array([[41.0, 2.0, 0.5], [42.5, 3.5, -0.2]])
+        with patch.object(projection_util, "cKDTree", None):
+            projector = projection_util.SurfaceProjector(self.shape)
+            faces, _, projected, _ = projector.project(query)
+        np.testing.assert_array_equal(faces, 1)
+        np.testing.assert_allclose(projected, query * [1.0, 1.0, 0.0], atol=1e-9)
+
+
+class TestDraperLcsAtPoints(unittest.TestCase):
+    def test_batch_matches_single_point(self):
+        points, facets, fabric = _cylinder_patch()
+        draper = _reference_draper(points, facets, fabric)
+        draper.shape = MagicMock(Faces=[_cylinder_face()])
+        rng = np.random.default_rng(4)
+        face = draper.shape.Faces[0]
+        query = np.array(
+            [
+                face.surface(u, v) + rng.uniform(-0.1, 0.1, 3)
+                for u, v in zip(rng.uniform(0.05, 0.55, 10), rng.uniform(0.2, 2.8, 10))
+            ]
+        )
+        with patch.object(draper_mod, "Vector", _Vector), patch.object(
+            draper_mod, "Rotation", _Rotation
+        ), patch.object(projection_util, "Vector", _Vector):
+            single = np.stack([draper.get_lcs_at_point(_Vector(*q)).M for q in query])
+        batch = draper.get_lcs_at_points(query)
+        np.testing.assert_allclose(batch, single, atol=1e-9)
+        self.assertIs(draper.projector, draper.projector)
+
+
+class TestFacetLocator(unittest.TestCase):
+    def setUp(self):
+        self.points, self.facets, _ = _cylinder_patch(n_theta=12, n_z=8)
+
+    def _check_contains(self, query, facets, lam):
+        self.assertTrue(np.all(lam >= -1e-9))
+        np.testing.assert_allclose(lam.sum(axis=1), 1.0)
+        on_surface = np.einsum("qv,qvj->qj", lam, self.points[self.facets[facets]])
+        # projected point is within the facet plane distance of the query
+        self.assertTrue(np.all(np.linalg.norm(on_surface - query, axis=1) < 0.05))
+
+    def _surface_samples(self, n=200):
+        rng = np.random.default_rng(7)
+        idx = rng.integers(len(self.facets), size=n)
+        w = rng.dirichlet([1.0, 1.0, 1.0], size=n)
+        tris = self.points[self.facets[idx]]
+        return np.einsum("qv,qvj->qj", w, tris), idx
+
+    def test_centroids_locate_own_facet(self):
+        centroids = self.points[self.facets].mean(axis=1)
+        facets, lam = FacetLocator(self.points, self.facets).locate(centroids)
+        np.testing.assert_array_equal(facets, np.arange(len(self.facets)))
+        np.testing.assert_allclose(lam, 1.0 / 3.0)
+
+    def test_points_on_surface_are_contained(self):
+        query, _ = self._surface_samples()
+        facets, lam = FacetLocator(self.points, self.facets).locate(query)
+        self._check_contains(query, facets, lam)
+
+    def test_single_point_query(self):
+        query, idx = self._surface_samples(1)
+        facets, lam = FacetLocator(self.points, self.facets).locate(query[0])
+        self.assertEqual(facets.shape, (1,))
+        self.assertEqual(lam.shape, (1, 3))
+
+    def test_brute_force_fallback_matches_tree(self):
+        query, _ = self._surface_samples()
+        expected = FacetLocator(self.points, self.facets).locate(query)
+        with patch.object(drape_util, "cKDTree", None):
+            locator = FacetLocator(self.points, self.facets)
+            self.assertIsNone(locator.tree)
+            result = locator.locate(query)
+            # two queries compared with all centroids at a time
+            locator.brute_force_block = 2 * len(self.facets) + 1
+            blocked = locator.locate(query)
+        for located in (result, blocked):
+            np.testing.assert_array_equal(located[0], expected[0])
+            np.testing.assert_allclose(located[1], expected[1])
+
+    def test_sliver_queries_land_in_containing_facet(self):
+        # strip of 400 slivers across a unit square, queries near the
+        # long edges are nearer the centroids of other slivers than of
+        # their own
+        points, facets = _grid(200, 1)
+        points[:, 0] /= 200.0
+        rng = np.random.default_rng(3)
+        query = np.stack(
+            [rng.uniform(0, 1, 500), rng.uniform(0, 1, 500), np.zeros(500)], -1
+        )
+        lam = drape_util.barycentric(query[:, None, :], points[facets][None])
+        expected = np.argmax(lam.min(axis=-1), axis=1)
+        for tree in (drape_util.cKDTree, None):
+            with patch.object(drape_util, "cKDTree", tree):
+                located, lam = FacetLocator(points, facets).locate(query)
+            self.assertTrue(np.all(lam >= -1e-9))
+            np.testing.assert_array_equal(located, expected)
+
+
+class _FakeSurface:
+    def __init__(self, k):
+        self.k = k
+
+    def curvature(self, u, v, kind):
+        return self.k if kind == "Max" else 0.0
+
+
+class _FakeShape:
+    # cylinder-like patch whose tessellation produces `bias` times the
+    # modelled facet count
+    def __init__(self, bias=1.0, radius=50.0):
+        self.bias = bias
+        self.ShapeType = "Face"
+        self.Vertexes = []
+        bb = MagicMock(DiagonalLength=300.0, XMin=0.0, YMin=0.0, ZMin=0.0)
+        bb.XMax, bb.YMax, bb.ZMax = 200.0, 150.0, 2.0 * radius
+        bb.isValid.return_value = True
+        self.BoundBox = bb
+        face = MagicMock(Area=200.0 * 150.0, ParameterRange=(0.0, 1.0, 0.0, 1.0))
+        face.Surface = _FakeSurface(1.0 / radius)
+        self.Faces = [face]
+        self.Edges = []
+        for length, k in ((200.0, 1.0 / radius), (150.0, 0.0)) * 2:
+            edge = MagicMock(Length=length, ParameterRange=(0.0, 1.0))
+            edge.curvatureAt.return_value = k
+            self.Edges.append(edge)
+        self.deflections = []
+
+    def tessellate(self, deflection):
+        self.deflections.append(deflection)
+        stats = mesh_util.shape_mesh_stats(self)
+        return int(self.bias * mesh_util.estimate_facet_count(stats, deflection))
+
+
+def _patched_mesh_module():
+    fake_mesh = MagicMock()
+    fake_mesh.Mesh.side_effect = lambda count: MagicMock(
+        CountFacets=count, CountPoints=count // 2
+    )
+    return patch.object(mesh_util, "Mesh", fake_mesh)
+
+
+class TestShape2MeshBudget(unittest.TestCase):
+    def setUp(self):
+        mesh_util.tessellation_cache.clear()
+        self.addCleanup(mesh_util.tessellation_cache.clear)
+
+    def _mesh(self, shape, max_length, max_facets):
+        with _patched_mesh_module():
+            return mesh_util.shape2MeshBudget(shape, max_length, max_facets)
+
+    def test_estimate_decreases_with_deflection(self):
+        stats = mesh_util.shape_mesh_stats(_FakeShape())
+        counts = [mesh_util.estimate_facet_count(stats, d) for d in (0.01, 0.1, 1.0)]
+        self.assertGreater(counts[0], counts[1])
+        self.assertGreater(counts[1], counts[2])
+
+    def test_fine_enough_mesh_uses_max_length_deflection(self):
+        shape = _FakeShape()
+        mesh = self._mesh(shape, 20.0, 100000)
+        self.assertEqual(shape.deflections, [2.0])
+        self.assertLessEqual(mesh.CountFacets, 100000)
+
+    def test_accurate_estimate_needs_one_tessellation(self):
+        shape = _FakeShape()
+        mesh = self._mesh(shape, 0.2, 3000)
+        self.assertEqual(len(shape.deflections), 1)
+        self.assertLessEqual(mesh.CountFacets, 3000)
+        self.assertGreater(mesh.CountFacets, 2000)
+
+    def test_underestimate_is_corrected_by_second_tessellation(self):
+        shape = _FakeShape(bias=1.8)
+        mesh = self._mesh(shape, 0.2, 3000)
+        self.assertEqual(len(shape.deflections), 2)
+        self.assertLessEqual(mesh.CountFacets, 3000)
+
+
+class TestTessellationCache(unittest.TestCase):
+    def setUp(self):
+        mesh_util.tessellation_cache.clear()
+        self.addCleanup(mesh_util.tessellation_cache.clear)
+
+    def test_same_geometry_tessellates_once(self):
+        shape, other = _FakeShape(), _FakeShape()
+        with _patched_mesh_module():
+            a = mesh_util.shape2Mesh(shape, 2.0)
+            b = mesh_util.shape2Mesh(other, 2.0)
+        self.assertIs(a, b)
+        self.assertEqual(shape.deflections, [mesh_util.quantize_deflection(0.2)])
+        self.assertEqual(other.deflections, [])
+
+    def test_deflection_snaps_down_to_shared_level(self):
+        q = mesh_util.quantize_deflection
+        self.assertEqual(q(2.0), 2.0)
+        self.assertLessEqual(q(0.2), 0.2)
+        self.assertGreater(q(0.2), 0.2 / 2 ** (1 / mesh_util.DEFLECTION_STEPS))
+        self.assertEqual(q(0.2), q(0.199))
+
+    def test_shell_and_dart_share_tessellation(self):
+        # the facet budget moves the shell deflection from 0.125 to about
+        # 0.13, the dart's MaxLength 4.0 asks for 0.4 and takes the finer
+        # tessellation the shell made of the same support
+        shape, other = _FakeShape(), _FakeShape()
+        stats = mesh_util.shape_mesh_stats(shape)
+        budget = int(mesh_util.estimate_facet_count(stats, 0.13) / 0.9)
+        with _patched_mesh_module():
+            shell = mesh_util.shape2MeshBudget(shape, 1.25, budget)
+            dart = mesh_util.shape2Mesh(other, 4.0, share=True)
+        self.assertIs(shell, dart)
+        self.assertEqual(len(shape.deflections), 1)
+        self.assertEqual(other.deflections, [])
+
+    def test_dart_without_shell_keeps_its_max_length(self):
+        shape = _FakeShape()
+        with _patched_mesh_module():
+            mesh_util.shape2Mesh(shape, 4.0, share=True)
+            # a coarser tessellation is never shared
+            mesh_util.shape2Mesh(shape, 2.0, share=True)
+        self.assertEqual(
+            shape.deflections,
+            [mesh_util.quantize_deflection(0.4), mesh_util.quantize_deflection(0.2)],
+        )
+
+    def test_deflection_and_geometry_are_part_of_key(self):
+        shape, other = _FakeShape(), _FakeShape(radius=40.0)
+        with _patched_mesh_module():
+            a = mesh_util.shape2Mesh(shape, 2.0)
+            b = mesh_util.shape2Mesh(shape, 3.0)
+            c = mesh_util.shape2Mesh(other, 2.0)
+        self.assertIsNot(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(len(mesh_util.tessellation_cache.entries), 3)
+
+    def test_eviction_bounds_memory(self):
+        cache = mesh_util.TessellationCache()
+        meshes = [MagicMock(CountPoints=100, CountFacets=200) for _ in range(3)]
+        size = cache.mesh_bytes(meshes[0])
+        cache.max_bytes = 2 * size
+        cache.put("a", meshes[0])
+        cache.put("b", meshes[1])
+        self.assertIs(cache.get("a"), meshes[0])
+        cache.put("c", meshes[2])
+        self.assertIsNone(cache.get("b"))
+        self.assertIs(cache.get("a"), meshes[0])
+        self.assertIs(cache.get("c"), meshes[2])
+        self.assertEqual(cache.total_bytes, 2 * size)
+
+
+def _in_process_flatten(points, facets, *args, progress=None):
+    return points[:, :2], []
+
+
+def _fake_flatten(points, facets, steps, relax_weight, method, initial, seed, seam):
+    if not len(points):
+        raise ValueError("Can't flatten shape")
+    return points[:, :2] * relax_weight, [facets + steps]
+
+
+class _FakeShellProxy:
+    def __init__(self, log, points):
+        self.log = log
+        self.points = points
+
+    def drape_request(self, fp):
+        if self.points is None:
+            return None
+        facets = np.arange(len(self.points), dtype=np.int32)
+        return drape_scheduler.DrapeRequest(
+            None, None, None, self.points, facets, "FaceUnwrapper", None
+        )
+
+    def finish_drape(self, fp, request, flat, error=None):
+        self.log.append((fp.Name, flat))
+        self.errors.append(error)
+
+
+class TestDrapeScheduler(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.errors = []
+        rng = np.random.default_rng(1)
+        self.shells = []
+        for name, n in (("Shell003", 5), ("Shell001", 0), ("Shell002", None)):
+            points = None if n is None else rng.normal(size=(n, 3))
+            shell = MagicMock(Name=name)
+            shell.Proxy = _FakeShellProxy(self.log, points)
+            shell.Proxy.errors = self.errors
+            self.shells.append(shell)
+        shell = MagicMock(Name="Shell000")
+        shell.Proxy = _FakeShellProxy(self.log, rng.normal(size=(4, 3)))
+        shell.Proxy.errors = self.errors
+        self.shells.append(shell)
+
+    def _run(self, workers):
+        with patch.object(drape_scheduler, "flatten_arrays", _fake_flatten):
+            return drape_scheduler.DrapeScheduler(workers).run(self.shells)
+
+    def test_results_written_back_in_name_order(self):
+        draped = self._run(1)
+        self.assertEqual(
+            [fp.Name for fp in draped],
+            ["Shell000", "Shell001", "Shell003"],
+        )
+        self.assertEqual([name for name, _ in self.log], [fp.Name for fp in draped])
+        self.assertIsNone(self.log[1][1])
+        self.assertEqual(self.errors, [None, "ValueError: Can't flatten shape", None])
+        ze_nodes, boundaries = self.log[2][1]
+        np.testing.assert_allclose(
+            ze_nodes,
+            self.shells[0].Proxy.points[:, :2] * draper_mod.Draper.unwrap_relax_weight,
+        )
+        np.testing.assert_array_equal(
+            boundaries[0], np.arange(5) + draper_mod.Draper.unwrap_steps
+        )
+
+    def test_spawned_pool_matches_serial(self):
+        # real worker processes, which import the unwrap code without FreeCAD
+        jobs = [
+            (*mesh, *draper_mod.Draper.unwrap_options("ARAP"))
+            for mesh in (_grid(4, 3), _cylinder_patch()[:2])
+        ]
+        jobs.append((np.zeros((0, 3)), np.zeros((0, 3), np.int32), 1, 1.0, "ARAP"))
+        scheduler = drape_scheduler.DrapeScheduler(2)
+        self.assertIsNotNone(drape_scheduler.worker_python())
+        serial = [drape_scheduler._unwrap_job(job) for job in jobs]
+        pooled = scheduler.unwrap_all(jobs)
+        self.assertEqual([error for _, error in serial[:2]], [None, None])
+        for (a, a_error), (b, b_error) in zip(pooled, serial):
+            self.assertEqual(a_error, b_error)
+            if b is None:
+                continue
+            np.testing.assert_allclose(a[0], b[0], atol=1e-9)
+        self.assertIsNone(pooled[2][0])
+        self.assertIn("Can't flatten shape", pooled[2][1])
+
+    def test_face_unwrapper_jobs_retried_in_process(self):
+        # the spawned workers can't import flatmesh outside FreeCAD
+        meshes = (_grid(4, 3), _grid(3, 3))
+        jobs = [
+            (*mesh, *draper_mod.Draper.unwrap_options("FaceUnwrapper"))
+            for mesh in meshes
+        ]
+        with patch.object(drape_scheduler, "flatten_arrays", _in_process_flatten):
+            pooled = drape_scheduler.DrapeScheduler(2).unwrap_all(jobs)
+        for (points, _), (flat, error) in zip(meshes, pooled):
+            self.assertIsNone(error)
+            np.testing.assert_array_equal(flat[0], points[:, :2])
+
+
+def _job_request(n=4):
+    points = np.random.default_rng(2).normal(size=(n, 3))
+    return drape_scheduler.DrapeRequest(
+        None, "keys", None, points, np.arange(n), "ARAP", None
+    )
+
+
+class TestDrapeJob(unittest.TestCase):
+    # jobs run in a spawned worker process unless worker_context() finds
+    # no interpreter, the thread fallback is tested with a patched unwrap
+
+    def test_job_unwraps_in_worker_process(self):
+        points, facets, _ = _cylinder_patch()
+        request = drape_scheduler.DrapeRequest(
+            None, "keys", None, points, facets, "ARAP", None
+        )
+        job = drape_scheduler.DrapeJob(request).start()
+        self.assertIsNotNone(job._process)
+        self.assertTrue(job.wait(30.0))
+        self.assertIsNone(job.error)
+        expected, _ = drape_scheduler._unwrap_job(drape_scheduler.unwrap_args(request))
+        np.testing.assert_allclose(job.result[0], expected[0], atol=1e-9)
+        self.assertEqual(job.progress, (1.0, "done"))
+
+    def test_cancel_terminates_worker(self):
+        points, facets = _grid(60, 60)
+        request = drape_scheduler.DrapeRequest(
+            None, "keys", None, points, facets, "ARAP", None
+        )
+        job = drape_scheduler.DrapeJob(request).start()
+        job.cancel()
+        self.assertTrue(job.wait(10.0))
+        self.assertTrue(job.cancelled)
+        self.assertIsNone(job.result)
+        self.assertIsNone(job.error)
+
+    def test_worker_errors_are_kept_for_the_owner(self):
+        job = drape_scheduler.DrapeJob(_job_request(0)).start()
+        self.assertTrue(job.wait(30.0))
+        self.assertEqual(job.error, "ValueError: Can't flatten shape")
+        self.assertIsNone(job.result)
+
+    def test_face_unwrapper_job_falls_back_to_thread(self):
+        points, facets = _grid(4, 3)
+        request = drape_scheduler.DrapeRequest(
+            None, "keys", None, points, facets, "FaceUnwrapper", None
+        )
+        with patch.object(drape_scheduler, "flatten_arrays", _in_process_flatten):
+            job = drape_scheduler.DrapeJob(request).start()
+            self.assertIsNotNone(job._process)
+            self.assertTrue(job.wait(30.0))
+        self.assertIsNone(job._process)
+        self.assertIsNone(job.error)
+        np.testing.assert_array_equal(job.result[0], points[:, :2])
+
+    def _thread_job(self, request, flatten):
+        with patch.object(
+            drape_scheduler, "worker_context", return_value=None
+        ), patch.object(drape_scheduler, "flatten_arrays", flatten):
+            job = drape_scheduler.DrapeJob(request).start()
+            self.assertIsNone(job._process)
+            self.assertTrue(job.wait(5.0))
+        return job
+
+    def test_thread_fallback_unwraps(self):
+        request = _job_request()
+        job = self._thread_job(request, _fake_flatten_progress)
+        self.assertIsNone(job.error)
+        np.testing.assert_allclose(
+            job.result[0],
+            request.points[:, :2] * draper_mod.Draper.unwrap_relax_weight,
+        )
+        self.assertEqual(job.progress, (1.0, "done"))
+        job = self._thread_job(_job_request(0), _fake_flatten_progress)
+        self.assertEqual(job.error, "ValueError: Can't flatten shape")
+
+    def test_thread_fallback_cancel_stops_at_next_progress_report(self):
+        started = threading.Event()
+
+        def endless(*args, progress=None):
+            started.set()
+            while True:
+                progress(0.5, "arap")
+                time.sleep(0.001)
+
+        with patch.object(
+            drape_scheduler, "worker_context", return_value=None
+        ), patch.object(drape_scheduler, "flatten_arrays", endless):
+            job = drape_scheduler.DrapeJob(_job_request()).start()
+            self.assertTrue(started.wait(5.0))
+            job.cancel()
+            self.assertTrue(job.wait(5.0))
+        self.assertTrue(job.cancelled)
+        self.assertIsNone(job.result)
+        self.assertIsNone(job.error)
+
+
+def _fake_flatten_progress(*args, progress=None):
+    progress(0.5, "arap")
+    return _fake_flatten(*args)
+
+
+def _edge_length_error(uv, points, facets):
+    ij = np.concatenate([facets[:, [0, 1]], facets[:, [1, 2]], facets[:, [2, 0]]])
+    flat = np.linalg.norm(uv[ij[:, 0]] - uv[ij[:, 1]], axis=-1)
+    return np.max(
+        np.abs(flat - np.linalg.norm(points[ij[:, 0]] - points[ij[:, 1]], axis=-1))
+    )
+
+
+class TestMirrorDrape(unittest.TestCase):
+    def setUp(self):
+        # half of a cylinder panel symmetric about the YZ plane, x >= 0
+        points, self.facets = _grid(6, 4)
+        theta = points[:, 0] * 0.1
+        self.points = np.stack(
+            [4.0 * np.sin(theta), points[:, 1], 4.0 * (1.0 - np.cos(theta))],
+            axis=-1,
+        )
+        self.mirror = (np.zeros(3), np.array([1.0, 0.0, 0.0]))
+
+    def test_mirror_mesh_shares_the_seam(self):
+        points, facets, seam = drape_util.mirror_mesh(
+            self.points, self.facets, *self.mirror, 1e-6
+        )
+        self.assertEqual(np.count_nonzero(seam), 5)
+        self.assertEqual(len(points), 2 * len(self.points) - 5)
+        self.assertEqual(len(facets), 2 * len(self.facets))
+        np.testing.assert_array_equal(points[: len(self.points)], self.points)
+        # mirrored facets keep their orientation
+        normals = drape_util.facet_normals(points[facets])
+        half = len(self.facets)
+        np.testing.assert_allclose(normals[half:], normals[:half] * [-1.0, 1.0, 1.0])
+        self.assertEqual(len(flatten_util.boundary_loops(facets)), 1)
+
+    def test_mirrored_drape_matches_full_drape(self):
+        seam = draper_mod.mirror_seam(self.points, self.facets, self.mirror)
+        np.testing.assert_array_equal(seam, [0, 7, 14, 21, 28])
+        flattener = flatten_util.ArapFlattener(self.points, self.facets, seam=seam)
+        flattener.findFlatNodes(5, 0.95)
+        points, facets, ze_nodes, boundaries = draper_mod.mirror_drape(
+            self.points, self.facets, flattener.ze_nodes, self.mirror
+        )
+        self.assertEqual(ze_nodes.shape, (len(points), 2))
+        self.assertLess(_edge_length_error(ze_nodes, points, facets), 1e-3)
+        self.assertTrue(np.all(flatten_util.signed_areas(ze_nodes, facets) > 0))
+        self.assertEqual(len(boundaries), 1)
+        self.assertEqual(len(boundaries[0]), 2 * (12 + 4) + 1)
+
+    def test_seam_strains_match_full_drape_on_doubly_curved_shell(self):
+        # sphere cap symmetric about the YZ plane: the seam of the mirrored
+        # half strains like the middle of a drape of the whole cap
+        def cap(x, y):
+            return np.stack([x, y, 6.0 - np.sqrt(36.0 - x**2 - y**2)], axis=-1)
+
+        def seam_strain(points, facets, ze_nodes):
+            fabric = np.column_stack([ze_nodes, np.zeros(len(ze_nodes))])
+            e = calc_facet_strains(points[facets], fabric[facets])
+            radius = np.hypot(0.5 * (e[:, 0] - e[:, 1]), 0.5 * e[:, 2])
+            principal = np.abs(0.5 * (e[:, 0] + e[:, 1])) + radius
+            on_seam = np.any(np.abs(points[facets, 0]) < 1e-9, axis=1)
+            return principal[on_seam].max()
+
+        grid, facets = _grid(8, 8)
+        points = cap(grid[:, 0] * 0.5 - 2.0, grid[:, 1] * 0.5 - 2.0)
+        flattener = flatten_util.ArapFlattener(points, facets)
+        flattener.findFlatNodes(5, 0.95)
+        expected = seam_strain(points, facets, flattener.ze_nodes)
+
+        grid, facets = _grid(4, 8)
+        points = cap(grid[:, 0] * 0.5, grid[:, 1] * 0.5 - 2.0)
+        seam = draper_mod.mirror_seam(points, facets, self.mirror)
+        flat, _ = draper_mod.flatten_arrays(
+            points, facets, 5, 0.95, "ARAP", None, None, seam
+        )
+        # the half's seam stays on a straight line while flattening
+        along = flat[seam] - flat[seam[0]]
+        cross = along[:, 0] * along[-1, 1] - along[:, 1] * along[-1, 0]
+        np.testing.assert_allclose(cross, 0.0, atol=1e-9)
+        points, facets, ze_nodes, _ = draper_mod.mirror_drape(
+            points, facets, flat, self.mirror
+        )
+        self.assertAlmostEqual(
+            seam_strain(points, facets, ze_nodes), expected, delta=0.1 * expected
+        )
+
+    def test_face_unwrapper_seam_is_relaxed_straight(self):
+        seam = draper_mod.mirror_seam(self.points, self.facets, self.mirror)
+        with patch.object(
+            unwrap_util,
+            "make_flattener",
+            side_effect=lambda p, f, *args: flatten_util.ArapFlattener(p, f),
+        ):
+            flat, _, timings = unwrap_util.unwrap_arrays(
+                self.points, self.facets, 1, 0.95, "FaceUnwrapper", seam=seam
+            )
+        np.testing.assert_allclose(flat[seam, 1] - flat[seam[0], 1], 0.0, atol=1e-9)
+        self.assertEqual(timings[0]["stage"], "lscm")
+        self.assertEqual(timings[-1]["stage"], "arap")
+        self.assertIn("warm start", [t["stage"] for t in timings])
+
+    def test_plane_must_cut_the_shell(self):
+        with self.assertRaises(ValueError):
+            draper_mod.mirror_drape(
+                self.points,
+                self.facets,
+                self.points[:, :2],
+                (np.array([-1.0, 0.0, 0.0]), np.array([1.0, 0.0, 0.0])),
+            )
+
+
+class TestRosetteSearch(unittest.TestCase):
+    def setUp(self):
+        # flat sheet stretched 10% along global x when flattened
+        self.points, self.facets = _grid(6, 4)
+        self.ze_nodes = self.points[:, :2] * [1.1, 1.0]
+        self.origin = (3.0, 2.0, 0.0)
+
+    def _candidates(self, angles, rotation=np.eye(3)):
+        return [
+            rosette_search.RosetteCandidate(self.origin, rotation, a, f"Vertex{k}")
+            for k, a in enumerate(angles)
+        ]
+
+    def test_frame_angles_follow_flat_nodes(self):
+        search = rosette_search.RosetteSearch(self.points, self.facets)
+        ze_nodes = self.ze_nodes @ drape_util.z_rotation_matrix(30.0)[:2, :2].T
+        angles = search.frame_angles(ze_nodes, self._candidates([0.0, 45.0]))
+        np.testing.assert_allclose(angles, [30.0, 75.0])
+
+    def test_shear_is_least_along_the_stretch(self):
+        search = rosette_search.RosetteSearch(self.points, self.facets)
+        candidates = self._candidates([30.0, 0.0, 45.0, 90.0])
+        result = search.search(candidates, "ARAP", ze_nodes=self.ze_nodes)
+        self.assertIs(result.best, candidates[1])
+        self.assertAlmostEqual(result.cost, 0.0, places=9)
+        self.assertAlmostEqual(result.costs[3], 0.0, places=9)
+        self.assertGreater(result.costs[2], result.costs[0])
+        # fabric axes at 45 degrees to a 10% stretch
+        expected = np.degrees(np.arcsin((1.1**2 - 1) / (1.1**2 + 1)))
+        self.assertAlmostEqual(result.costs[2], expected, places=6)
+
+    def test_strain_costs_in_chunks(self):
+        search = rosette_search.RosetteSearch(
+            self.points, self.facets, "strain", "area"
+        )
+        search.chunk = 2
+        angles = np.array([0.0, 10.0, 20.0, 90.0, 45.0])
+        costs = search.costs(self.ze_nodes, angles)
+        expected = [search.costs(self.ze_nodes, [a])[0] for a in angles]
+        np.testing.assert_allclose(costs, expected)
+        self.assertAlmostEqual(costs[0], 1.0 - 1.0 / 1.1)
+        with self.assertRaises(ValueError):
+            rosette_search.RosetteSearch(self.points, self.facets, "curvature")
+
+    def test_area_weighting_follows_facet_areas(self):
+        # a coarse 4 x 4 patch stretched along x next to a fine 1 x 1 patch
+        # stretched at 30 degrees: by facet count the fine patch would win
+        coarse, coarse_facets = _grid(2, 2)
+        fine, fine_facets = _grid(8, 8)
+        coarse, fine = coarse * 2.0, fine / 8.0 + [5.0, 0.0, 0.0]
+        points = np.concatenate([coarse, fine])
+        facets = np.concatenate([coarse_facets, fine_facets + len(coarse)])
+        R = drape_util.z_rotation_matrix(30.0)[:2, :2]
+        stretch = R @ np.diag([1.1, 1.0]) @ R.T
+        ze_nodes = np.concatenate([coarse[:, :2] * [1.1, 1.0], fine[:, :2] @ stretch])
+        search = rosette_search.RosetteSearch(points, facets, "shear", "area")
+        self.assertAlmostEqual(search.areas.sum(), 17.0)
+        costs = search.costs(ze_nodes, [0.0, 30.0])
+        self.assertLess(costs[0], costs[1])
+        # unweighted, the 128 fine facets outweigh the 8 coarse ones
+        search.areas = np.ones(len(facets))
+        costs = search.costs(ze_nodes, [0.0, 30.0])
+        self.assertGreater(costs[0], costs[1])
+
+    def test_kinematic_candidates_drape_from_their_seed(self):
+        rotation = _Rotation(None, 90.0).M
+        candidates = self._candidates([0.0, 30.0], rotation)
+        flat = (self.points[:, :2], [])
+        with patch.object(
+            drape_scheduler.DrapeScheduler,
+            "unwrap_all",
+            return_value=[(flat, None), (None, "ValueError: no facet at seed")],
+        ) as unwrap_all:
+            result = rosette_search.RosetteSearch(self.points, self.facets).search(
+                candidates, "Kinematic", workers=1
+            )
+        jobs = unwrap_all.call_args[0][0]
+        self.assertEqual([job[4] for job in jobs], ["Kinematic"] * 2)
+        origin, direction = jobs[1][6]
+        np.testing.assert_allclose(origin, self.origin)
+        np.testing.assert_allclose(direction, rotation @ [math.sqrt(3) / 2, 0.5, 0.0])
+        self.assertIs(result.best, candidates[0])
+        self.assertEqual(result.costs[1], np.inf)
+
+
+class TestArapFlattener(unittest.TestCase):
+    def setUp(self):
+        # developable, so an exact flattening exists
+        points, self.facets = _grid(12, 8)
+        theta = points[:, 0] * 0.1
+        self.points = np.stack(
+            [4.0 * np.sin(theta), points[:, 1], 4.0 * (1.0 - np.cos(theta))],
+            axis=-1,
+        )
+
+    def test_boundary_loops(self):
+        loops = flatten_util.boundary_loops(self.facets)
+        self.assertEqual(len(loops), 1)
+        self.assertEqual(len(loops[0]), 2 * (12 + 8))
+
+    def test_lscm_is_orientation_preserving(self):
+        uv = flatten_util.lscm(self.points, self.facets)
+        self.assertTrue(np.all(flatten_util.signed_areas(uv, self.facets) > 0))
+
+    def test_developable_surface_keeps_edge_lengths(self):
+        flattener = flatten_util.ArapFlattener(self.points, self.facets)
+        flattener.findFlatNodes(5, 0.95)
+        self.assertEqual(flattener.ze_nodes.shape, (len(self.points), 2))
+        self.assertLess(
+            _edge_length_error(flattener.ze_nodes, self.points, self.facets), 1e-4
+        )
+        stages = [t["stage"] for t in flattener.timings]
+        self.assertEqual(stages[:2], ["lscm", "factorize"])
+        self.assertTrue(all(t["seconds"] >= 0 for t in flattener.timings))
+        boundary = flattener.getFlatBoundaryNodes()
+        np.testing.assert_array_equal(boundary[0][0], boundary[0][-1])
+
+    def test_progress_reports_and_aborts(self):
+        flattener = flatten_util.ArapFlattener(self.points, self.facets)
+        reports = []
+
+        def progress(fraction, stage):
+            reports.append((fraction, stage))
+            if len(reports) == 3:
+                raise RuntimeError("cancelled")
+
+        flattener.progress = progress
+        with self.assertRaises(RuntimeError):
+            flattener.findFlatNodes(5, 0.95)
+        self.assertEqual([f for f, _ in reports], [0.05, 0.1, 0.15])
+        self.assertIsNone(flattener.ze_nodes)
+
+    def test_warm_start_converges_quickly(self):
+        points = self.points.copy()
+        points[:, 2] += 0.05 * (points[:, 1] - 4.0) ** 2
+        cold = flatten_util.ArapFlattener(points, self.facets)
+        cold.findFlatNodes(5, 0.95)
+        warm = flatten_util.ArapFlattener(points, self.facets, initial=cold.ze_nodes)
+        warm.findFlatNodes(5, 0.95)
+        self.assertEqual(warm.timings[0]["stage"], "warm start")
+        self.assertLess(len(warm.timings), len(cold.timings))
+        self.assertLessEqual(
+            warm.timings[-1]["energy"], cold.timings[-1]["energy"] * (1 + 1e-6)
+        )
+
+    def test_dense_fallback_without_scipy(self):
+        expected = flatten_util.ArapFlattener(self.points, self.facets)
+        expected.findFlatNodes(2, 0.95)
+        with patch.object(flatten_util, "sp", None):
+            result = flatten_util.ArapFlattener(self.points, self.facets)
+            result.findFlatNodes(2, 0.95)
+        np.testing.assert_allclose(result.ze_nodes, expected.ze_nodes, atol=1e-8)
+
+    def test_warm_start_from_previous_drape(self):
+        # previous drape of a slightly shorter panel
+        previous = _reference_draper(self.points, self.facets, self.points)
+        cold = flatten_util.ArapFlattener(self.points, self.facets)
+        cold.findFlatNodes(5, 0.95)
+        previous.ze_nodes = cold.ze_nodes
+
+        points = self.points * [1.0, 1.03, 1.0]
+        initial = previous.warm_start(points)
+        self.assertEqual(initial.shape, (len(points), 2))
+        # nearest point correspondence extrapolates the affine stretch
+        self.assertLess(_edge_length_error(initial, points, self.facets), 0.05)
+
+        steps, relax_weight, method = draper_mod.Draper.unwrap_options(
+            "FaceUnwrapper", initial
+        )
+        self.assertEqual((steps, method), (draper_mod.Draper.warm_start_steps, "ARAP"))
+        warm = flatten_util.ArapFlattener(points, self.facets, initial=initial)
+        warm.findFlatNodes(steps, relax_weight)
+        self.assertLess(_edge_length_error(warm.ze_nodes, points, self.facets), 1e-3)
+        self.assertLessEqual(len(warm.timings), 2 + warm.iterations_per_step)
+
+    def test_unwrap_options_without_warm_start(self):
+        self.assertEqual(
+            draper_mod.Draper.unwrap_options("FaceUnwrapper"),
+            (
+                draper_mod.Draper.unwrap_steps,
+                draper_mod.Draper.unwrap_relax_weight,
+                "FaceUnwrapper",
+            ),
+        )
+
+    def test_selected_through_flatten_arrays(self):
+        ze_nodes, boundaries = draper_mod.flatten_arrays(
+            self.points, self.facets, 5, 0.95, "ARAP"
+        )
+        self.assertEqual(ze_nodes.shape, (len(self.points), 2))
+        self.assertEqual(len(boundaries), 1)
+        with self.assertRaises(ValueError):
+            draper_mod.make_flattener(self.points, self.facets, "Unknown")
+
+
+class TestPlyDrapes(unittest.TestCase):
+    def setUp(self):
+        # developable cylinder panel, normals point towards the axis
+        self.radius = 4.0
+        points, self.facets = _grid(12, 8)
+        theta = points[:, 0] * 0.1
+        self.points = np.stack(
+            [
+                self.radius * np.sin(theta),
+                points[:, 1],
+                self.radius * (1.0 - np.cos(theta)),
+            ],
+            axis=-1,
+        )
+        self.axis_offset = self.points - [0.0, 0.0, self.radius]
+        self.axis_offset[:, 1] = 0.0
+
+    def test_vertex_normals_are_radial(self):
+        normals = drape_util.vertex_normals(self.points, self.facets)
+        radial = -self.axis_offset / self.radius
+        # boundary vertices only see the facets on one side
+        interior = np.setdiff1d(
+            np.arange(len(self.points)),
+            np.concatenate(flatten_util.boundary_loops(self.facets)),
+        )
+        np.testing.assert_allclose(normals[interior], radial[interior], atol=2e-3)
+        np.testing.assert_allclose(normals, radial, atol=0.06)
+
+    def test_offset_surfaces(self):
+        normals = drape_util.vertex_normals(self.points, self.facets)
+        surfaces = drape_util.offset_surfaces(self.points, normals, [-0.5, 0.0, 0.5])
+        self.assertEqual(surfaces.shape, (3, len(self.points), 3))
+        np.testing.assert_array_equal(surfaces[1], self.points)
+        np.testing.assert_allclose(
+            np.linalg.norm(surfaces[:, :, [0, 2]] - [0.0, self.radius], axis=-1),
+            np.array([[4.5], [4.0], [3.5]]).repeat(len(self.points), axis=1),
+            atol=1e-2,
+        )
+
+    def test_ply_drape_order_moves_outwards(self):
+        self.assertEqual(
+            draper_mod.ply_drape_order([-0.75, -0.25, 0.25, 0.75]),
+            [(1, -1), (2, 1), (3, 2), (0, 1)],
+        )
+        self.assertEqual(draper_mod.ply_drape_order([0.3, 0.1]), [(1, -1), (0, 1)])
+
+    def test_plies_warm_start_from_their_neighbour(self):
+        cold = flatten_util.ArapFlattener(self.points, self.facets)
+        cold.findFlatNodes(5, 0.95)
+        drape = _reference_draper(self.points, self.facets, self.points)
+        drape.ze_nodes = cold.ze_nodes
+        drape.shape = None
+
+        offsets = [-0.5, 0.0, 0.5]
+        initials = []
+        unwrap_arrays = unwrap_util.unwrap_arrays
+
+        def unwrap(
+            points, facets, steps, relax_weight, method, initial, *args, **kwargs
+        ):
+            initials.append(initial)
+            self.assertEqual(method, "ARAP")
+            return unwrap_arrays(
+                points, facets, steps, relax_weight, method, initial, *args, **kwargs
+            )
+
+        with patch.object(unwrap_util, "unwrap_arrays", unwrap), _numpy_placement():
+            plies = draper_mod.drape_offsets(drape, offsets, _Lcs((0.0, 0.0, 0.0), 0.0))
+
+        # the mid ply starts from the drape, the outer plies from it
+        np.testing.assert_array_equal(initials[0], drape.ze_nodes)
+        for initial in initials[1:]:
+            np.testing.assert_array_equal(initial, plies[1].ze_nodes)
+        # each ply keeps the arc lengths of its own surface
+        for ply, z in zip(plies, offsets):
+            self.assertTrue(ply.isValid())
+            self.assertLess(
+                _edge_length_error(ply.ze_nodes, ply.points, self.facets), 2e-3
+            )
+            # the first row flattens straight, to its length on the ply
+            row = np.linalg.norm(np.diff(ply.points[:13], axis=0), axis=-1).sum()
+            width = np.linalg.norm(ply.ze_nodes[12] - ply.ze_nodes[0])
+            self.assertAlmostEqual(width, row, delta=2e-3)
+            self.assertAlmostEqual(width, 1.2 * (self.radius - z), delta=0.06)
+
+    def test_ply_job_unwraps_in_worker_process(self):
+        drape = _reference_draper(self.points, self.facets, self.points)
+        drape.ze_nodes = self.points[:, :2].copy()
+        job = draper_mod.ply_unwrap_job(
+            drape, [-0.5, 0.0, 0.5], _Lcs((0.0, 0.0, 0.0), 0.0), "ARAP"
+        )
+        request = drape_scheduler.PlyDrapeRequest(
+            "keys", ("A", "B", "C"), drape, None, "ARAP", job
+        )
+        ply_job = drape_scheduler.PlyDrapeJob(request).start()
+        self.assertIsNotNone(ply_job._process)
+        self.assertTrue(ply_job.wait(30.0))
+        self.assertIsNone(ply_job.error)
+        self.assertEqual(ply_job.progress, (1.0, "done"))
+        for (a, _), (b, _) in zip(ply_job.result, draper_mod.unwrap_plies(*job)):
+            np.testing.assert_allclose(a, b, atol=1e-9)
+
+
+class TestKinematicFlattener(unittest.TestCase):
+    def test_flat_sheet_maps_to_rotated_fibre_axes(self):
+        points, facets = _grid(12, 8)
+        origin = np.array([4.3, 3.1, 0.0])
+        seed = (origin, np.array([1.0, 1.0, 0.0]))
+        flattener = kinematic_util.KinematicFlattener(points, facets, seed)
+        flattener.findFlatNodes()
+        c = np.sqrt(0.5)
+        expected = (points[:, :2] - origin[:2]) @ np.array([[c, -c], [c, c]])
+        np.testing.assert_allclose(flattener.ze_nodes, expected, atol=1e-9)
+        self.assertEqual(
+            [t["stage"] for t in flattener.timings], ["net", "interpolate"]
+        )
+
+    def test_cylinder_fibres_follow_arc_length(self):
+        grid, facets = _grid(12, 8)
+        theta = grid[:, 0] * 0.1
+        points = np.stack(
+            [4.0 * np.sin(theta), grid[:, 1], 4.0 * (1.0 - np.cos(theta))],
+            axis=-1,
+        )
+        seed = (points[4 * 13 + 6], np.array([1.0, 0.0, 0.0]))
+        flattener = kinematic_util.KinematicFlattener(points, facets, seed)
+        flattener.findFlatNodes()
+        expected = np.stack([4.0 * (theta - 0.6), grid[:, 1] - 4.0], axis=-1)
+        np.testing.assert_allclose(flattener.ze_nodes, expected, atol=2e-2)
+
+    def test_doubly_curved_net_shears_without_stretch(self):
+        grid, facets = _grid(16, 16)
+        x, y = grid[:, 0] * 0.5 - 4.0, grid[:, 1] * 0.5 - 4.0
+        points = np.stack([x, y, 12.0 - np.sqrt(144.0 - x**2 - y**2)], axis=-1)
+        seed = (np.zeros(3), np.array([1.0, 0.0, 0.0]))
+        flat, boundaries = draper_mod.flatten_arrays(
+            points, facets, 5, 0.95, "Kinematic", None, seed
+        )
+        fabric = np.column_stack([flat, np.zeros(len(flat))])
+        strains = calc_facet_strains(points[facets], fabric[facets])
+        # fibres keep their length, the net shears towards the corners
+        self.assertLess(np.abs(strains[:, :2]).max(), 2e-2)
+        self.assertGreater(np.abs(strains[:, 2]).max(), 5e-2)
+        self.assertEqual(len(boundaries), 1)
+        np.testing.assert_array_equal(boundaries[0][0], boundaries[0][-1])
+
+    def test_kinematic_is_not_warm_started(self):
+        options = draper_mod.Draper.unwrap_options("Kinematic", np.zeros((4, 2)))
+        self.assertEqual(options[2], "Kinematic")
+
+    def test_displayed_grid_follows_net_at_fibre_angle(self):
+        # the texture coordinates of a ply at the seed angle are the net
+        # coordinates, up to the placement of the origin: the grid lines
+        # run along the kinematic warp and weft. The LCS is tangent to the
+        # cylinder at its origin.
+        grid, facets = _grid(12, 8)
+        theta = (grid[:, 0] - 6.0) * 0.1
+        points = np.stack(
+            [4.0 * np.sin(theta), grid[:, 1], 4.0 * (1.0 - np.cos(theta))],
+            axis=-1,
+        )
+        angle = 30.0
+        lcs = _Lcs(points[4 * 13 + 6], 0.0)
+        with _numpy_placement():
+            draper = draper_mod.Draper(
+                mesh_arrays.MeshArrays(points, facets),
+                lcs,
+                None,
+                "Kinematic",
+                angle=angle,
+            )
+        net = kinematic_util.KinematicFlattener(
+            points, facets, draper_mod.lcs_seed(lcs, angle)
+        )
+        net.findFlatNodes()
+        st = draper.get_tex_coords_array(angle)[:, :2]
+        # within the facet tangent at the origin, which sets the placement
+        np.testing.assert_allclose(
+            st - st[0], net.ze_nodes - net.ze_nodes[0], atol=0.05
+        )
+        # and the other sign would not
+        st = draper.get_tex_coords_array(-angle)[:, :2]
+        self.assertGreater(
+            np.abs(st - st[0] - net.ze_nodes + net.ze_nodes[0]).max(), 1.0
+        )
+
+
+class TestArrayCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "drape")
+
+    def _arrays(self, n=100):
+        points, facets, _ = _cylinder_patch()
+        return {
+            "points": points,
+            "facets": facets,
+            "strains": np.random.default_rng(n).normal(size=(n, 3)),
+        }
+
+    def test_make_key_is_deterministic(self):
+        a = make_key("abc", 1.25, 3000, (0.0, 1.0, 2.0))
+        self.assertEqual(a, make_key("abc", 1.25, 3000, (0.0, 1.0, 2.0)))
+        self.assertNotEqual(a, make_key("abc", 1.5, 3000, (0.0, 1.0, 2.0)))
+
+    def test_key_includes_format_version(self):
+        a = make_key("abc")
+        with patch.object(cache_util, "FORMAT_VERSION", cache_util.FORMAT_VERSION + 1):
+            self.assertNotEqual(make_key("abc"), a)
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(ArrayCache(self.path).load("missing"))
+
+    def test_truncated_entry_is_discarded(self):
+        cache = ArrayCache(self.path)
+        cache.store("k", self._arrays())
+        with open(cache._file("k"), "r+b") as fh:
+            fh.truncate(os.path.getsize(cache._file("k")) // 2)
+        self.assertIsNone(cache.load("k"))
+        self.assertFalse(os.path.exists(cache._file("k")))
+
+    def test_entry_missing_required_array_is_discarded(self):
+        cache = ArrayCache(self.path)
+        cache.store("k", self._arrays())
+        self.assertIsNotNone(cache.load("k", ("points", "facets")))
+        self.assertIsNone(cache.load("k", ("points", "ze_nodes")))
+        self.assertEqual(cache.entries(), [])
+
+    def test_store_load_roundtrip(self):
+        cache = ArrayCache(self.path)
+        arrays = self._arrays()
+        cache.store("k", arrays)
+        loaded = cache.load("k")
+        self.assertEqual(set(loaded), set(arrays))
+        for k, v in arrays.items():
+            np.testing.assert_array_equal(loaded[k], v)
+            self.assertEqual(loaded[k].dtype, v.dtype)
+
+    def test_lru_eviction_keeps_recently_used(self):
+        cache = ArrayCache(self.path)
+        for i, key in enumerate("abc"):
+            cache.store(key, self._arrays(1000 + i))
+            os.utime(cache._file(key), (time.time() - 100 + i,) * 2)
+        size = max(e[1] for e in cache.entries())
+
+        # touch "a" so "b" becomes least recently used
+        self.assertIsNotNone(cache.load("a"))
+        cache.max_bytes = 2 * size + size // 2
+        cache.evict()
+
+        self.assertIsNone(cache.load("b"))
+        self.assertIsNotNone(cache.load("a"))
+        self.assertIsNotNone(cache.load("c"))
+
+    def test_clear(self):
+        cache = ArrayCache(self.path)
+        cache.store("k", self._arrays())
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,7 @@ import os
 import sys
 import types
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # ---------------------------------------------------------------------------
 # FreeCAD / GUI mock — installed BEFORE any project imports
@@ -449,6 +449,7 @@ class _FakeFCObj:
         object.__setattr__(self, "Name", name)
         object.__setattr__(self, "TypeId", "App::FeaturePython")
         object.__setattr__(self, "Proxy", None)
+        object.__setattr__(self, "InList", [])
 
     # -- FreeCAD object API --------------------------------------------------
 
@@ -1255,6 +1256,17 @@ class TestCompositeShellFPRosetteProperty(unittest.TestCase):
             offset_angle_deg=45.0
         )
 
+    def test_get_tex_coords_array_adds_rosette_angle(self):
+        mock_draper = MagicMock()
+        mock_draper.isValid.return_value = True
+        self.fp.draper = mock_draper
+        self.fp._rosette_angle = 15.0
+        result = self.fp.get_tex_coords_array(30.0)
+        self.assertIs(result, mock_draper.get_tex_coords_array.return_value)
+        mock_draper.get_tex_coords_array.assert_called_once_with(
+            offset_angle_deg=45.0
+        )
+
     def test_on_changed_rosette_triggers_recompute(self):
         # onChanged("Rosette") should trigger fp.recompute() which calls execute()
         # With no support/laminate, execute() returns early without error.
@@ -1264,11 +1276,847 @@ class TestCompositeShellFPRosetteProperty(unittest.TestCase):
         self.assertEqual(CompositeShellFP.Type, "Composite::Shell")
 
 
+class TestCompositeShellFPDrapeCache(unittest.TestCase):
+    """Tests for the on-disk drape cache used by CompositeShellFP.drape()."""
+
+    def setUp(self):
+        self.obj = _FakeFCObj("CompositeShell")
+        self.obj.Document = MagicMock()
+        self.fp = CompositeShellFP(self.obj)
+        self.obj.Shape = MagicMock()
+        self.lcs = MagicMock()
+        placement = self.lcs.getGlobalPlacement.return_value
+        placement.Base = (1.0, 2.0, 3.0)
+        placement.Rotation.Q = (0.0, 0.0, 0.0, 1.0)
+        self.cache = MagicMock()
+        self.facet_count = 10
+        self.mod = _composite_shell_feature_mod
+
+    def _drape(self):
+        return self._call(lambda: self.fp.drape(self.obj, self.lcs))
+
+    def _call(self, fn):
+        with patch.object(
+            self.mod, "get_drape_cache", return_value=self.cache
+        ) as get_cache, patch.object(
+            self.mod.mesh_util, "shape_digest", return_value="digest"
+        ), patch.object(
+            self.mod.mesh_util,
+            "shape2MeshBudget",
+            return_value=MagicMock(CountFacets=self.facet_count),
+        ) as shape2mesh, patch.object(
+            self.mod.mesh_util, "arrays2Mesh", return_value="cached mesh"
+        ), patch.object(
+            self.mod, "Draper", unwrap_steps=5, unwrap_relax_weight=0.95
+        ) as draper_cls, patch.object(
+            self.mod.MeshArrays,
+            "from_mesh",
+            return_value=MagicMock(points="points", facets="facets"),
+        ):
+            result = fn()
+        return result, get_cache, shape2mesh, draper_cls
+
+    def test_init_adds_drape_cache_enabled(self):
+        self.assertTrue(self.obj.DrapeCache)
+
+    def test_cache_hit_skips_meshing(self):
+        self.cache.load.return_value = {"points": []}
+        result, _, shape2mesh, draper_cls = self._drape()
+        self.assertEqual(result, "cached mesh")
+        shape2mesh.assert_not_called()
+        draper_cls.assert_not_called()
+        self.assertIs(self.fp.draper, draper_cls.from_cache.return_value)
+
+    def test_unusable_cache_entry_is_discarded(self):
+        self.cache.load.return_value = {"points": []}
+        with patch.object(
+            self.mod, "get_drape_cache", return_value=self.cache
+        ), patch.object(self.mod, "Draper") as draper_cls:
+            draper_cls.from_cache.side_effect = ValueError("shape mismatch")
+            reused, mesh = self.fp.reuse_drape(self.obj, self.lcs, ("g", "p"))
+        self.assertEqual((reused, mesh), (False, None))
+        self.cache.discard.assert_called_once_with(self.cache.load.call_args[0][0])
+        self.assertEqual(self.cache.load.call_args[0][1][-1], "placement")
+
+    def test_cache_hit_placed_elsewhere_is_placed_again(self):
+        here = [1.0, 2.0, 3.0, 0.0, 0.0, 0.0, 1.0]
+        for placement, placed in ((here, False), ([0.0] * 3 + here[3:], True)):
+            self.cache.load.return_value = {"placement": placement}
+            self._drape()
+            self.assertEqual(self.fp.draper.place.called, placed)
+            self.fp.draper = None
+        self.cache.store.assert_not_called()
+
+    def test_cache_miss_stores_result(self):
+        self.cache.load.return_value = None
+        _, _, shape2mesh, draper_cls = self._drape()
+        shape2mesh.assert_called_once()
+        key = self.cache.load.call_args[0][0]
+        self.cache.store.assert_called_once_with(
+            key, draper_cls.return_value.to_cache.return_value
+        )
+
+    def test_meshes_once_within_facet_budget(self):
+        self.cache.load.return_value = None
+        self.obj.DraperMaxFacets = 500
+        _, _, shape2mesh, _ = self._drape()
+        shape2mesh.assert_called_once_with(self.obj.Shape, self.obj.MaxLength, 500)
+
+    def test_over_budget_mesh_skips_draper(self):
+        self.cache.load.return_value = None
+        self.facet_count = 4000
+        result, _, _, draper_cls = self._drape()
+        self.assertEqual(result.CountFacets, 4000)
+        draper_cls.assert_not_called()
+        self.assertIsNone(self.fp.draper)
+
+    def test_placement_change_only_reruns_placement_stage(self):
+        self.cache.load.return_value = None
+        self._drape()
+        draper = self.fp.draper
+        draper.isValid.return_value = True
+
+        self.lcs.getGlobalPlacement.return_value.Base = (1.0, 2.0, 4.0)
+        result, _, shape2mesh, draper_cls = self._drape()
+        self.assertIsNone(result)
+        shape2mesh.assert_not_called()
+        draper_cls.assert_not_called()
+        draper.place.assert_called_once_with(self.lcs)
+        self.assertIs(self.fp.draper, draper)
+        # the cached drape of the geometry is kept, not stored again
+        self.cache.store.assert_called_once()
+        stored = self.cache.store.call_args[0][1]
+        self.assertIs(stored, draper.to_cache.return_value)
+
+    def _start_job(self):
+        self.obj.Support = MagicMock()
+        self.obj.Laminate = MagicMock()
+        self.obj.Rosette = None
+        self.obj.LocalCoordinateSystem = self.lcs
+        with patch.object(self.mod, "DrapeJob") as job_cls:
+            running = self._call(lambda: self.fp.start_drape_job(self.obj))[0]
+        return running, job_cls
+
+    def test_background_job_started_for_new_geometry(self):
+        self.cache.load.return_value = None
+        self.fp.draper = None
+        running, job_cls = self._start_job()
+        self.assertTrue(running)
+        request = job_cls.call_args[0][0]
+        self.assertEqual(request.points, "points")
+        self.assertIs(self.fp._drape_job, job_cls.return_value.start.return_value)
+        # the superseded drape is not served while the job runs
+        self.assertIsNone(self.fp.draper)
+
+    def test_background_job_kept_for_same_inputs(self):
+        self.cache.load.return_value = None
+        _, job_cls = self._start_job()
+        job = self.fp._drape_job
+        job.request = job_cls.call_args[0][0]
+        running, job_cls = self._start_job()
+        self.assertTrue(running)
+        job_cls.assert_not_called()
+        job.cancel.assert_not_called()
+
+    def test_newer_change_cancels_background_job(self):
+        self.cache.load.return_value = None
+        _, job_cls = self._start_job()
+        job = self.fp._drape_job
+        job.request = job_cls.call_args[0][0]
+        with patch.object(self.fp, "execute"):
+            self.fp.onChanged(self.obj, "MaxLength")
+        job.cancel.assert_called_once()
+        self.assertIsNone(self.fp._drape_job)
+
+    def test_no_background_job_when_cached(self):
+        self.cache.load.return_value = {"points": []}
+        running, job_cls = self._start_job()
+        self.assertFalse(running)
+        job_cls.assert_not_called()
+
+    def test_poll_publishes_finished_job(self):
+        self.cache.load.return_value = None
+        _, job_cls = self._start_job()
+        job = self.fp._drape_job
+        job.request = job_cls.call_args[0][0]
+        job.done.return_value = False
+        job.progress = (0.5, "arap")
+        self.obj.Label = "Shell"
+        self.obj.ViewObject = None
+        with patch.object(self.fp, "schedule_drape_poll") as schedule:
+            self.fp.poll_drape_job(self.obj, job)
+        schedule.assert_called_once_with(self.obj, job)
+
+        job.done.return_value = True
+        job.error = None
+        job.result = ("ze_nodes", [])
+        with patch.object(self.fp, "finish_drape") as finish, patch.object(
+            self.fp, "fibre_analysis"
+        ):
+            self.fp.poll_drape_job(self.obj, job)
+        finish.assert_called_once_with(self.obj, job.request, job.result, None)
+        self.assertIsNone(self.fp._drape_job)
+
+    def test_dependents_see_the_drape_when_the_job_finishes(self):
+        self.cache.load.return_value = None
+        _, job_cls = self._start_job()
+        job = self.fp._drape_job
+        job.request = job_cls.call_args[0][0]
+        job.done.return_value = True
+        job.error = None
+        job.result = ("ze_nodes", [])
+        draper = MagicMock()
+        seen = []
+        dependent = MagicMock()
+        self.obj.InList = [dependent]
+        self.obj.Document = MagicMock()
+        self.obj.Document.recompute.side_effect = lambda: seen.append(
+            self.fp.has_valid_draper() and self.fp.draper
+        )
+        self.obj.ViewObject = None
+
+        def finish(fp, request, flat, error):
+            self.fp.draper = draper
+
+        with patch.object(self.fp, "finish_drape", side_effect=finish), patch.object(
+            self.fp, "analyse_drape"
+        ):
+            self.fp.poll_drape_job(self.obj, job)
+        dependent.touch.assert_called_once()
+        self.assertEqual(seen, [draper])
+
+    def test_poll_ignores_replaced_job(self):
+        stale = MagicMock()
+        with patch.object(self.fp, "finish_drape") as finish:
+            self.fp.poll_drape_job(self.obj, stale)
+        finish.assert_not_called()
+
+    def test_kinematic_drape_redrapes_when_placement_changes(self):
+        self.obj.Flattener = "Kinematic"
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+
+        self.lcs.getGlobalPlacement.return_value.Base = (1.0, 2.0, 4.0)
+        _, _, shape2mesh, draper_cls = self._drape()
+        shape2mesh.assert_called_once()
+        self.assertEqual(draper_cls.call_args[0][3], "Kinematic")
+
+    def test_kinematic_drape_follows_rosette_angle(self):
+        self.obj.Flattener = "Kinematic"
+        self.obj.Rosette = MagicMock(Angle=0.0)
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+
+        self.obj.Rosette.Angle = 30.0
+        _, _, shape2mesh, draper_cls = self._drape()
+        shape2mesh.assert_called_once()
+        self.assertEqual(draper_cls.call_args.kwargs["angle"], 30.0)
+
+    def test_kinematic_drape_request_carries_seed(self):
+        self.obj.Flattener = "Kinematic"
+        self.cache.load.return_value = None
+        with patch.object(self.mod, "lcs_seed", return_value="seed") as seed:
+            request, *_ = self._drape_request()
+        seed.assert_called_once_with(self.lcs, 0.0)
+        self.assertEqual(request.seed, "seed")
+        self.assertEqual(request.flattener, "Kinematic")
+
+    def test_unchanged_inputs_skip_both_stages(self):
+        self.cache.load.return_value = None
+        self._drape()
+        draper = self.fp.draper
+        draper.isValid.return_value = True
+
+        result, _, shape2mesh, _ = self._drape()
+        self.assertIsNone(result)
+        shape2mesh.assert_not_called()
+        draper.place.assert_not_called()
+
+    def test_geometry_change_redrapes(self):
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+        self.obj.MaxLength = 2.5
+        _, _, shape2mesh, draper_cls = self._drape()
+        shape2mesh.assert_called_once()
+        draper_cls.assert_called_once()
+
+    def test_flattener_selection(self):
+        self.assertEqual(self.obj.Flattener, "FaceUnwrapper")
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+        self.obj.Flattener = "ARAP"
+        _, _, _, draper_cls = self._drape()
+        draper_cls.assert_called_once_with(
+            draper_cls.call_args[0][0],
+            self.lcs,
+            self.obj.Shape,
+            "ARAP",
+            previous=None,
+            quads=False,
+            angle=0.0,
+            mirror=None,
+        )
+
+    def test_quad_dominant_redrapes_with_quads(self):
+        self.assertFalse(self.obj.QuadDominant)
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+        self.obj.QuadDominant = True
+        _, _, shape2mesh, draper_cls = self._drape()
+        shape2mesh.assert_called_once()
+        self.assertTrue(draper_cls.call_args.kwargs["quads"])
+
+    def test_warm_start_passes_previous_drape(self):
+        self.obj.WarmStart = True
+        self.cache.load.return_value = None
+        _, _, _, draper_cls = self._drape()
+        self.assertIsNone(draper_cls.call_args.kwargs["previous"])
+        previous = self.fp.draper
+        previous.isValid.return_value = True
+
+        self.obj.MaxLength = 2.5
+        _, _, _, draper_cls = self._drape()
+        self.assertIs(draper_cls.call_args.kwargs["previous"], previous)
+
+    def test_warm_started_drapes_are_not_cached(self):
+        self.obj.WarmStart = True
+        self.cache.load.return_value = None
+        self._drape()
+        self.cache.store.assert_called_once()
+        self.fp.draper.isValid.return_value = True
+
+        self.obj.MaxLength = 2.5
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+        # nor when only the LCS moves
+        self.lcs.getGlobalPlacement.return_value.Base = (0.0, 0.0, 0.0)
+        self._drape()
+        self.cache.store.assert_called_once()
+
+        # the kinematic drape ignores the previous drape
+        self.obj.Flattener = "Kinematic"
+        self._drape()
+        self.assertEqual(self.cache.store.call_count, 2)
+
+    def test_warm_started_scheduled_drape_is_not_cached(self):
+        self.cache.load.return_value = None
+        request, *_ = self._drape_request()
+        request = request._replace(initial="initial", flattener="ARAP")
+        self._call(lambda: self.fp.finish_drape(self.obj, request, ("ze", [])))
+        self.assertEqual(self.fp._drape_keys, request.keys)
+        self.cache.store.assert_not_called()
+
+    def test_warm_start_drape_request(self):
+        self.obj.WarmStart = True
+        self.cache.load.return_value = None
+        self._drape()
+        previous = self.fp.draper
+        previous.isValid.return_value = True
+        self.obj.MaxLength = 2.5
+        request, *_ = self._drape_request()
+        previous.warm_start.assert_called_once_with("points")
+        self.assertIs(request.initial, previous.warm_start.return_value)
+
+    def _ply_drapes(self, drape_offsets):
+        with patch.object(self.mod, "drape_offsets", drape_offsets):
+            self.fp.update_ply_drapes(self.obj)
+
+    def _ply_laminate(self):
+        self.cache.load.return_value = None
+        self._drape()
+        self.fp.draper.isValid.return_value = True
+        self.obj.Rosette = None
+        self.obj.LocalCoordinateSystem = self.lcs
+        self.obj.Laminate = MagicMock()
+        self.obj.Laminate.Proxy.FEMLayers = [
+            MagicMock(thickness=0.25, material={"Name": "00:A"}),
+            MagicMock(thickness=0.5, material={"Name": "01:B"}),
+        ]
+
+    def test_ply_drapes_by_layer(self):
+        self.assertFalse(self.obj.PlyDrapes)
+        self.obj.BackgroundDrape = False
+        self._ply_laminate()
+        plies = [MagicMock(), MagicMock()]
+        drape_offsets = MagicMock(return_value=plies)
+
+        self._ply_drapes(drape_offsets)
+        drape_offsets.assert_not_called()
+        self.assertIs(self.fp.get_strains("00:A"), self.fp.draper.strains)
+
+        self.obj.PlyDrapes = True
+        self._ply_drapes(drape_offsets)
+        drape_offsets.assert_called_once_with(
+            self.fp.draper, [-0.25, 0.125], self.lcs, "FaceUnwrapper", 0.0
+        )
+        self.assertIs(self.fp.get_strains("00:A"), plies[0].strains)
+        self.assertIs(self.fp.get_strains("01:B"), plies[1].strains)
+        self.assertIs(self.fp.get_strains(), self.fp.draper.strains)
+        self.fp.get_tex_coords(0.0, layer="01:B")
+        plies[1].get_tex_coords.assert_called_once()
+
+        # unchanged drape and laminate keep the ply drapes
+        self._ply_drapes(drape_offsets)
+        drape_offsets.assert_called_once()
+
+        # moving the LCS only places the plies again
+        self.lcs.getGlobalPlacement.return_value.Base = (0.0, 0.0, 0.0)
+        self._drape()
+        self._ply_drapes(drape_offsets)
+        drape_offsets.assert_called_once()
+        plies[0].place.assert_called_once_with(self.lcs)
+
+    def test_background_ply_drapes_run_in_a_job(self):
+        self.obj.BackgroundDrape = True
+        self.obj.PlyDrapes = True
+        self._ply_laminate()
+        plies = [MagicMock(), MagicMock()]
+        with patch.object(self.mod, "PlyDrapeJob") as job_cls, patch.object(
+            self.mod, "ply_unwrap_job", return_value=("surfaces",)
+        ) as unwrap_job, patch.object(
+            self.mod, "drape_offsets"
+        ) as drape_offsets, patch.object(
+            self.fp, "schedule_drape_poll"
+        ) as schedule:
+            self.fp.update_ply_drapes(self.obj)
+            job = self.fp._ply_drape_job
+            job.request = job_cls.call_args[0][0]
+            # a second analysis of the same drape keeps the running job
+            self.fp.update_ply_drapes(self.obj)
+        drape_offsets.assert_not_called()
+        job_cls.assert_called_once()
+        unwrap_job.assert_called_once_with(
+            self.fp.draper, [-0.25, 0.125], self.lcs, "FaceUnwrapper", 0.0
+        )
+        self.assertIs(job, job_cls.return_value.start.return_value)
+        schedule.assert_called_once_with(self.obj, job, self.fp.poll_ply_drape_job)
+        self.assertEqual(self.fp.ply_drapers, {})
+
+        job.done.return_value = True
+        job.result = ["flat A", "flat B"]
+        self.obj.ViewObject = None
+        with patch.object(self.mod, "place_plies", return_value=plies) as place:
+            self.fp.poll_ply_drape_job(self.obj, job)
+        place.assert_called_once_with(
+            self.fp.draper, "surfaces", job.result, self.lcs
+        )
+        self.assertIsNone(self.fp._ply_drape_job)
+        self.assertIs(self.fp.get_strains("01:B"), plies[1].strains)
+        with patch.object(self.mod, "drape_offsets") as drape_offsets:
+            self.fp.update_ply_drapes(self.obj)
+        drape_offsets.assert_not_called()
+
+    def test_ply_drape_job_of_replaced_drape_is_dropped(self):
+        self.obj.PlyDrapes = True
+        self._ply_laminate()
+        job = MagicMock()
+        job.done.return_value = True
+        job.request = self.mod.PlyDrapeRequest(
+            None, ("00:A",), MagicMock(), self.lcs, "ARAP", ("surfaces",)
+        )
+        self.fp._ply_drape_job = job
+        self.fp.ply_drapers = {}
+        with patch.object(self.mod, "place_plies") as place:
+            self.fp.poll_ply_drape_job(self.obj, job)
+        place.assert_not_called()
+        self.assertEqual(self.fp.ply_drapers, {})
+
+    def test_shear_angles_per_facet_and_vertex(self):
+        self.assertIsNone(self.fp.get_shear_angles())
+        self.cache.load.return_value = None
+        self._drape()
+        draper = self.fp.draper
+        draper.isValid.return_value = True
+        self.fp._rosette_angle = 10.0
+        self.assertIs(
+            self.fp.get_shear_angles(offset_angle_deg=45.0),
+            draper.get_shear_angles.return_value,
+        )
+        draper.get_shear_angles.assert_called_once_with(55.0)
+        self.assertIs(
+            self.fp.get_shear_angles(per_vertex=True),
+            draper.get_vertex_shear_angles.return_value,
+        )
+        draper.get_vertex_shear_angles.assert_called_once_with(10.0)
+
+    def test_hotspot_analysis_uses_container_limits(self):
+        self.assertEqual(self.fp.get_hotspots(), [])
+        self.cache.load.return_value = None
+        self._drape()
+        draper = self.fp.draper
+        draper.isValid.return_value = True
+        hotspot = MagicMock(kind="wrinkling", area=2.0, centroid=(1, 2, 3), peak=-0.01)
+        draper.find_hotspots.return_value = [hotspot]
+        cont = MagicMock(
+            MaxStrainTension=1e-3,
+            MaxStrainCompression=2e-3,
+            MaxStrainShear=0.1,
+            LockingAngle=45.0,
+        )
+        with patch.object(self.mod, "getCompositesContainer", return_value=cont):
+            self.fp.hotspot_analysis(self.obj)
+        draper.find_hotspots.assert_called_once_with(
+            angles=[0.0], tension=1e-3, compression=2e-3, shear=0.1, locking_angle=45.0
+        )
+        self.assertEqual(self.fp.get_hotspots(), [hotspot])
+
+        # locking is checked in the frame of each distinct ply angle
+        self.obj.Laminate = MagicMock()
+        self.obj.Laminate.StackOrientation = {"a": 0, "b": 45, "c": -45, "d": 45}
+        self.fp._rosette_angle = 10.0
+        with patch.object(self.mod, "getCompositesContainer", return_value=cont):
+            self.fp.hotspot_analysis(self.obj)
+        self.assertEqual(
+            draper.find_hotspots.call_args.kwargs["angles"], [-35.0, 10.0, 55.0]
+        )
+
+    def test_search_rosette_applies_best_candidate(self):
+        self.cache.load.return_value = None
+        self._drape()
+        draper = self.fp.draper
+        draper.isValid.return_value = True
+        self.obj.Support = MagicMock()
+        self.obj.Rosette = MagicMock()
+        supports = [
+            ("Vertex1", (0.0, 0.0, 0.0), MagicMock()),
+            ("Face1", (1.0, 2.0, 0.0), MagicMock()),
+        ]
+        with patch.object(
+            self.mod, "rosette_supports", return_value=supports
+        ), patch.object(self.mod, "placement_matrix"), patch.object(
+            self.mod, "RosetteSearch"
+        ) as search_cls:
+            search = search_cls.return_value.search
+            search.side_effect = lambda candidates, *a, **k: MagicMock(
+                best=candidates[3], cost=1.5
+            )
+            self.fp.search_rosette(self.obj, angles=(0, 45), apply=True)
+        candidates = search.call_args[0][0]
+        self.assertEqual(
+            [(c.support, c.angle) for c in candidates],
+            [("Vertex1", 0.0), ("Vertex1", 45.0), ("Face1", 0.0), ("Face1", 45.0)],
+        )
+        self.assertIs(search.call_args.kwargs["ze_nodes"], draper.ze_nodes)
+        self.assertEqual(self.obj.Rosette.Support, (self.obj.Support, ["Face1"]))
+        self.assertEqual(self.obj.Rosette.Angle, 45.0)
+
+    def test_symmetric_shell_drapes_one_half(self):
+        self.assertEqual(self.obj.SymmetryPlane, "None")
+        self.obj.SymmetryPlane = "XZ"
+        self.obj.DraperMaxFacets = 500
+        self.cache.load.return_value = None
+        with patch.object(
+            self.mod, "lcs_plane", return_value="plane"
+        ) as lcs_plane, patch.object(
+            self.mod.mesh_util, "half_shape", return_value="half"
+        ) as half_shape:
+            result, _, shape2mesh, draper_cls = self._drape()
+        lcs_plane.assert_called_once_with(self.lcs, "XZ")
+        half_shape.assert_called_once_with(self.obj.Shape, *"plane")
+        shape2mesh.assert_called_once_with("half", self.obj.MaxLength, 250)
+        self.assertEqual(draper_cls.call_args.kwargs["mirror"], "plane")
+        # the mirrored drape mesh is displayed
+        self.assertEqual(result, "cached mesh")
+
+    def test_kinematic_symmetry_needs_fibre_axis_in_or_normal_to_plane(self):
+        self.obj.Flattener = "Kinematic"
+        self.obj.SymmetryPlane = "YZ"
+        mirror = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0))
+        for direction, kept in (
+            ((0.0, 1.0, 0.0), True),
+            ((1.0, 0.0, 0.0), True),
+            ((0.5**0.5, 0.5**0.5, 0.0), False),
+        ):
+            with patch.object(
+                self.mod, "lcs_plane", return_value=mirror
+            ), patch.object(
+                self.mod, "lcs_seed", return_value=((0.0, 0.0, 0.0), direction)
+            ), patch.object(
+                self.mod.Console, "PrintWarning"
+            ) as warn:
+                result = self.fp.drape_mirror(self.obj, self.lcs)
+            self.assertIs(result is mirror, kept)
+            self.assertEqual(warn.called, not kept)
+
+    def test_symmetric_drape_request_mirrors_when_finished(self):
+        self.obj.SymmetryPlane = "YZ"
+        self.cache.load.return_value = None
+        with patch.object(
+            self.mod, "lcs_plane", return_value=("o", "n")
+        ), patch.object(self.mod.mesh_util, "half_shape"):
+            request, *_ = self._drape_request()
+        self.assertEqual(request.mirror, ("o", "n"))
+        flat = ("ze_nodes", ["boundary"])
+        with patch.object(
+            self.mod,
+            "mirror_drape",
+            return_value=("all points", "all facets", "all nodes", ["all"]),
+        ) as mirror_drape:
+            _, _, _, draper_cls = self._call(
+                lambda: self.fp.finish_drape(self.obj, request, flat)
+            )
+        mirror_drape.assert_called_once_with("points", "facets", "ze_nodes", ("o", "n"))
+        self.assertEqual(
+            draper_cls.from_flat.call_args[0][:4],
+            ("all points", "all facets", "all nodes", ["all"]),
+        )
+        self.assertEqual(self.obj.Mesh.Mesh, "cached mesh")
+
+    def test_cache_disabled(self):
+        self.obj.DrapeCache = False
+        _, get_cache, shape2mesh, _ = self._drape()
+        get_cache.assert_not_called()
+        shape2mesh.assert_called_once()
+
+    def _drape_request(self):
+        self.obj.Support = MagicMock()
+        self.obj.Laminate = MagicMock()
+        self.obj.Rosette = None
+        self.obj.LocalCoordinateSystem = self.lcs
+        self.obj.SkipDraper = False
+        return self._call(lambda: self.fp.drape_request(self.obj))
+
+    def test_drape_request_returns_arrays_without_unwrapping(self):
+        self.cache.load.return_value = None
+        request, _, shape2mesh, draper_cls = self._drape_request()
+        draper_cls.assert_not_called()
+        self.assertIs(request.lcs, self.lcs)
+        self.assertIs(request.mesh, shape2mesh.return_value)
+        self.assertEqual((request.points, request.facets), ("points", "facets"))
+
+    def test_drape_request_none_when_cached(self):
+        self.cache.load.return_value = {"points": []}
+        request, _, shape2mesh, _ = self._drape_request()
+        self.assertIsNone(request)
+        shape2mesh.assert_not_called()
+        self.assertEqual(self.obj.Mesh.Mesh, "cached mesh")
+
+    def test_finish_drape_places_flat_nodes(self):
+        self.cache.load.return_value = None
+        request, *_ = self._drape_request()
+        flat = ("ze_nodes", ["boundary"])
+        _, _, _, draper_cls = self._call(
+            lambda: self.fp.finish_drape(self.obj, request, flat)
+        )
+        draper_cls.from_flat.assert_called_once_with(
+            "points",
+            "facets",
+            "ze_nodes",
+            ["boundary"],
+            self.lcs,
+            self.obj.Shape,
+            quads=False,
+        )
+        self.assertIs(self.fp.draper, draper_cls.from_flat.return_value)
+        self.assertIs(self.obj.Mesh.Mesh, request.mesh)
+        self.assertEqual(self.fp._drape_keys, request.keys)
+        self.cache.store.assert_called_once()
+
+        # the following recompute keeps the scheduled drape
+        self.fp.draper.isValid.return_value = True
+        result, _, shape2mesh, _ = self._drape()
+        self.assertIsNone(result)
+        shape2mesh.assert_not_called()
+
+    def test_finish_drape_failed_unwrap(self):
+        self.cache.load.return_value = None
+        request, *_ = self._drape_request()
+        self._call(lambda: self.fp.finish_drape(self.obj, request, None))
+        self.assertIsNone(self.fp.draper)
+        self.cache.store.assert_not_called()
+
+    def test_finish_drape_reports_worker_error(self):
+        request, *_ = self._drape_request()
+        with patch.object(self.mod.Console, "PrintWarning") as warn:
+            self._call(
+                lambda: self.fp.finish_drape(
+                    self.obj, request, None, "ValueError: Can't flatten shape"
+                )
+            )
+        self.assertIn("ValueError: Can't flatten shape", warn.call_args[0][0])
+
+
 # ---------------------------------------------------------------------------
 # Tests: _get_shell_lcs_base helper
 # ---------------------------------------------------------------------------
 
 
+class TestMeshGridShader(unittest.TestCase):
+    def setUp(self):
+        self.mod = _mesh_grid_shader_mod
+        self.shader = self.mod.MeshGridShader()
+        self.child = MagicMock(Name="DrapeMesh")
+        self.child.Document.Name = "Doc"
+        self.mesh = MagicMock()
+        self.mesh.coord_index.tolist.return_value = [0, 1, 2, -1]
+
+    def _attach(self, tex_coords, mesh):
+        with patch.object(self.mod, "has_child") as has_child, patch.object(
+            self.mod, "find_child"
+        ) as find_child:
+            self.shader.attach(MagicMock(), self.child, tex_coords, mesh)
+        return has_child, find_child.return_value
+
+    def test_tex_coords_uploaded_in_one_call(self):
+        point = self.shader.texcoords.point
+        point.reset_mock()
+        self._attach([[0.0, 1.0, 0.0], [2.0, 3.0, 0.0], [4.0, 5.0, 0.0]], self.mesh)
+        point.set1Value.assert_not_called()
+        point.setNum.assert_called_once_with(3)
+        start, count, values = point.setValues.call_args[0]
+        self.assertEqual((start, count), (0, 3))
+        self.assertEqual(values.dtype.name, "float32")
+        self.assertTrue(values.flags["C_CONTIGUOUS"])
+        self.assertEqual(values.tolist()[1], [2.0, 3.0, 0.0])
+
+    def test_face_set_cached_across_reloads(self):
+        has_child, geom = self._attach([[0.0, 0.0, 0.0]], self.mesh)
+        has_child.assert_called_once()
+        geom.textureCoordIndex.setValues.assert_called_once_with(0, 4, [0, 1, 2, -1])
+
+        self.shader.detach()
+        has_child, _ = self._attach([[1.0, 0.0, 0.0]], self.mesh)
+        has_child.assert_not_called()
+        geom.textureCoordIndex.setValues.assert_called_once()
+
+        # a new mesh resets the index, another child searches again
+        self._attach([[1.0, 0.0, 0.0]], MagicMock())
+        self.assertEqual(geom.textureCoordIndex.setValues.call_count, 2)
+        self.child.Name = "OtherMesh"
+        has_child, _ = self._attach([[1.0, 0.0, 0.0]], self.mesh)
+        has_child.assert_called_once()
+
+
+class TestShaderLayerAngles(unittest.TestCase):
+    def setUp(self):
+        self.shader = _mesh_grid_shader_mod.MeshGridShader()
+        self.vp = _composite_shell_feature_mod.ViewProviderCompositeShell.__new__(
+            _composite_shell_feature_mod.ViewProviderCompositeShell
+        )
+        self.vp.grid_shader = self.shader
+        self.vp.Active = True
+        self.drape = MagicMock()
+        self.vp.shader_drape = self.drape
+        self.obj = MagicMock()
+        self.obj.Laminate.StackOrientation = {"a": "0", "b": "45", "c": "-45"}
+        self.obj.ViewObject.DisplayLayer = "b"
+        self.obj.Proxy.get_ply_draper.return_value = self.drape
+        self.vp.Object = self.obj
+
+    def test_layer_clamped_to_table(self):
+        self.shader.Layer = 3
+        self.assertEqual(self.shader.layer.value, 3)
+        self.shader.Layer = self.shader.max_layers
+        self.assertEqual(self.shader.layer.value, -1)
+
+    def test_layer_angles_uploaded_as_floats(self):
+        self.shader.LayerAngles = ["0", 45, "-45"]
+        self.shader.layer_angles.value.setValues.assert_called_with(
+            0, 3, [0.0, 45.0, -45.0]
+        )
+
+    def test_layer_switch_is_uniform_update(self):
+        with patch.object(self.vp, "reload_shader") as reload_shader:
+            self.vp.select_shader_layer()
+        reload_shader.assert_not_called()
+        self.assertEqual(self.shader.layer.value, 1)
+        self.shader.layer_angles.value.setValues.assert_called_with(
+            0, 3, [0.0, 45.0, -45.0]
+        )
+
+    def test_other_ply_drape_reloads(self):
+        self.obj.Proxy.get_ply_draper.return_value = MagicMock()
+        with patch.object(self.vp, "reload_shader") as reload_shader:
+            self.vp.select_shader_layer()
+        reload_shader.assert_called_once()
+
+
+class TestStrainColors(unittest.TestCase):
+    def setUp(self):
+        self.mod = _composite_shell_feature_mod
+        self.vp = self.mod.ViewProviderCompositeShell.__new__(
+            self.mod.ViewProviderCompositeShell
+        )
+        self.vobj = MagicMock(DisplayMode="Strain XX")
+        self.strains = MagicMock()
+        self.strains.__getitem__.return_value = [0.002, -0.004, 0.0, 0.01]
+        self.cont = MagicMock(
+            MaxStrainTension=0.004,
+            MaxStrainCompression=0.008,
+            MaxStrainShear=0.01,
+            LockingAngle=45.0,
+        )
+
+    def _colors(self):
+        with patch.object(self.mod, "getCompositesContainer", return_value=self.cont):
+            return self.vp.get_mesh_colors(self.vobj, self.strains, "0")
+
+    def test_lut_matches_colormap(self):
+        def map_val(x, limit_pos, limit_neg):
+            if x > 0:
+                s = min(1.0, (1.0 + (x / limit_pos)) / 2)
+            elif x < 0:
+                s = max(0.0, (1.0 + (x / limit_neg)) / 2)
+            else:
+                s = 0.5
+            return tuple(self.mod.roma_map(s)[0:3])
+
+        values = [-1.0, -0.008, -0.003, 0.0, 0.001, 0.0039, 0.004, 2.0]
+        colors = self.mod.strain_colors(values, 0.004, 0.008).tolist()
+        self.assertEqual(len(self.mod.get_roma_lut()), 256)
+        for x, color in zip(values, colors):
+            for a, b in zip(color, map_val(x, 0.004, 0.008)):
+                self.assertAlmostEqual(a, b)
+
+    def test_colors_cached_per_display_mode(self):
+        xx = self._colors()
+        self.strains.__getitem__.assert_called_once_with(
+            (slice(None, None, None), 0)
+        )
+        self.assertEqual(len(xx), 4)
+        self.assertIsInstance(xx[0], tuple)
+
+        self.vobj.DisplayMode = "Strain XY"
+        xy = self._colors()
+        self.vobj.DisplayMode = "Strain XX"
+        self.assertIs(self._colors(), xx)
+        self.assertEqual(self.strains.__getitem__.call_count, 2)
+        self.assertNotEqual(xy, xx)
+
+        # new strains or limits recolour
+        self.cont.MaxStrainTension = 0.002
+        self.assertIsNot(self._colors(), xx)
+        self.strains = MagicMock()
+        self.strains.__getitem__.return_value = [0.0] * 4
+        self.assertEqual(len(set(self._colors())), 1)
+
+    def test_shear_angle_mode_in_ply_frame(self):
+        self.vobj.DisplayMode = "Shear Angle"
+        obj = self.vobj.Object
+        obj.ViewObject.DisplayLayer = "0"
+        obj.Laminate.StackOrientation = {"0": 45}
+        obj.Proxy.get_shear_angles.return_value = [10.0, -50.0]
+        self.assertEqual(len(self._colors()), 2)
+        obj.Proxy.get_shear_angles.assert_called_once_with(
+            layer="0", offset_angle_deg=45
+        )
+        # a new layer angle recolours
+        obj.Laminate.StackOrientation = {"0": -45}
+        self._colors()
+        self.assertEqual(
+            obj.Proxy.get_shear_angles.call_args.kwargs["offset_angle_deg"], -45
+        )
+
+    def test_uncoloured_mode(self):
+        self.vobj.DisplayMode = "Grid"
+        self.assertIsNone(self._colors())
+
+
 class TestGetShellLcsBase(unittest.TestCase):
     """Tests for features/AlignFibreLCS.py :: _get_shell_lcs_base()."""
 
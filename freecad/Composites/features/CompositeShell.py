@@ -1,31 +1,105 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 # Copyright 2025 John Wharington jwharington@gmail.com
 
+import os
+
+import FreeCAD
 import FreeCADGui
 import MeshEnums
+import numpy as np
 from FreeCAD import Console
 from pivy import coin
+from PySide import QtCore
 
 from .. import (
     COMPOSITE_SHELL_TOOL_ICON,
     is_comp_type,
     roma_map,
 )
+from ..mechanics.stack_model import calc_z
 from ..shaders.MeshGridShader import MeshGridShader
-from ..tools.draper import Draper
+from ..tools.drape_scheduler import (
+    DrapeJob,
+    DrapeRequest,
+    PlyDrapeJob,
+    PlyDrapeRequest,
+    drape_document,
+)
+from ..tools.draper import (
+    FLATTENERS,
+    Draper,
+    drape_offsets,
+    is_warm_start,
+    lcs_plane,
+    lcs_seed,
+    mirror_drape,
+    place_plies,
+    placement_matrix,
+    ply_unwrap_job,
+)
 from ..tools.fibre import (
     make_fibre_length_analysis,
     make_fibre_orientation_analysis,
 )
+from ..tools.rosette_search import RosetteCandidate, RosetteSearch
 from ..util import mesh_util
+from ..util.cache_util import (
+    ArrayCache,
+    make_key,
+)
+from ..util.mesh_arrays import MeshArrays
 from .Command import BaseCommand
 from .Container import getCompositesContainer
 from .Laminate import is_laminate
-from .Rosette import is_rosette
+from .Rosette import is_rosette, rosette_supports
 from .RosetteSymbol import RosetteSymbol
 from .VPCompositeBase import CompositeBaseFP
 
 
+_drape_cache = None
+
+
+def get_drape_cache() -> ArrayCache:
+    global _drape_cache
+    if _drape_cache is None:
+        params = FreeCAD.ParamGet(
+            "User parameter:BaseApp/Preferences/Mod/Composites",
+        )
+        _drape_cache = ArrayCache(
+            os.path.join(FreeCAD.getUserCachePath(), "Composites", "drape"),
+            max_bytes=params.GetInt("DrapeCacheMaxMB", 256) * 1024 * 1024,
+        )
+    return _drape_cache
+
+
+_roma_lut = None
+
+
+def get_roma_lut():
+    # (256, 3) RGB table of roma_map, built on first use
+    global _roma_lut
+    if _roma_lut is None:
+        _roma_lut = np.asarray(roma_map(np.linspace(0.0, 1.0, 256)))[:, :3]
+    return _roma_lut
+
+
+def strain_colors(values, limit_pos, limit_neg):
+    # (N, 3) roma colours of (N,) values: -limit_neg, 0 and limit_pos map
+    # to the start, middle and end of the colormap, clamped beyond
+    values = np.asarray(values, dtype=np.float64)
+    s = np.full(values.shape, 0.5)
+    pos, neg = values > 0, values < 0
+    s[pos] = np.minimum(1.0, (1.0 + values[pos] / limit_pos) / 2)
+    s[neg] = np.maximum(0.0, (1.0 + values[neg] / limit_neg) / 2)
+    lut = get_roma_lut()
+    return lut[np.minimum((s * len(lut)).astype(np.intp), len(lut) - 1)]
+
+
+def show_drape_status(message):
+    if FreeCAD.GuiUp:
+        FreeCADGui.getMainWindow().statusBar().showMessage(message)
+
+
 def is_composite_shell(obj):
     return is_comp_type(
         obj,
@@ -34,6 +108,10 @@ def is_composite_shell(obj):
     )
 
 
+# mirror planes of the drape LCS
+SYMMETRY_PLANES = ["None", "XZ", "YZ"]
+
+
 class CompositeShellFP(CompositeBaseFP):
     Type = "Composite::Shell"
 
@@ -94,6 +172,59 @@ class CompositeShellFP(CompositeBaseFP):
             doc="Maximum facet count allowed for Draper solve before fallback",
         )
 
+        obj.addProperty(
+            type="App::PropertyEnumeration",
+            name="Flattener",
+            group="Draping",
+            doc="Drape engine: unwrap by energy (FaceUnwrapper, ARAP) or "
+            "kinematic pin-jointed net for woven fabrics (Kinematic)",
+        )
+
+        obj.addProperty(
+            type="App::PropertyBool",
+            name="QuadDominant",
+            group="Draping",
+            doc="Pair drape triangles into quads with one strain and "
+            "orientation each, matching quad shell elements",
+        )
+
+        obj.addProperty(
+            type="App::PropertyEnumeration",
+            name="SymmetryPlane",
+            group="Draping",
+            doc="Plane of the drape LCS the shell is mirror symmetric "
+            "about, only one half is draped and mirrored",
+        )
+
+        obj.addProperty(
+            type="App::PropertyBool",
+            name="WarmStart",
+            group="Draping",
+            doc="Re-drape geometry edits by relaxing the previous flat nodes",
+        )
+
+        obj.addProperty(
+            type="App::PropertyBool",
+            name="PlyDrapes",
+            group="Draping",
+            doc="Drape each ply on its own surface, offset from the shell "
+            "by its position in the laminate",
+        )
+
+        obj.addProperty(
+            type="App::PropertyBool",
+            name="BackgroundDrape",
+            group="Draping",
+            doc="Unwrap in a background process so the GUI stays responsive",
+        )
+
+        obj.addProperty(
+            type="App::PropertyBool",
+            name="DrapeCache",
+            group="Draping",
+            doc="Reuse drape results cached on disk for unchanged inputs",
+        )
+
         obj.addProperty(
             type="App::PropertyLinkGlobal",
             name="Mesh",
@@ -112,6 +243,15 @@ class CompositeShellFP(CompositeBaseFP):
         obj.MaxLength = 1.25
         obj.SkipDraper = False
         obj.DraperMaxFacets = 3000
+        obj.Flattener = FLATTENERS
+        obj.Flattener = FLATTENERS[0]
+        obj.QuadDominant = False
+        obj.SymmetryPlane = SYMMETRY_PLANES
+        obj.SymmetryPlane = SYMMETRY_PLANES[0]
+        obj.WarmStart = False
+        obj.PlyDrapes = False
+        obj.BackgroundDrape = True
+        obj.DrapeCache = True
         obj.LocalCoordinateSystem = lcs
         obj.Rosette = rosette
         obj.Laminate = laminate
@@ -127,72 +267,39 @@ class CompositeShellFP(CompositeBaseFP):
             return
 
         fp.Shape = fp.Support.Shape
-
-        def get_lcs():
-            if fp.Rosette:
-                return fp.Rosette.LocalCoordinateSystem
-            if fp.LocalCoordinateSystem:
-                return fp.LocalCoordinateSystem
-            return fp.Support
-
         self._rosette_angle = float(fp.Rosette.Angle) if fp.Rosette else 0.0
 
         try:
-            mesh = mesh_util.shape2Mesh(fp.Shape, fp.MaxLength)
-            display_mesh = mesh
-
             skip_draper = bool(
                 getattr(fp, "SkipDraper", False)
                 or getattr(self, "_force_skip_draper", False),
             )
             if skip_draper:
+                self.cancel_drape_job()
                 self.draper = None
+                display_mesh = mesh_util.shape2Mesh(fp.Shape, fp.MaxLength)
                 Console.PrintMessage(
                     "CompositeShell skipping Draper (SkipDraper=True).\n",
                 )
             else:
-                draper_mesh = mesh
-                max_facets = int(getattr(fp, "DraperMaxFacets", 3000) or 3000)
-                facet_count = int(getattr(draper_mesh, "CountFacets", 0))
-                if facet_count > max_facets:
-                    # Force legacy SegPerEdge levels downward until we fit
-                    # the draper budget.
-                    for seg in (20, 16, 12, 10, 8, 6):
-                        candidate = mesh_util.shape2MeshLegacy(
-                            fp.Shape,
-                            float(fp.MaxLength),
-                            seg_min=seg,
-                            seg_max=seg,
-                        )
-                        cfacets = int(getattr(candidate, "CountFacets", 0))
-                        if cfacets <= max_facets:
-                            draper_mesh = candidate
-                            facet_count = cfacets
-                            break
-                    if facet_count > max_facets:
-                        self.draper = None
-                        Console.PrintWarning(
-                            "CompositeShell skipping Draper: mesh too dense "
-                            f"({facet_count} facets > {max_facets}).\n",
-                        )
-                        draper_mesh = None
-
-                if draper_mesh is None:
-                    pass
+                if self.drape_in_background(fp):
+                    display_mesh = None
+                    if self.start_drape_job(fp):
+                        # published by poll_drape_job() when done
+                        return
                 else:
-                    # Keep render mesh and draper mesh aligned so fibre orientation
-                    # mapping remains continuous.
-                    display_mesh = draper_mesh
-                    self.draper = Draper(draper_mesh, get_lcs(), fp.Shape)
+                    self.cancel_drape_job()
+                    display_mesh = self.drape(fp, self.drape_lcs(fp))
                 if self.has_valid_draper():
-                    self.fibre_analysis(fp)
+                    self.analyse_drape(fp)
                 else:
                     Console.PrintWarning(
                         "CompositeShell draper invalid after mesh generation.\n",
                     )
 
             # Publish the effective drape mesh used for orientation mapping.
-            fp.Mesh.Mesh = display_mesh
+            if display_mesh is not None:
+                fp.Mesh.Mesh = display_mesh
         except Exception as exc:
             self.draper = None
             Console.PrintWarning(
@@ -202,6 +309,480 @@ class CompositeShellFP(CompositeBaseFP):
         if fp.ViewObject:
             fp.ViewObject.update()
 
+    def drape_lcs(self, fp):
+        if fp.Rosette:
+            return fp.Rosette.LocalCoordinateSystem
+        if fp.LocalCoordinateSystem:
+            return fp.LocalCoordinateSystem
+        return fp.Support
+
+    def drape_flattener(self, fp):
+        return str(getattr(fp, "Flattener", FLATTENERS[0]) or FLATTENERS[0])
+
+    def drape_angle(self, fp):
+        return float(fp.Rosette.Angle) if fp.Rosette else 0.0
+
+    def drape_seed(self, fp, lcs):
+        # origin and fibre direction of the kinematic drape
+        if self.drape_flattener(fp) == "Kinematic":
+            return lcs_seed(lcs, self.drape_angle(fp))
+        return None
+
+    def drape_symmetry(self, fp):
+        return str(getattr(fp, "SymmetryPlane", "None") or "None")
+
+    # cosine tolerance of a kinematic fibre axis in or normal to the plane
+    mirror_axis_tolerance = 1.0e-6
+
+    def drape_mirror(self, fp, lcs):
+        # (origin, normal) of the symmetry plane, the half on the side the
+        # normal points to is draped. The kinematic drape is only symmetric
+        # with its fibre axis in the plane or normal to it.
+        plane = self.drape_symmetry(fp)
+        if plane == "None":
+            return None
+        mirror = lcs_plane(lcs, plane)
+        seed = self.drape_seed(fp, lcs)
+        if seed is not None:
+            cosine = abs(float(np.dot(seed[1], mirror[1])))
+            if min(cosine, 1.0 - cosine) > self.mirror_axis_tolerance:
+                Console.PrintWarning(
+                    f"CompositeShell {fp.Name}: ignoring SymmetryPlane "
+                    f"{plane}, the fibre axis of the kinematic drape is "
+                    "neither in the plane nor normal to it\n"
+                )
+                return None
+        return mirror
+
+    def drape_quads(self, fp):
+        return bool(getattr(fp, "QuadDominant", False))
+
+    def drape_previous(self, fp):
+        # current drape to warm start the next unwrap from, if enabled
+        if getattr(fp, "WarmStart", False) and self.has_valid_draper():
+            return self.draper
+        return None
+
+    def drape_geometry_key(self, fp, lcs):
+        flattener = self.drape_flattener(fp)
+        symmetry = self.drape_symmetry(fp)
+        return make_key(
+            mesh_util.shape_digest(fp.Shape),
+            float(fp.MaxLength),
+            int(getattr(fp, "DraperMaxFacets", 3000) or 3000),
+            flattener,
+            self.drape_quads(fp),
+            Draper.unwrap_steps,
+            Draper.unwrap_relax_weight,
+            # the kinematic drape starts from the LCS and rosette angle,
+            # so moving them means draping again
+            (
+                (self.drape_placement_key(lcs), self.drape_angle(fp))
+                if flattener == "Kinematic"
+                else None
+            ),
+            # as does the symmetry plane, which is an LCS plane
+            (
+                (symmetry, self.drape_placement_key(lcs))
+                if symmetry != "None"
+                else None
+            ),
+        )
+
+    def drape_placement_key(self, lcs):
+        placement = lcs.getGlobalPlacement()
+        return (tuple(placement.Base), tuple(placement.Rotation.Q))
+
+    @staticmethod
+    def placement_array(placement_key):
+        base, rotation = placement_key
+        return np.array([*base, *rotation], dtype=np.float64)
+
+    def store_drape(self, fp, keys):
+        # drapes are cached by geometry together with the placement they
+        # were placed with, so moving the LCS or rosette doesn't store
+        # again. Warm started drapes depend on the previous drape as well,
+        # which the keys don't cover, so only cold drapes are cached.
+        self._drape_keys = keys
+        if not getattr(fp, "DrapeCache", True) or getattr(self, "_drape_warm", False):
+            return
+        arrays = self.draper.to_cache()
+        arrays["placement"] = self.placement_array(keys[1])
+        try:
+            get_drape_cache().store(make_key(keys[0]), arrays)
+        except OSError as exc:
+            Console.PrintWarning(f"CompositeShell drape cache: {exc}\n")
+
+    def reuse_drape(self, fp, lcs, keys):
+        # updates self.draper without unwrapping when possible, returns
+        # whether that succeeded and the mesh to display (None if unchanged)
+        current = getattr(self, "_drape_keys", None)
+        if self.has_valid_draper() and current and current[0] == keys[0]:
+            # only the LCS or rosette changed, keep mesh and flat nodes
+            if current[1] != keys[1]:
+                self.draper.place(lcs)
+                self._drape_keys = keys
+            return True, None
+
+        cache = get_drape_cache() if getattr(fp, "DrapeCache", True) else None
+        key = make_key(keys[0])
+        if cache and (cached := cache.load(key, (*Draper.cache_arrays, "placement"))):
+            try:
+                self.draper = Draper.from_cache(cached, fp.Shape)
+            except (ValueError, IndexError):
+                # arrays that don't fit together, redrape
+                cache.discard(key)
+                return False, None
+            if not np.array_equal(
+                cached.get("placement"), self.placement_array(keys[1])
+            ):
+                self.draper.place(lcs)
+            self._drape_keys = keys
+            self._drape_warm = False
+            return True, mesh_util.arrays2Mesh(self.draper.points, self.draper.facets)
+        return False, None
+
+    def drape_mesh(self, fp, mirror=None):
+        # tessellation for the draper, and whether it fits the facet budget;
+        # only the half to mirror of symmetric shells, within half the budget
+        max_facets = int(getattr(fp, "DraperMaxFacets", 3000) or 3000)
+        shape = fp.Shape
+        if mirror is not None:
+            shape = mesh_util.half_shape(shape, *mirror)
+            max_facets //= 2
+        mesh = mesh_util.shape2MeshBudget(shape, fp.MaxLength, max_facets)
+        facet_count = int(getattr(mesh, "CountFacets", 0))
+        if facet_count > max_facets:
+            self.draper = None
+            Console.PrintWarning(
+                "CompositeShell skipping Draper: mesh too dense "
+                f"({facet_count} facets > {max_facets}).\n",
+            )
+            return mesh, False
+        return mesh, True
+
+    def drape(self, fp, lcs):
+        # builds or updates self.draper, returns the mesh to display
+        # or None if the current drape mesh is still valid
+        keys = (self.drape_geometry_key(fp, lcs), self.drape_placement_key(lcs))
+        reused, display_mesh = self.reuse_drape(fp, lcs, keys)
+        if reused:
+            return display_mesh
+
+        mirror = self.drape_mirror(fp, lcs)
+        mesh, fits = self.drape_mesh(fp, mirror)
+        if fits:
+            # Keep render mesh and draper mesh aligned so fibre orientation
+            # mapping remains continuous.
+            flattener = self.drape_flattener(fp)
+            previous = self.drape_previous(fp)
+            self.draper = Draper(
+                MeshArrays.from_mesh(mesh),
+                lcs,
+                fp.Shape,
+                flattener,
+                previous=previous,
+                quads=self.drape_quads(fp),
+                angle=self.drape_angle(fp),
+                mirror=mirror,
+            )
+            self._drape_warm = is_warm_start(flattener, previous)
+            self.store_drape(fp, keys)
+            if mirror is not None:
+                mesh = mesh_util.arrays2Mesh(self.draper.points, self.draper.facets)
+        return mesh
+
+    # drape scheduler interface, returns the arrays to unwrap or None
+    # if the shell is up to date without unwrapping
+    def drape_request(self, fp):
+        if (not fp.Support) or (not fp.Laminate) or getattr(fp, "SkipDraper", False):
+            return None
+        fp.Shape = fp.Support.Shape
+        lcs = self.drape_lcs(fp)
+        keys = (self.drape_geometry_key(fp, lcs), self.drape_placement_key(lcs))
+        reused, mesh = self.reuse_drape(fp, lcs, keys)
+        if not reused:
+            mirror = self.drape_mirror(fp, lcs)
+            mesh, fits = self.drape_mesh(fp, mirror)
+            if fits:
+                arrays = MeshArrays.from_mesh(mesh)
+                points, facets = arrays.points, arrays.facets
+                previous = self.drape_previous(fp)
+                return DrapeRequest(
+                    lcs,
+                    keys,
+                    mesh,
+                    points,
+                    facets,
+                    self.drape_flattener(fp),
+                    previous.warm_start(points) if previous else None,
+                    self.drape_seed(fp, lcs),
+                    mirror,
+                )
+        if mesh is not None:
+            fp.Mesh.Mesh = mesh
+        return None
+
+    def finish_drape(self, fp, request, flat, error=None):
+        # error is the text of the exception that stopped the unwrap
+        if flat is None:
+            self.draper = None
+            reason = f": {error}" if error else ""
+            Console.PrintWarning(
+                f"CompositeShell {fp.Name}: can't flatten shape{reason}\n"
+            )
+            return
+        points, facets, mesh = request.points, request.facets, request.mesh
+        if request.mirror is not None:
+            points, facets, *flat = mirror_drape(
+                points, facets, flat[0], request.mirror
+            )
+            mesh = mesh_util.arrays2Mesh(points, facets)
+        self.draper = Draper.from_flat(
+            points,
+            facets,
+            *flat,
+            request.lcs,
+            fp.Shape,
+            quads=self.drape_quads(fp),
+        )
+        self._drape_warm = is_warm_start(request.flattener, request.initial)
+        self.store_drape(fp, request.keys)
+        fp.Mesh.Mesh = mesh
+
+    drape_poll_ms = 100
+
+    def drape_in_background(self, fp):
+        return bool(getattr(fp, "BackgroundDrape", False) and FreeCAD.GuiUp)
+
+    # returns whether a background job is draping fp; if not, the drape
+    # was up to date or reused and has been published already
+    def start_drape_job(self, fp):
+        lcs = self.drape_lcs(fp)
+        keys = (self.drape_geometry_key(fp, lcs), self.drape_placement_key(lcs))
+        job = getattr(self, "_drape_job", None)
+        if job is not None and job.request.keys == keys:
+            # e.g. a laminate edit, the running job is still current
+            return True
+        self.cancel_drape_job()
+        request = self.drape_request(fp)
+        if request is None:
+            return False
+        # the previous drape (already used to warm start the request) no
+        # longer matches the shape, don't serve it while the job runs
+        self.draper = None
+        self._drape_job = DrapeJob(request).start()
+        self.schedule_drape_poll(fp, self._drape_job)
+        return True
+
+    def cancel_drape_job(self):
+        # also cancels the ply drapes, which depend on the shell drape
+        for attr in ("_drape_job", "_ply_drape_job"):
+            job = getattr(self, attr, None)
+            if job is not None:
+                job.cancel()
+                setattr(self, attr, None)
+                show_drape_status("")
+
+    def schedule_drape_poll(self, fp, job, poll=None):
+        poll = poll or self.poll_drape_job
+        QtCore.QTimer.singleShot(
+            self.drape_poll_ms,
+            lambda: poll(fp, job),
+        )
+
+    # runs in the GUI thread, publishes the job's drape once it is done
+    def poll_drape_job(self, fp, job):
+        if job is not getattr(self, "_drape_job", None):
+            # cancelled or replaced by a newer job
+            return
+        if not job.done():
+            fraction, stage = job.progress
+            show_drape_status(f"Draping {fp.Label}: {stage} {fraction:.0%}")
+            self.schedule_drape_poll(fp, job)
+            return
+        self._drape_job = None
+        show_drape_status("")
+        try:
+            self.finish_drape(fp, job.request, job.result, job.error)
+            if self.has_valid_draper():
+                self.analyse_drape(fp)
+        except Exception as exc:
+            self.draper = None
+            Console.PrintWarning(f"CompositeShell drape setup failed: {exc}\n")
+        if fp.ViewObject:
+            fp.ViewObject.update()
+        if self.has_valid_draper():
+            self.recompute_dependents(fp)
+
+    def recompute_dependents(self, fp):
+        # objects using the drape recomputed while the job ran and saw
+        # none, recompute them now that it is published
+        dependents = [obj for obj in fp.InList if obj is not fp]
+        for obj in dependents:
+            obj.touch()
+        if dependents and fp.Document:
+            fp.Document.recompute()
+
+    def ply_offsets(self, fp):
+        # layer names and the offsets of their mid planes from the shell,
+        # which is the laminate mid plane
+        layers = list(getattr(fp.Laminate.Proxy, "FEMLayers", None) or [])
+        zbar, _ = calc_z(layers)
+        return [layer.material["Name"] for layer in layers], zbar
+
+    @staticmethod
+    def same_ply_geometry(current, keys):
+        # ply drape keys differing at most in the shell's LCS or rosette
+        return bool(
+            current
+            and current[0]
+            and keys[0]
+            and current[0][0] == keys[0][0]
+            and current[1:] == keys[1:]
+        )
+
+    def layer_angles(self, fp):
+        # fibre angles in degrees of the laminate's layers
+        orientation = getattr(fp.Laminate, "StackOrientation", None)
+        if not hasattr(orientation, "values"):
+            return []
+        return [float(a) for a in orientation.values()]
+
+    def update_ply_drapes(self, fp):
+        # drapes of the offset plies by layer name, empty if disabled;
+        # unwrapped by a PlyDrapeJob when draping in the background
+        if not getattr(fp, "PlyDrapes", False):
+            self.cancel_ply_drape_job()
+            self.ply_drapers = {}
+            self._ply_drape_keys = None
+            return
+        names, offsets = self.ply_offsets(fp)
+        keys = (getattr(self, "_drape_keys", None), tuple(names), tuple(offsets))
+        current = getattr(self, "_ply_drape_keys", None)
+        if current == keys:
+            return
+        lcs = self.drape_lcs(fp)
+        if self.same_ply_geometry(current, keys):
+            # only the LCS or rosette changed, keep the flat plies
+            for draper in self.ply_drapers.values():
+                draper.place(lcs)
+            self._ply_drape_keys = keys
+            return
+        try:
+            if self.drape_in_background(fp):
+                self.start_ply_drape_job(fp, keys, names, offsets, lcs)
+                return
+            self.ply_drapers = dict(
+                zip(
+                    names,
+                    drape_offsets(
+                        self.draper,
+                        offsets,
+                        lcs,
+                        self.drape_flattener(fp),
+                        self.drape_angle(fp),
+                    ),
+                )
+            )
+            self._ply_drape_keys = keys
+        except Exception as exc:
+            self.ply_drapers = {}
+            self._ply_drape_keys = None
+            Console.PrintWarning(f"CompositeShell {fp.Name} ply drapes: {exc}\n")
+
+    def start_ply_drape_job(self, fp, keys, names, offsets, lcs):
+        # the ply drapes are empty until poll_ply_drape_job() publishes them
+        job = getattr(self, "_ply_drape_job", None)
+        if job is not None and self.same_ply_geometry(job.request.keys, keys):
+            # placed with the LCS current when the job finishes
+            return
+        self.cancel_ply_drape_job()
+        self.ply_drapers = {}
+        self._ply_drape_keys = None
+        flattener = self.drape_flattener(fp)
+        request = PlyDrapeRequest(
+            keys,
+            names,
+            self.draper,
+            lcs,
+            flattener,
+            ply_unwrap_job(self.draper, offsets, lcs, flattener, self.drape_angle(fp)),
+        )
+        self._ply_drape_job = PlyDrapeJob(request).start()
+        self.schedule_drape_poll(fp, self._ply_drape_job, self.poll_ply_drape_job)
+
+    def cancel_ply_drape_job(self):
+        job = getattr(self, "_ply_drape_job", None)
+        if job is not None:
+            job.cancel()
+            self._ply_drape_job = None
+
+    def poll_ply_drape_job(self, fp, job):
+        if job is not getattr(self, "_ply_drape_job", None):
+            return
+        if not job.done():
+            fraction, stage = job.progress
+            show_drape_status(f"Draping plies of {fp.Label}: {stage} {fraction:.0%}")
+            self.schedule_drape_poll(fp, job, self.poll_ply_drape_job)
+            return
+        self._ply_drape_job = None
+        show_drape_status("")
+        request = job.request
+        if request.draper is not self.draper:
+            # the shell was redraped meanwhile
+            return
+        if job.result is None:
+            # the ply drapes stay empty
+            Console.PrintWarning(f"CompositeShell {fp.Name} ply drapes: {job.error}\n")
+            return
+        try:
+            lcs = self.drape_lcs(fp)
+            plies = place_plies(request.draper, request.job[0], job.result, lcs)
+            self.ply_drapers = dict(zip(request.names, plies))
+            self._ply_drape_keys = (
+                getattr(self, "_drape_keys", None),
+                *request.keys[1:],
+            )
+        except Exception as exc:
+            self.ply_drapers = {}
+            self._ply_drape_keys = None
+            Console.PrintWarning(f"CompositeShell {fp.Name} ply drapes: {exc}\n")
+        if fp.ViewObject:
+            fp.ViewObject.update()
+        if self.ply_drapers:
+            self.recompute_dependents(fp)
+
+    def analyse_drape(self, fp):
+        self.update_ply_drapes(fp)
+        self.hotspot_analysis(fp)
+        self.fibre_analysis(fp)
+
+    # connected regions of the drape over the container limits
+    def hotspot_analysis(self, fp, n_report=5):
+        cont = getCompositesContainer()
+        # locking of any ply, in the frame of its fibres
+        rosette_angle = getattr(self, "_rosette_angle", 0.0)
+        self.hotspots = self.draper.find_hotspots(
+            angles=sorted({rosette_angle + a for a in self.layer_angles(fp) or [0.0]}),
+            tension=cont.MaxStrainTension,
+            compression=cont.MaxStrainCompression,
+            shear=cont.MaxStrainShear,
+            locking_angle=getattr(cont, "LockingAngle", None),
+        )
+        Console.PrintMessage(f"Drape hotspots: {len(self.hotspots)}")
+        for h in self.hotspots[:n_report]:
+            x, y, z = h.centroid
+            Console.PrintMessage(
+                f"  {h.kind}: area {h.area:.1f} at ({x:.1f}, {y:.1f}, {z:.1f})"
+                f" peak {h.peak:.3g}"
+            )
+
+    def get_hotspots(self):
+        if self.has_valid_draper():
+            return getattr(self, "hotspots", [])
+        return []
+
     def fibre_analysis(self, fp):
         histograms_length = make_fibre_length_analysis(fp)
         Console.PrintMessage("Material fibre length analysis:")
@@ -220,15 +801,40 @@ class CompositeShellFP(CompositeBaseFP):
                 fp.recompute()
             case "LocalCoordinateSystem" | "Rosette":
                 fp.recompute()
-            case "MaxLength" | "Support" | "SkipDraper" | "DraperMaxFacets":
+            case (
+                "MaxLength"
+                | "Support"
+                | "SkipDraper"
+                | "DraperMaxFacets"
+                | "Flattener"
+                | "QuadDominant"
+                | "SymmetryPlane"
+                | "PlyDrapes"
+                | "DrapeCache"
+            ):
+                # a running drape of the old inputs is discarded anyway
+                self.cancel_drape_job()
                 fp.recompute()
 
     def has_valid_draper(self):
         return hasattr(self, "draper") and self.draper and self.draper.isValid()
 
-    def get_tex_coords(self, offset_angle_deg):
+    def get_ply_draper(self, layer=None):
+        # drape of the named layer, the shell drape without ply drapes
+        return getattr(self, "ply_drapers", {}).get(layer, self.draper)
+
+    def get_tex_coords(self, offset_angle_deg, layer=None):
         if self.has_valid_draper():
-            return self.draper.get_tex_coords(
+            return self.get_ply_draper(layer).get_tex_coords(
+                offset_angle_deg=offset_angle_deg
+                + getattr(self, "_rosette_angle", 0.0),
+            )
+        return None
+
+    # (P, 3) array of get_tex_coords() for bulk upload to the grid shader
+    def get_tex_coords_array(self, offset_angle_deg, layer=None):
+        if self.has_valid_draper():
+            return self.get_ply_draper(layer).get_tex_coords_array(
                 offset_angle_deg=offset_angle_deg
                 + getattr(self, "_rosette_angle", 0.0),
             )
@@ -244,19 +850,80 @@ class CompositeShellFP(CompositeBaseFP):
             return self.draper.get_lcs(tris)
         return None
 
-    def get_boundaries(self, offset_angle_deg):
+    def get_drape_lcs_batch(self, centers, normals):
+        if self.has_valid_draper():
+            return self.draper.get_lcs_batch(centers, normals)
+        return None
+
+    def get_boundaries(self, offset_angle_deg, layer=None):
         if self.has_valid_draper():
-            return self.draper.get_boundaries(
+            return self.get_ply_draper(layer).get_boundaries(
                 offset_angle_deg=offset_angle_deg
                 + getattr(self, "_rosette_angle", 0.0),
             )
         return None
 
-    def get_strains(self):
+    def get_strains(self, layer=None):
         if self.has_valid_draper():
-            return self.draper.strains
+            return self.get_ply_draper(layer).strains
         return None
 
+    def get_shear_angles(self, layer=None, per_vertex=False, offset_angle_deg=0.0):
+        # shear angles in degrees between the fibres of a ply at the layer
+        # angle offset_angle_deg, per facet or per mesh vertex
+        if self.has_valid_draper():
+            draper = self.get_ply_draper(layer)
+            angle = offset_angle_deg + getattr(self, "_rosette_angle", 0.0)
+            if per_vertex:
+                return draper.get_vertex_shear_angles(angle)
+            return draper.get_shear_angles(angle)
+        return None
+
+    # rosette origins on the support's vertices, edge midpoints and face
+    # centres at each fibre angle, scored on the current drape mesh;
+    # apply writes the best one to the shell's rosette
+    def search_rosette(
+        self,
+        fp,
+        angles=tuple(range(0, 180, 15)),
+        measure="shear",
+        weighting="peak",
+        apply=False,
+        workers=None,
+    ):
+        draper = self.get_draper()
+        candidates = [
+            RosetteCandidate(
+                tuple(position),
+                placement_matrix(rotation)[:3, :3],
+                float(angle),
+                name,
+            )
+            for name, position, rotation in rosette_supports(fp.Support)
+            for angle in angles
+        ]
+        result = RosetteSearch(
+            draper.points,
+            draper.facets,
+            measure,
+            weighting,
+        ).search(
+            candidates,
+            self.drape_flattener(fp),
+            ze_nodes=draper.ze_nodes,
+            workers=workers,
+        )
+        best = result.best
+        Console.PrintMessage(
+            f"CompositeShell {fp.Name} best rosette: {best.support} at "
+            f"{best.angle:g} deg, {weighting} {measure} {result.cost:.4g}\n",
+        )
+        if apply and fp.Rosette:
+            fp.Rosette.Support = (fp.Support, [best.support])
+            fp.Rosette.Angle = best.angle
+            fp.Document.recompute()
+        return result
+
     def get_stack_assembly(self, fp):
         lam_obj = fp.Laminate
         return lam_obj.Proxy.get_stack_assembly(lam_obj)
@@ -305,7 +972,7 @@ class ViewProviderCompositeShell:
         return mode
 
     def getDisplayModes(self, obj):
-        return ["Grid", "Strain XX", "Strain YY", "Strain XY"]
+        return ["Grid", "Strain XX", "Strain YY", "Strain XY", "Shear Angle"]
 
     def getDefaultDisplayMode(self):
         return "Shaded"
@@ -363,48 +1030,61 @@ class ViewProviderCompositeShell:
         if self.Object.LocalCoordinateSystem:
             self.Object.LocalCoordinateSystem.Visibility = visible
 
+    # index into get_strains() columns, 3 for the shear angle, and the
+    # container limits of each coloured display mode
+    def display_mode_field(self, mode):
+        cont = getCompositesContainer()
+        match mode:
+            case "Strain XX":
+                return 0, cont.MaxStrainTension, cont.MaxStrainCompression
+            case "Strain YY":
+                return 1, cont.MaxStrainTension, cont.MaxStrainCompression
+            case "Strain XY":
+                return 2, cont.MaxStrainShear, cont.MaxStrainShear
+            case "Shear Angle":
+                limit = getattr(cont, "LockingAngle", 45.0)
+                return 3, limit, limit
+        return -1, None, None
+
+    def get_mesh_colors(self, vobj, strains, layer):
+        # facet colours of the display mode, cached per mode and layer
+        # until the strains or limits change
+        index, limit_pos, limit_neg = self.display_mode_field(vobj.DisplayMode)
+        if index < 0:
+            return None
+        if getattr(self, "color_strains", None) is not strains:
+            self.color_strains = strains
+            self.color_cache = {}
+        angle = self.get_offset_angle(vobj.Object)
+        key = (vobj.DisplayMode, layer, angle, limit_pos, limit_neg)
+        if key not in self.color_cache:
+            if index < 3:
+                s = strains[:, index]
+            else:
+                s = vobj.Object.Proxy.get_shear_angles(
+                    layer=layer, offset_angle_deg=angle
+                )
+            colors = strain_colors(s, limit_pos, limit_neg)
+            self.color_cache[key] = list(map(tuple, colors.tolist()))
+        return self.color_cache[key]
+
     def update_mesh_material(self, vobj):
         # use draper to determine distortion for coloring
         mesh = vobj.Object.Mesh
         n = mesh.Mesh.CountFacets
         if "Material" not in mesh.PropertiesList:
             mesh.addProperty("Mesh::PropertyMaterial", "Material")
-        strains = vobj.Object.Proxy.get_strains()
+        layer = getattr(vobj, "DisplayLayer", None)
+        strains = vobj.Object.Proxy.get_strains(layer=layer)
         if strains is not None:
+            colors = self.get_mesh_colors(vobj, strains, layer)
             material = {
                 "binding": MeshEnums.Binding.PER_FACE,
                 "transparency": [0.0] * n,
                 "ambientColor": [(0.5, 0.5, 0.5)] * n,
-                "diffuseColor": [(0.5, 0.5, 0.5)] * n,
+                "diffuseColor": colors or [(0.5, 0.5, 0.5)] * n,
                 "shininess": [0.0] * n,
             }
-            cont = getCompositesContainer()
-            limit_pos = cont.MaxStrainTension
-            limit_neg = cont.MaxStrainCompression
-            match vobj.DisplayMode:
-                case "Strain XX":
-                    index = 0
-                case "Strain YY":
-                    index = 1
-                case "Strain XY":
-                    index = 2
-                    limit_pos = cont.MaxStrainShear
-                    limit_neg = cont.MaxStrainShear
-                case _:
-                    index = -1
-            if index >= 0:
-                s = strains[:, index]
-
-                def map_val(x):
-                    if x > 0:
-                        s = min(1.0, (1.0 + (x / limit_pos)) / 2)
-                    elif x < 0:
-                        s = max(0.0, (1.0 + (x / limit_neg)) / 2)
-                    else:
-                        s = 0.5
-                    return roma_map(s)[0:3]
-
-                material["diffuseColor"] = [map_val(x) for x in s]
             mesh.Material = material
             mesh.ViewObject.Coloring = True
         self.update_visibility(vobj)
@@ -464,7 +1144,8 @@ class ViewProviderCompositeShell:
                 if self.grid_shader:
                     self.grid_shader.Darken = vobj.Darken
             case "DisplayLayer":
-                self.reload_shader()
+                self.update_mesh_material(vobj)
+                self.select_shader_layer()
             case "ShapeAppearance":
                 self.reload_shader()
             case "ShowRosette":
@@ -495,6 +1176,32 @@ class ViewProviderCompositeShell:
             return int(vobj.Laminate.StackOrientation[layer])
         return 0
 
+    def update_shader_layer(self, vobj):
+        # fibre angle of the display layer as shader uniforms: its index
+        # into the laminate's layer angles, or its angle if not in the table
+        layers = dict(vobj.Laminate.StackOrientation) if vobj.Laminate else {}
+        self.grid_shader.LayerAngles = list(layers.values())
+        layer = getattr(vobj.ViewObject, "DisplayLayer", None)
+        index = list(layers).index(layer) if layer in layers else -1
+        if 0 <= index < self.grid_shader.max_layers:
+            self.grid_shader.Layer = index
+            self.grid_shader.Angle = 0.0
+        else:
+            self.grid_shader.Layer = -1
+            self.grid_shader.Angle = self.get_offset_angle(vobj)
+
+    def select_shader_layer(self):
+        # layers sharing the drape of the loaded texture coordinates only
+        # differ by a rotation, so switching between them is a uniform
+        # update; ply drapes have their own coordinates
+        vobj = self.Object
+        layer = getattr(vobj.ViewObject, "DisplayLayer", None)
+        drape = vobj.Proxy.get_ply_draper(layer)
+        if self.Active and drape is getattr(self, "shader_drape", None):
+            self.update_shader_layer(vobj)
+        else:
+            self.reload_shader()
+
     def load_shader(self):
         if self.Active:
             return
@@ -503,11 +1210,14 @@ class ViewProviderCompositeShell:
         if not hasattr(obj, "draper"):
             return
 
+        # base fabric coordinates, rotated by the layer angle in the shader
         aobj = vobj.Mesh
-        offset_angle_deg = self.get_offset_angle(vobj)
-        tex_coords = obj.get_tex_coords(offset_angle_deg=offset_angle_deg)
-        if tex_coords and self.grid_shader:
-            self.grid_shader.attach(vobj, aobj, tex_coords)
+        layer = getattr(vobj.ViewObject, "DisplayLayer", None)
+        tex_coords = obj.get_tex_coords_array(offset_angle_deg=0.0, layer=layer)
+        if tex_coords is not None and len(tex_coords) and self.grid_shader:
+            self.update_shader_layer(vobj)
+            self.grid_shader.attach(vobj, aobj, tex_coords, obj.draper.mesh_arrays)
+            self.shader_drape = obj.get_ply_draper(layer)
             self.Active = True
             FreeCADGui.Selection.addObserver(self)
 
@@ -561,3 +1271,65 @@ FreeCADGui.addCommand(
     "Composites_CompositeShell",
     CompositeShellCommand(),
 )
+
+
+class DrapeAllCommand:
+    def GetResources(self):
+        return {
+            "Pixmap": COMPOSITE_SHELL_TOOL_ICON,
+            "MenuText": "Drape all shells",
+            "ToolTip": "Drape all composite shells of the document in parallel",
+        }
+
+    def Activated(self):
+        params = FreeCAD.ParamGet(
+            "User parameter:BaseApp/Preferences/Mod/Composites",
+        )
+        drape_document(
+            FreeCAD.ActiveDocument,
+            workers=params.GetInt("DrapeWorkers", 0) or None,
+        )
+
+    def IsActive(self):
+        return FreeCAD.ActiveDocument is not None
+
+
+FreeCADGui.addCommand(
+    "Composites_DrapeAll",
+    DrapeAllCommand(),
+)
+
+
+class RosetteSearchCommand:
+    def GetResources(self):
+        return {
+            "Pixmap": COMPOSITE_SHELL_TOOL_ICON,
+            "MenuText": "Search rosette placement",
+            "ToolTip": "Move the rosette of the selected composite shells to "
+            "the origin and angle with the least drape distortion",
+        }
+
+    def Activated(self):
+        params = FreeCAD.ParamGet(
+            "User parameter:BaseApp/Preferences/Mod/Composites",
+        )
+        for obj in FreeCADGui.Selection.getSelection():
+            if is_composite_shell(obj) and obj.Proxy.has_valid_draper():
+                obj.Proxy.search_rosette(
+                    obj,
+                    measure=params.GetString("RosetteSearchMeasure", "shear"),
+                    weighting=params.GetString("RosetteSearchWeighting", "peak"),
+                    apply=True,
+                    workers=params.GetInt("DrapeWorkers", 0) or None,
+                )
+
+    def IsActive(self):
+        return any(
+            is_composite_shell(obj) for obj in FreeCADGui.Selection.getSelection()
+        )
+
+
+FreeCADGui.addCommand(
+    "Composites_RosetteSearch",
+    RosetteSearchCommand(),
+)
@@ -35,6 +35,14 @@ class CompositesContainerFP(CompositeBaseFP):
         )
         obj.setExpression("MaxStrainShear", "1e-1")
 
+        obj.addProperty(
+            "App::PropertyFloatConstraint",
+            "LockingAngle",
+            "Draping",
+            "Fabric shear locking angle in degrees for draping",
+        )
+        obj.setExpression("LockingAngle", "45")
+
         super().__init__(obj)
 
 
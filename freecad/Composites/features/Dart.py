@@ -38,6 +38,13 @@ class DartFP(CompositePartFP):
             doc="Gap length at cut",
         ).GapLength = 0.1
 
+        obj.addProperty(
+            type="App::PropertyFloat",
+            name="MaxLength",
+            group="Dimensions",
+            doc="Max length of dart mesh",
+        ).MaxLength = 4.0
+
         obj.Mesh = obj.Document.addObject(
             "Mesh::Feature",
             "DrapeMesh",
@@ -55,6 +62,7 @@ class DartFP(CompositePartFP):
         mesh = make_dart(
             shape=source.Shape,
             edges=edges,
+            max_length=getattr(fp, "MaxLength", 4.0),
             gap_length=fp.GapLength,
         )
         fp.Mesh.Mesh = mesh
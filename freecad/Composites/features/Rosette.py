@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 # Copyright 2025 John Wharington jwharington@gmail.com
 
+from types import SimpleNamespace
+
 import FreeCAD
 import FreeCADGui
 import Part
@@ -54,6 +56,24 @@ def _origin_from_support(fp):
     return position, rotation
 
 
+def rosette_supports(obj):
+    """Return the Rosette origins available on the shape of *obj*.
+
+    One (sub-element name, position, rotation) for each vertex, edge
+    midpoint and face parametric centre, as given by that Support.
+    """
+    shape = obj.Shape
+    names = (
+        [f"Vertex{i + 1}" for i in range(len(shape.Vertexes))]
+        + [f"Edge{i + 1}" for i in range(len(shape.Edges))]
+        + [f"Face{i + 1}" for i in range(len(shape.Faces))]
+    )
+    return [
+        (name, *_origin_from_support(SimpleNamespace(Support=(obj, [name]))))
+        for name in names
+    ]
+
+
 class RosetteFP(CompositeBaseFP):
     """FeaturePython for a Rosette – a planar local coordinate system datum.
 
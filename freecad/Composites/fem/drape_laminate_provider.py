@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
+import numpy as np
+from FreeCAD import Matrix, Rotation
+
 
 def get_compshell_obj(shellth_obj):
     if len(shellth_obj.References) >= 1:
@@ -13,22 +16,47 @@ def get_compshell_obj(shellth_obj):
     return None
 
 
-def get_drape_lcs(compshell_obj, femmesh_obj, elements):
-    def element_info(e):
-        element_nodes = femmesh_obj.getElementNodes(e)
-        if len(element_nodes) in [3, 6]:
-            face_def = {1: [0, 1, 2]}
-        else:  # quad element
-            face_def = {1: [0, 1, 2, 3]}
+def matrix_to_rotation(m):
+    return Rotation(Matrix(*m[0], 0, *m[1], 0, *m[2], 0, 0, 0, 0, 1))
+
+
+def get_element_corners(femmesh_obj, nodes, e):
+    # corner nodes of a shell element as (3, 3) or (4, 3): tria3/tria6
+    # elements have 3 or 6 nodes, quad4/quad8 elements 4 or 8. nodes is
+    # femmesh_obj.Nodes, which builds a new dict on every read.
+    element_nodes = femmesh_obj.getElementNodes(e)
+    n_corners = 4 if len(element_nodes) in (4, 8) else 3
+    return np.array(
+        [(p.x, p.y, p.z) for p in (nodes[n] for n in element_nodes[:n_corners])],
+        dtype=np.float64,
+    )
 
-        for key in face_def:
-            tris = []
-            for node_idx in face_def[key]:
-                n = femmesh_obj.getNodeById(element_nodes[node_idx])
-                tris.append(n)
-            return compshell_obj.Proxy.get_drape_lcs(tris)
 
-    return {e: element_info(e) for e in elements}
+def get_element_frames(femmesh_obj, elements):
+    # centres and unit normals as (E, 3), quads use their diagonals to
+    # match the quad facets of a quad-dominant drape
+    centers = np.empty((len(elements), 3))
+    normals = np.empty((len(elements), 3))
+    nodes = femmesh_obj.Nodes
+    for i, e in enumerate(elements):
+        c = get_element_corners(femmesh_obj, nodes, e)
+        centers[i] = c.mean(axis=0)
+        if len(c) == 4:
+            normals[i] = np.cross(c[2] - c[0], c[3] - c[1])
+        else:
+            normals[i] = np.cross(c[1] - c[0], c[2] - c[1])
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return centers, normals
+
+
+def get_drape_lcs(compshell_obj, femmesh_obj, elements):
+    elements = list(elements)
+    centers, normals = get_element_frames(femmesh_obj, elements)
+
+    rotations = compshell_obj.Proxy.get_drape_lcs_batch(centers, normals)
+    if rotations is None:
+        return {e: None for e in elements}
+    return {e: matrix_to_rotation(m) for e, m in zip(elements, rotations)}
 
 
 def get_laminate(shellth_obj):
@@ -82,7 +110,11 @@ def register_drape_laminate_providers():
     except Exception:
         return False
 
-    register_shell_orientation_provider("compositeswb.drape", shell_orientation_provider)
+    register_shell_orientation_provider(
+        "compositeswb.drape", shell_orientation_provider
+    )
     register_shell_section_provider("compositeswb.laminate", shell_section_provider)
-    register_indirect_material_provider("compositeswb.laminate", indirect_material_provider)
+    register_indirect_material_provider(
+        "compositeswb.laminate", indirect_material_provider
+    )
     return True
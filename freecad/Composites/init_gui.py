@@ -31,6 +31,8 @@ class CompositesWorkbench(Gui.Workbench):
         ]
         cmds_structure = [
             "Composites_CompositeShell",
+            "Composites_DrapeAll",
+            "Composites_RosetteSearch",
             "Composites_StructureTools",
             "Composites_LCSTools",
         ]
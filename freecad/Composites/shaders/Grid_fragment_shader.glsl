@@ -6,6 +6,13 @@ uniform float x_scale = 16.0;
 uniform float y_scale = 8.0;
 uniform float z_scale = 2.0;
 
+// in-plane fibre angle in degrees, added to the angle of the layer
+// layer_angles[layer] when layer is not -1
+#define MAX_LAYERS 32
+uniform float angle = 0.0;
+uniform int layer = -1;
+uniform float layer_angles[MAX_LAYERS];
+
 
 // https://github.com/rreusser/glsl-solid-wireframe?tab=readme-ov-file
 
@@ -61,11 +68,25 @@ float mixcol(float col, float amount) {
   return col*(1.0-darken*amount);
 }
 
+// fabric coordinates in the frame of fibres at angle_deg, which turns
+// counterclockwise like the fibre angles of the drape and rosette search
+vec2 fibre_frame(vec2 st, float angle_deg) {
+  float a = radians(angle_deg);
+  float c = cos(a);
+  float s = sin(a);
+  return mat2(c, -s, s, c) * st;
+}
+
 void main() {
   float pixel_width = 1.0;
   float feather = 0.0;
-  vec3 coord = vec3(x_scale * gl_TexCoord[0].s,
-                    y_scale * gl_TexCoord[0].t,
+  float ply_angle = angle;
+  if (layer >= 0 && layer < MAX_LAYERS) {
+    ply_angle += layer_angles[layer];
+  }
+  vec2 st = fibre_frame(gl_TexCoord[0].st, ply_angle);
+  vec3 coord = vec3(x_scale * st.x,
+                    y_scale * st.y,
                     z_scale * gl_TexCoord[0].r);
   vec3 grid = vec3(gridFactor(coord.x, pixel_width, feather),
                    gridFactor(coord.y, pixel_width, feather),
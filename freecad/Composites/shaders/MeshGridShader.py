@@ -5,6 +5,7 @@
 from os import path
 
 import FreeCADGui
+import numpy as np
 from pivy import coin
 
 
@@ -49,6 +50,9 @@ def remove_by_name(node, name):
 class MeshGridShader:
     shaderpath = path.dirname(path.abspath(__file__))
 
+    # size of the layer angle table, MAX_LAYERS in the fragment shader
+    max_layers = 32
+
     def __init__(self):
         self.x_scale = coin.SoShaderParameter1f()
         self.x_scale.name = "x_scale"
@@ -59,14 +63,28 @@ class MeshGridShader:
         self.darken = coin.SoShaderParameter1f()
         self.darken.name = "darken"
 
+        # the fibre grid is rotated in the shader, so texture coordinates
+        # are uploaded once per drape and layers only change uniforms
+        self.angle = coin.SoShaderParameter1f()
+        self.angle.name = "angle"
+        self.layer = coin.SoShaderParameter1i()
+        self.layer.name = "layer"
+        self.layer_angles = coin.SoShaderParameterArray1f()
+        self.layer_angles.name = "layer_angles"
+
         self.Spacing = [20.0, 2.0, 10.0]
         self.Darken = 0.1
+        self.Angle = 0.0
+        self.Layer = -1
 
         shader_params = [
             self.x_scale,
             self.y_scale,
             self.z_scale,
             self.darken,
+            self.angle,
+            self.layer,
+            self.layer_angles,
         ]
 
         self.fragmentShader = coin.SoFragmentShader()
@@ -87,6 +105,16 @@ class MeshGridShader:
         self.grp.addChild(self.shaderProgram)
         self.grp.addChild(self.texture)
 
+        # one texture coordinate node, refilled on each attach
+        self.texcoords = coin.SoTextureCoordinate3()
+        self.texcoords.setName("my_texcoord")
+
+        # face set of the last child and the mesh its texture coordinate
+        # index was set from, kept across reloads
+        self.face_set_key = None
+        self.face_set = None
+        self.face_set_mesh = None
+
     def make_texture(self):
         fname = path.join(MeshGridShader.shaderpath, "brick.png")
         texture = coin.SoTexture3()
@@ -116,45 +144,87 @@ class MeshGridShader:
     def Darken(self, v):
         self.darken.value = v
 
+    # in-plane rotation of the grid in degrees
+    @property
+    def Angle(self):
+        return self.angle.value.getValue()
+
+    @Angle.setter
+    def Angle(self, v):
+        self.angle.value = v
+
+    # index into LayerAngles added to Angle, -1 for none
+    @property
+    def Layer(self):
+        return self.layer.value.getValue()
+
+    @Layer.setter
+    def Layer(self, v):
+        self.layer.value = v if 0 <= v < self.max_layers else -1
+
+    @property
+    def LayerAngles(self):
+        return list(self.layer_angles.value.getValues())
+
+    @LayerAngles.setter
+    def LayerAngles(self, v):
+        v = [float(a) for a in v[: self.max_layers]]
+        self.layer_angles.value.setValues(0, len(v), v)
+
     @property
     def Root(self):
         return self.root
 
     def getTextureCoords(self, tex_coords):
-        textureCoords = coin.SoTextureCoordinate3()
-        textureCoords.setName("my_texcoord")
+        # (P, 3) array or sequence of vectors, uploaded in one call
         if tex_coords is not None:
-            for index, (s, t, q) in enumerate(tex_coords):
-                textureCoords.point.set1Value(index, s, t, q)
-        return textureCoords
+            points = np.ascontiguousarray(
+                np.asarray(tex_coords, dtype=np.float32).reshape(-1, 3)
+            )
+            self.texcoords.point.setNum(len(points))
+            self.texcoords.point.setValues(0, len(points), points)
+        return self.texcoords
+
+    def find_face_set(self, child):
+        # SoFCIndexedFaceSet of a mesh object, searched for once per child
+        key = (child.Document.Name, child.Name)
+        if key != self.face_set_key or self.face_set is None:
+            type_name = "SoFCIndexedFaceSet"
+            node = has_child(self.root, type_name)
+            self.face_set = find_child(node, type_name) if node else None
+            self.face_set_key = key
+            self.face_set_mesh = None
+        return self.face_set
 
     def detach(self, obj=None):
         self.attach(obj, None, None)
 
-    def attach(self, obj, child, tex_coords=None):
-        self.texcoords = self.getTextureCoords(tex_coords)
-
+    # mesh is the MeshArrays of the child mesh, giving the texture
+    # coordinate index without reading the face set back from coin
+    def attach(self, obj, child, tex_coords=None, mesh=None):
         if tex_coords is None:
             remove_by_name(self.grp, self.texcoords.getName())
             remove_by_name(self.grp, self.root.getName())
             return
 
+        self.getTextureCoords(tex_coords)
         self.grp.addChild(self.texcoords)
         self.root = child.ViewObject.RootNode
         self.grp.addChild(self.root)
 
-        switch = child.ViewObject.SwitchNode
-        switch = self.root
-        type_name = "SoFCIndexedFaceSet"
-        node = has_child(switch, type_name)
-        geom = find_child(node, type_name)
-        if geom:
-            coordinateIndex = geom.coordIndex.getValues()
+        geom = self.find_face_set(child)
+        # the index only changes with the mesh
+        if geom and (mesh is None or mesh is not self.face_set_mesh):
+            if mesh is not None:
+                coordinateIndex = mesh.coord_index.tolist()
+            else:
+                coordinateIndex = geom.coordIndex.getValues()
             geom.textureCoordIndex.setValues(
                 0,
                 len(coordinateIndex),
                 coordinateIndex,
             )
+            self.face_set_mesh = mesh
 
         # move the original node
         doc = obj.Document
@@ -1,9 +1,10 @@
 from collections import namedtuple
 
 import Mesh
-from FreeCAD import Vector
+import numpy as np
 from Part import Vertex
 
+from ..util.mesh_arrays import MeshArrays
 from ..util.mesh_util import shape2Mesh
 
 DartPoly = namedtuple("DartPoly", ["poly_idx", "key_edges", "dart_points"])
@@ -16,7 +17,7 @@ def is_point_on_edges(
     tol=default_tolerance,
 ):
     def mesh_point_is_close(shape):
-        return Vertex(point.x, point.y, point.z).distToShape(shape)[0] < tol
+        return Vertex(*point).distToShape(shape)[0] < tol
 
     for e in edges:
         if mesh_point_is_close(e):
@@ -32,8 +33,8 @@ def get_dart_polys(
         return frozenset(set(poly) & dart_point_indices)
 
     edge_polys = []
-    for poly_idx, poly in enumerate(mesh.Topology[1]):
-        list_poly = list(poly)
+    for poly_idx in mesh.point_facets(dart_point_indices):
+        list_poly = mesh.facets[poly_idx].tolist()
         n_facet_points = len(list_poly)
         dart_points = points_on_dart(list_poly)
         if not dart_points:
@@ -53,7 +54,7 @@ def get_dart_polys(
                     key_edges.append(this_edge_points)
             return set(key_edges)
 
-        edge_polys.append(DartPoly(poly_idx, get_key_edges(), dart_points))
+        edge_polys.append(DartPoly(int(poly_idx), get_key_edges(), dart_points))
     return edge_polys
 
 
@@ -204,26 +205,16 @@ def get_delta(
         for ref in cluster:
             for p in ref.dart_points:
                 k = (p, cluster_idx)
-                delta[k] = Vector()
+                delta[k] = np.zeros(3)
                 n_delta[k] = 0
 
     for cluster_idx, cluster in enumerate(chain):
         for ref in cluster:
-
-            def point_index_to_vector(i):
-                p = mesh.Points[i]
-                return Vector(p.x, p.y, p.z)
-
-            pl = list(mesh.Topology[1][ref.poly_idx])
-
-            barycenter = Vector()
-            for i in pl:
-                barycenter += point_index_to_vector(i) / len(pl)
-
+            barycenter = mesh.centroids[ref.poly_idx]
             for p in ref.dart_points:
-                v = (point_index_to_vector(p) - barycenter).normalize()
+                v = mesh.points[p] - barycenter
                 k = (p, cluster_idx)
-                delta[k] += v
+                delta[k] += v / np.linalg.norm(v)
                 n_delta[k] += 1
 
     for cluster_idx, cluster in enumerate(chain):
@@ -240,14 +231,18 @@ def split_mesh_at_edge(
     edges,
     tol=default_tolerance,
 ):
-    # find points in mesh on dart
-
+    # find points in mesh on dart, only points in the bounding box of
+    # the edges are measured
+    boxes = [e.BoundBox for e in edges]
+    lo = np.min([[b.XMin, b.YMin, b.ZMin] for b in boxes], axis=0)
+    hi = np.max([[b.XMax, b.YMax, b.ZMax] for b in boxes], axis=0)
+    near = np.all((mesh.points > lo - tol) & (mesh.points < hi + tol), axis=1)
     dart_point_indices = frozenset(
         [
-            i
-            for i, p in enumerate(mesh.Points)
+            int(i)
+            for i in np.flatnonzero(near)
             if is_point_on_edges(
-                p,
+                mesh.points[i],
                 edges,
                 tol=tol,
             )
@@ -280,28 +275,20 @@ def generate_dart_mesh(
     delta,
     gap_length,
 ):
-    mesh_dart = Mesh.Mesh()
-    for poly_idx, poly in enumerate(mesh.Topology[1]):
-        if poly_idx not in poly_cluster:
-            cluster_idx = -1
-        else:
-            cluster_idx = poly_cluster[poly_idx]
-
-        def point_index_to_vector(i):
-            p = mesh.Points[i]
-            v = Vector(p.x, p.y, p.z)
-            if (
-                (cluster_idx >= 0)
-                and (i in analysis_points)
-                and (cluster_idx in analysis_points[i])
-            ):
-                return v + delta[(i, cluster_idx)] * gap_length
-            return v
-
-        vecs = [point_index_to_vector(i) for i in list(poly)]
-        mesh_dart.addFacet(*vecs)
-
-    return mesh_dart
+    # facets keep their own copy of each point, points of a split cluster
+    # move into its side of the dart
+    tris = mesh.points[mesh.facets]
+    facet_cluster = np.full(len(mesh.facets), -1)
+    facet_cluster[list(poly_cluster)] = list(poly_cluster.values())
+    ptr = mesh.vertex_facets_ptr
+    for i, clusters in analysis_points.items():
+        around = mesh.vertex_facets[ptr[i] : ptr[i + 1]]
+        for cluster_idx in clusters:
+            polys = around[facet_cluster[around] == cluster_idx]
+            corner = mesh.facets[polys] == i
+            tris[polys] += corner[:, :, None] * delta[(i, cluster_idx)] * gap_length
+
+    return Mesh.Mesh(tris.reshape(-1, 3).tolist())
 
 
 def make_dart(
@@ -311,10 +298,12 @@ def make_dart(
     gap_length=0.1,
     tol=default_tolerance,
 ):
-    # - convert shape to mesh
-    mesh = shape2Mesh(shape, max_length)
+    # - convert shape to mesh, sharing a finer tessellation of the shape
+    #   if e.g. a shell on the same support made one
+    mesh = shape2Mesh(shape, max_length, share=True)
     if not mesh:
         raise ValueError("can't make mesh")
+    mesh = MeshArrays.from_mesh(mesh)
 
     # - analyse mesh
     analysis_points, poly_cluster, delta = split_mesh_at_edge(
@@ -0,0 +1,308 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Runs the geometry (unwrap) stage of composite shells away from the
+# document: many shells in a process pool, or one shell in a background
+# worker process. Each shell supplies its mesh arrays through
+# drape_request() and receives the flat nodes back through
+# finish_drape(), the placement
+# stage and strain solve then run in the document process. Worker
+# processes are spawned plain Python interpreters running
+# workers/composites_unwrap.py, forking the running FreeCAD is unsafe.
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from FreeCAD import Console
+
+from .. import MODULE_PATH
+from ..util.unwrap_util import error_text
+from .draper import Draper, flatten_arrays, log_timings, mirror_seam, unwrap_plies
+
+WORKER_PATH = os.path.join(MODULE_PATH, "workers")
+
+DrapeRequest = namedtuple(
+    "DrapeRequest",
+    [
+        "lcs",
+        "keys",
+        "mesh",
+        "points",
+        "facets",
+        "flattener",
+        "initial",
+        "seed",
+        "mirror",
+    ],
+    defaults=(None, None),
+)
+
+# ply drapes of a shell: job holds the ply_unwrap_job() arguments, the
+# remaining fields identify and place the result
+PlyDrapeRequest = namedtuple(
+    "PlyDrapeRequest",
+    ["keys", "names", "draper", "lcs", "flattener", "job"],
+)
+
+
+def unwrap_args(request):
+    # flatten_arrays() arguments for a drape request
+    return (
+        request.points,
+        request.facets,
+        *Draper.unwrap_options(request.flattener, request.initial),
+        request.initial,
+        request.seed,
+        mirror_seam(request.points, request.facets, request.mirror),
+    )
+
+
+def _unwrap_job(job):
+    # in process fallback of the worker's unwrap_job(): (flat, error text)
+    try:
+        return flatten_arrays(*job), None
+    except Exception as exc:
+        return None, error_text(exc)
+
+
+def is_import_error(error):
+    # worker error text of a backend that doesn't load outside FreeCAD,
+    # e.g. the flatmesh extension of FaceUnwrapper; such jobs are retried
+    # in this process
+    return bool(error) and error.startswith(("ImportError:", "ModuleNotFoundError:"))
+
+
+def worker_python():
+    # a Python interpreter for the workers: sys.executable is FreeCAD's
+    # own binary when running inside FreeCAD, look for the python next to
+    # it or in its prefix
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    names = ("python3.exe", "python.exe") if os.name == "nt" else ("python3", "python")
+    for folder in (
+        os.path.dirname(sys.executable),
+        os.path.join(sys.prefix, "bin"),
+        sys.prefix,
+    ):
+        for name in names:
+            candidate = os.path.join(folder, name)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def worker_context():
+    # spawn context running worker_python(), None without an interpreter
+    python = worker_python()
+    if python is None:
+        return None
+    if WORKER_PATH not in sys.path:
+        sys.path.append(WORKER_PATH)
+    context = multiprocessing.get_context("spawn")
+    if python != sys.executable:
+        context.set_executable(python)
+    return context
+
+
+def worker_module():
+    import composites_unwrap
+
+    return composites_unwrap
+
+
+def is_drape_scheduled(obj):
+    return hasattr(getattr(obj, "Proxy", None), "drape_request")
+
+
+class DrapeScheduler:
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+
+    def make_pool(self, n_jobs):
+        workers = min(self.workers, n_jobs)
+        if workers < 2:
+            return None
+        context = worker_context()
+        if context is None:
+            return None
+        return ProcessPoolExecutor(workers, mp_context=context)
+
+    def unwrap_all(self, jobs):
+        # (flat, error text) per job, in job order
+        pool = self.make_pool(len(jobs))
+        if pool is None:
+            return [_unwrap_job(job) for job in jobs]
+        unwrap_job = worker_module().unwrap_job
+        results = []
+        with pool:
+            for job, (flat, timings, error) in zip(jobs, pool.map(unwrap_job, jobs)):
+                if is_import_error(error):
+                    flat, error = _unwrap_job(job)
+                else:
+                    log_timings(job[4], timings)
+                results.append((flat, error))
+        return results
+
+    def run(self, shells):
+        # shells are processed and written back in name order so the
+        # outcome does not depend on the pool's scheduling
+        pending = []
+        for fp in sorted(shells, key=lambda o: o.Name):
+            request = fp.Proxy.drape_request(fp)
+            if request is not None:
+                pending.append((fp, request))
+
+        jobs = [unwrap_args(request) for _, request in pending]
+        for (fp, request), (flat, error) in zip(pending, self.unwrap_all(jobs)):
+            fp.Proxy.finish_drape(fp, request, flat, error)
+        Console.PrintLog(
+            f"DrapeScheduler unwrapped {len(pending)} of {len(shells)} shells "
+            f"with {self.workers} workers\n",
+        )
+        return [fp for fp, _ in pending]
+
+
+class DrapeCancelled(Exception):
+    pass
+
+
+class DrapeJob:
+    # Unwraps one drape request in a spawned worker process, so the GUI
+    # thread keeps the GIL. The owner polls done() from the GUI thread
+    # and publishes result through finish_drape(); progress holds the
+    # latest (fraction, stage) reported by the worker, error the text of
+    # its exception. Cancelling terminates the worker. Without a Python
+    # interpreter for workers, or when the worker can't import the
+    # flattener backend, the unwrap runs in a thread instead, which then
+    # stops at its next progress report when cancelled.
+
+    def __init__(self, request):
+        self.request = request
+        self.progress = (0.0, request.flattener)
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+        self._process = None
+        self._conn = None
+
+    def start(self):
+        context = worker_context()
+        if context is None:
+            self._start_thread()
+            return self
+        self._conn, child = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=getattr(worker_module(), self.worker),
+            args=(child, self.job_args()),
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        return self
+
+    # worker module function running the job and its arguments, and the
+    # same unwrap in this process
+    worker = "run_job"
+
+    def job_args(self):
+        return unwrap_args(self.request)
+
+    def unwrap(self, progress):
+        return flatten_arrays(*self.job_args(), progress=progress)
+
+    def _start_thread(self):
+        self._process = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+        if self._process is not None:
+            self._process.terminate()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        if self._process is None:
+            return not self._thread.is_alive()
+        self._receive()
+        if self._process.is_alive():
+            return False
+        self._receive()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            if not self.cancelled and self.result is None and self.error is None:
+                self.error = f"drape worker exited with code {self._process.exitcode}"
+            if not self.cancelled and is_import_error(self.error):
+                self.error = None
+                self._start_thread()
+                return False
+        return True
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            (self._process or self._thread).join(0.01)
+        return True
+
+    def _receive(self):
+        # messages of the worker's run_job(), sent in order
+        while self._conn is not None and not self.cancelled and self._conn.poll():
+            try:
+                kind, *data = self._conn.recv()
+            except EOFError:
+                return
+            match kind:
+                case "progress":
+                    self.progress = tuple(data)
+                case "done":
+                    self.result, timings = data
+                    log_timings(self.request.flattener, timings)
+                    self.progress = (1.0, "done")
+                case "error":
+                    self.error = data[0]
+
+    def report(self, fraction, stage):
+        if self.cancelled:
+            raise DrapeCancelled()
+        self.progress = (fraction, stage)
+
+    def _run(self):
+        try:
+            self.result = self.unwrap(self.report)
+            self.report(1.0, "done")
+        except DrapeCancelled:
+            self.result = None
+        except Exception as exc:
+            self.error = error_text(exc)
+
+
+class PlyDrapeJob(DrapeJob):
+    # Unwraps the plies of a PlyDrapeRequest like a DrapeJob, result is
+    # the flat nodes of each ply
+
+    worker = "run_ply_job"
+
+    def job_args(self):
+        return self.request.job
+
+    def unwrap(self, progress):
+        return unwrap_plies(*self.job_args(), progress=progress)
+
+
+def drape_document(doc, workers: int | None = None):
+    shells = [obj for obj in doc.Objects if is_drape_scheduled(obj)]
+    draped = DrapeScheduler(workers).run(shells)
+    doc.recompute()
+    return draped
@@ -1,91 +1,396 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 # Copyright 2025 John Wharington jwharington@gmail.com
 
-import flatmesh
 import numpy as np
-import Part
 from FreeCAD import (
     Base,
+    Console,
+    Matrix,
     Rotation,
     Vector,
 )
 
+from ..util.drape_util import (
+    FacetLocator,
+    as_points3,
+    calc_facet_strains,
+    facet_frames,
+    facet_jacobians,
+    jacobian_axes,
+    mirror_flat,
+    mirror_mesh,
+    offset_surfaces,
+    pair_triangles,
+    quad_jacobians,
+    quad_normals,
+    shear_angles,
+    strains_from_jacobians,
+    transform_points,
+    vertex_average,
+    vertex_normals,
+    z_rotation_matrix,
+)
+from ..util.flatten_util import boundary_loops
+from ..util.hotspot_util import HotspotFinder
+from ..util.mesh_arrays import MeshArrays
 from ..util.mesh_util import (
     axes_mapped,
     calc_lambda_vec,
-    eval_lam,
+)
+from ..util.projection_util import SurfaceProjector
+from ..util.unwrap_util import (  # noqa: F401
+    make_flattener,
+    unwrap_arrays,
+    unwrap_chain,
 )
 
 
-def z_rotation(offset_angle_deg):
-    return Rotation(Vector(0, 0, 1), offset_angle_deg)
+def placement_matrix(placement):
+    return np.array(placement.toMatrix().A, dtype=np.float64).reshape(4, 4)
 
 
-class Draper:
-    unwrap_steps = 5
-    unwrap_relax_weight = 0.95
+FLATTENERS = ["FaceUnwrapper", "ARAP", "Kinematic"]
 
-    def __init__(self, mesh, lcs, shape):
-        def get_flattener() -> flatmesh.FaceUnwrapper:
-            if not mesh.Points:
-                return None
-            points = np.array([[i.x, i.y, i.z] for i in mesh.Points])
-            faces = np.array([list(i) for i in mesh.Topology[1]])
-            flattener = flatmesh.FaceUnwrapper(points, faces)
-            flattener.findFlatNodes(
-                self.unwrap_steps,
-                self.unwrap_relax_weight,
-            )
-            return flattener
-
-        self.mesh = mesh
-        self.shape = shape
-        self.flattener: flatmesh.FaceUnwrapper = get_flattener()
-        if not self.flattener:
-            raise ValueError("Can't flatten shape")
 
-        self.fabric_points = [Vector(*n) for n in self.flattener.ze_nodes]
+# drape origin and fibre direction from an LCS, as used by the
+# kinematic drape; angle_deg turns the fibres about the LCS z axis, e.g.
+# by the rosette angle
+def lcs_seed(lcs, angle_deg=0.0):
+    placement = lcs.getGlobalPlacement()
+    base = placement.Base
+    R = placement_matrix(placement.Rotation)[:3, :3]
+    return np.array([base.x, base.y, base.z]), R @ z_rotation_matrix(angle_deg)[:, 0]
+
+
+# rotation of fabric coordinates into the frame of fibres at angle_deg,
+# the fibres at angle_deg from the fabric x axis becoming its x axis.
+# Angles turn counterclockwise about the LCS z axis throughout: in
+# lcs_seed(), the rosette search and the grid shader.
+def fibre_frame(angle_deg):
+    return z_rotation_matrix(-angle_deg)
+
+
+# (origin, normal) of the plane of an LCS named "XY", "XZ" or "YZ"
+def lcs_plane(lcs, plane):
+    placement = lcs.getGlobalPlacement()
+    base = placement.Base
+    R = placement_matrix(placement.Rotation)[:3, :3]
+    axis = {"YZ": 0, "XZ": 1, "XY": 2}[plane]
+    return np.array([base.x, base.y, base.z]), R[:, axis]
+
+
+def log_timings(method, timings):
+    for t in timings:
+        Console.PrintLog(
+            f"{method} {t['stage']} {t['iteration']}: {t['seconds']:.4f}s"
+            f" energy={t['energy']}\n",
+        )
+
 
-        def calc_flat_placement():
-            placement = lcs.getGlobalPlacement()
+def flatten_arrays(
+    points,
+    facets,
+    steps,
+    relax_weight,
+    method="FaceUnwrapper",
+    initial=None,
+    seed=None,
+    seam=None,
+    progress=None,
+):
+    # geometry stage on plain arrays in this process, see unwrap_arrays();
+    # returns flat nodes and flat boundary node arrays
+    ze_nodes, flat_boundaries, timings = unwrap_arrays(
+        points, facets, steps, relax_weight, method, initial, seed, seam, progress
+    )
+    log_timings(method, timings)
+    return ze_nodes, flat_boundaries
 
-            T_lcs = placement.Rotation.inverted()
-            tri_global, tri_fabric = self._get_facet(placement.Base)
-            tri_global = [T_lcs * p for p in tri_global]
-            center = T_lcs * placement.Base
-            lam = calc_lambda_vec(center, tri_global)
 
-            q = axes_mapped(lam, tri_fabric, tri_global)
-            R = Rotation(q[0], q[1], Vector(0, 0, 1), "ZXY").inverted()
-            origin = Vector(eval_lam(lam, tri_fabric))
-            return Base.Placement(-origin, R, origin)
+def is_warm_start(flattener, initial):
+    # whether an unwrap starts from the initial flat nodes of a previous
+    # drape, the kinematic drape is a single pass and is never warm started
+    return initial is not None and flattener != "Kinematic"
 
-        self.T_fo = calc_flat_placement()
-        self.fabric_points = [self.T_fo * p for p in self.fabric_points]
-        self.strains = np.vstack([self.calc_strain(i) for i in range(mesh.CountFacets)])
+
+class Draper:
+    unwrap_steps = 5
+    unwrap_relax_weight = 0.95
+    warm_start_steps = 1
+
+    def __init__(
+        self,
+        mesh,
+        lcs,
+        shape,
+        flattener="FaceUnwrapper",
+        previous=None,
+        quads=False,
+        angle=0.0,
+        mirror=None,
+    ):
+        self.shape = shape
+        seed = lcs_seed(lcs, angle) if flattener == "Kinematic" else None
+        self.flatten(mesh, flattener, previous, quads, seed, mirror)
+        self.place(lcs)
+
+    # steps, relax weight and method for flatten_arrays(); warm starts
+    # only relax the initial flat nodes, using the backend that takes them
+    @classmethod
+    def unwrap_options(cls, flattener, initial=None):
+        if not is_warm_start(flattener, initial):
+            return cls.unwrap_steps, cls.unwrap_relax_weight, flattener
+        return cls.warm_start_steps, cls.unwrap_relax_weight, "ARAP"
+
+    # geometry stage: tessellated shape to flat nodes, independent of
+    # the LCS except for the kinematic drape, which starts from the seed
+    # origin and direction; a previous drape of a slightly different
+    # shape warm starts the unwrap. mesh is the MeshArrays of the shape.
+    def flatten(
+        self,
+        mesh,
+        flattener="FaceUnwrapper",
+        previous=None,
+        quads=False,
+        seed=None,
+        mirror=None,
+    ):
+        points, facets = mesh.points, mesh.facets
+        initial = previous.warm_start(points) if previous is not None else None
+        flat = flatten_arrays(
+            points,
+            facets,
+            *self.unwrap_options(flattener, initial),
+            initial,
+            seed,
+            mirror_seam(points, facets, mirror),
+        )
+        if mirror is not None:
+            points, facets, *flat = mirror_drape(points, facets, flat[0], mirror)
+        self.set_flat(points, facets, *flat, quads=quads)
+        if mirror is None:
+            self._mesh_arrays = mesh
+
+    # flat nodes of this drape at (P, 3) points of a new mesh, by
+    # nearest point correspondence, as an initial guess for unwrapping
+    def warm_start(self, points):
+        facets, lam = self.locator.locate(points)
+        flat = as_points3(self.ze_nodes)[self.facets[facets]]
+        return np.einsum("qv,qvj->qj", lam, flat)[:, :2]
+
+    def set_flat(self, points, facets, ze_nodes, flat_boundaries, quads=False):
+        self.points = points
+        self.facets = facets
+        self.locator = FacetLocator(self.points, self.facets)
+        self.ze_nodes = ze_nodes
+        self.flat_boundaries = flat_boundaries
+        self.strains = None
+        self.hotspot_finder = None
+        self._mesh_arrays = None
+        self.set_quads(*(pair_triangles(points, facets) if quads else (None, None)))
+
+    # MeshArrays of the drape mesh, built on first use
+    @property
+    def mesh_arrays(self) -> MeshArrays:
+        if getattr(self, "_mesh_arrays", None) is None:
+            self._mesh_arrays = MeshArrays(self.points, self.facets)
+        return self._mesh_arrays
+
+    # quad-dominant drape: quads (M, 4) of point indices, each made of the
+    # triangle pair quad_facets (M, 2). Quads get one bilinear strain and
+    # orientation each, like a quad shell element; the triangles are kept
+    # for flattening, texture coordinates and display.
+    def set_quads(self, quads, quad_facets):
+        self.quads = np.empty((0, 4), np.int32) if quads is None else quads
+        self.quad_facets = (
+            np.empty((0, 2), np.intp) if quad_facets is None else quad_facets
+        )
+        self.facet_quads = np.full(len(self.facets), -1, dtype=np.intp)
+        self.facet_quads[self.quad_facets] = np.arange(len(self.quads))[:, None]
+
+    # drape from flat nodes computed elsewhere, e.g. by the drape scheduler
+    @classmethod
+    def from_flat(
+        cls,
+        points,
+        facets,
+        ze_nodes,
+        flat_boundaries,
+        lcs,
+        shape,
+        quads=False,
+    ):
+        self = cls.__new__(cls)
+        self.shape = shape
+        self.set_flat(points, facets, ze_nodes, flat_boundaries, quads=quads)
+        self.place(lcs)
+        return self
+
+    # placement stage: align flat nodes with the LCS and solve strains,
+    # cheap enough to rerun alone when only the LCS or rosette moves
+    def place(self, lcs):
+        placement = lcs.getGlobalPlacement()
+        base = placement.Base
+        R_lcs = placement_matrix(placement.Rotation)[:3, :3]
+        flat = as_points3(self.ze_nodes)
+
+        # the LCS origin maps to fabric (0, 0) and its x axis, mapped
+        # into the fabric, to the fabric x axis
+        facets, lam = self.locator.locate([base.x, base.y, base.z])
+        simp = self.facets[facets]
+        J = facet_jacobians(self.points[simp], flat[simp])[0]
+        q0 = J @ R_lcs[:, 0]
+        origin = lam[0] @ flat[simp[0]]
+        T = np.eye(4)
+        T[:3, :3] = z_rotation_matrix(-np.degrees(np.arctan2(q0[1], q0[0])))
+        T[:3, 3] = -T[:3, :3] @ origin
+
+        self.T_fo = Base.Placement(Matrix(*T.ravel()))
+        self.fabric_points = transform_points(T, flat)
+        self.solve_strains()
+
+    def solve_strains(self):
+        # triangle Jacobians are kept for interpolation, strains of paired
+        # triangles come from their quad
+        tri_global, tri_fabric = self._get_all_tris()
+        self.jacobians = facet_jacobians(tri_global, tri_fabric)
+        self.quad_jacobians = quad_jacobians(
+            self.points[self.quads],
+            self.fabric_points[self.quads],
+        )
+        single = self.facet_quads < 0
+        strains = np.empty((len(self.facets), 3))
+        strains[single] = calc_facet_strains(
+            tri_global[single],
+            tri_fabric[single],
+            self.jacobians[single],
+        )
+        strains[self.quad_facets] = strains_from_jacobians(
+            self.quad_jacobians,
+            quad_normals(self.points[self.quads]),
+        )[:, None]
+        self.strains = strains
+        self.solve_shear_angles()
+
+    # fabric shear angle of each facet in degrees, from its quad if paired
+    def solve_shear_angles(self):
+        self.shear_angles = self._frame_shear_angles(0.0)
+        self._ply_shear_angles = {}
+
+    # shear angles of a ply with fibres at angle_deg and angle_deg + 90
+    # in the fabric: the Jacobians are turned into the ply's fibre frame,
+    # as in the rosette search. Cached per angle until the next solve.
+    def get_shear_angles(self, angle_deg=0.0):
+        angle_deg = float(angle_deg)
+        if angle_deg == 0.0:
+            return self.shear_angles
+        cache = getattr(self, "_ply_shear_angles", None)
+        if cache is None:
+            cache = self._ply_shear_angles = {}
+        if angle_deg not in cache:
+            cache[angle_deg] = self._frame_shear_angles(angle_deg)
+        return cache[angle_deg]
+
+    def _frame_shear_angles(self, angle_deg):
+        R = fibre_frame(angle_deg)[:2, :2]
+        shear = np.empty(len(self.facets))
+        single = self.facet_quads < 0
+        shear[single] = shear_angles(R @ self.jacobians[single])
+        shear[self.quad_facets] = shear_angles(R @ self.quad_jacobians)[:, None]
+        return shear
 
     def isValid(self):
-        return self.flattener
+        return self.strains is not None
+
+    # shear angles in degrees of a ply at angle_deg averaged at the mesh
+    # vertices
+    def get_vertex_shear_angles(self, angle_deg=0.0):
+        return vertex_average(
+            self.points, self.facets, self.get_shear_angles(angle_deg)
+        )
+
+    # connected regions over the strain and shear angle limits, largest
+    # first, see HotspotFinder.find(). Locking is checked on the plies at
+    # each of angles, by the largest shear angle of any of them.
+    def find_hotspots(self, angles=(0.0,), **limits):
+        if getattr(self, "hotspot_finder", None) is None:
+            self.hotspot_finder = HotspotFinder(self.mesh_arrays)
+        shear = np.stack([self.get_shear_angles(a) for a in angles])
+        worst = np.take_along_axis(shear, np.abs(shear).argmax(axis=0)[None], axis=0)
+        return self.hotspot_finder.find(self.strains, worst[0], **limits)
+
+    # arrays sufficient to restore the drape without flattening
+    # arrays every cache entry has, quads are optional
+    cache_arrays = (
+        "points",
+        "facets",
+        "ze_nodes",
+        "boundary_nodes",
+        "boundary_offsets",
+        "T_fo",
+        "strains",
+    )
+
+    def to_cache(self):
+        boundaries = self.flat_boundaries
+        return {
+            "points": self.points,
+            "facets": self.facets,
+            "ze_nodes": self.ze_nodes,
+            "boundary_nodes": (
+                np.concatenate(boundaries)
+                if boundaries
+                else np.empty((0, self.ze_nodes.shape[1]))
+            ),
+            "boundary_offsets": np.cumsum([0] + [len(b) for b in boundaries]),
+            "T_fo": placement_matrix(self.T_fo),
+            "strains": self.strains,
+            "quads": self.quads,
+            "quad_facets": self.quad_facets,
+        }
+
+    @classmethod
+    def from_cache(cls, data, shape):
+        self = cls.__new__(cls)
+        self.shape = shape
+        offsets = data["boundary_offsets"]
+        self.set_flat(
+            data["points"],
+            data["facets"],
+            data["ze_nodes"],
+            [data["boundary_nodes"][a:b] for a, b in zip(offsets[:-1], offsets[1:])],
+        )
+        if "quads" in data:
+            self.set_quads(data["quads"], data["quad_facets"])
+        self.T_fo = Base.Placement(Matrix(*data["T_fo"].ravel()))
+        self.fabric_points = transform_points(data["T_fo"], self.ze_nodes)
+        self.jacobians = facet_jacobians(*self._get_all_tris())
+        self.quad_jacobians = quad_jacobians(
+            self.points[self.quads],
+            self.fabric_points[self.quads],
+        )
+        self.strains = data["strains"]
+        self.solve_shear_angles()
+        return self
 
     # internal use only
     def _get_tris(self, i: np.intp):
-        simp = self.mesh.Topology[1][i]
-        tri_global = [self.mesh.Points[i].Vector for i in simp]
-        tri_fabric = [self.fabric_points[i] for i in simp]
+        simp = self.facets[i]
+        tri_global = [Vector(*self.points[j]) for j in simp]
+        tri_fabric = [Vector(*self.fabric_points[j]) for j in simp]
         return tri_global, tri_fabric
 
-    def _get_facet(
-        self,
-        center: Vector,
-    ):
-        dist = [center.distanceToPoint(p.Vector) for p in self.mesh.Points]
-
-        def tri_dist(tri):
-            return np.sum([dist[i] for i in tri])
+    def _get_all_tris(self):
+        return self.points[self.facets], self.fabric_points[self.facets]
 
-        totd = [tri_dist(tri) for tri in self.mesh.Topology[1]]
-        facet: np.intp = np.argmin(totd)
-        return self._get_tris(facet)
+    # Jacobians giving the orientation at located facets, the quad's
+    # where the facet is part of one
+    def _orientation_jacobians(self, facets):
+        J = self.jacobians[facets]
+        quads = self.facet_quads[facets]
+        in_quad = quads >= 0
+        J[in_quad] = self.quad_jacobians[quads[in_quad]]
+        return J
 
     def _rotation_from_tris(
         self,
@@ -103,8 +408,9 @@ class Draper:
         center: Vector,
         normal: Vector,
     ):
-        tri_global, tri_fabric = self._get_facet(center)
-        return self._rotation_from_tris(center, normal, tri_global, tri_fabric)
+        facets, _ = self.locator.locate([center.x, center.y, center.z])
+        d = jacobian_axes(self._orientation_jacobians(facets))[0]
+        return Rotation(Vector(*d[:, 0]), Vector(*d[:, 1]), normal, "ZXY").inverted()
 
     # use by FEM given fem triangles
     def get_lcs(
@@ -115,31 +421,41 @@ class Draper:
         normal = (tri[1] - tri[0]).cross(tri[2] - tri[1]).normalize()
         return self._get_lcs_at_point(center, normal)
 
+    # use by FEM for all elements at once, centers and normals are (E, 3)
+    # returns (E, 3, 3) rotation matrices matching get_lcs().toMatrix()
+    def get_lcs_batch(
+        self,
+        centers: np.ndarray,
+        normals: np.ndarray,
+    ):
+        facets, _ = self.locator.locate(centers)
+        d = jacobian_axes(self._orientation_jacobians(facets))
+        return facet_frames(np.asarray(normals, dtype=np.float64), d[:, :, 0])
+
+    # nearest point projection onto self.shape, built on first use
+    @property
+    def projector(self) -> SurfaceProjector:
+        if getattr(self, "_projector", None) is None:
+            self._projector = SurfaceProjector(self.shape)
+        return self._projector
+
     # use by LCS transfer tools
     def get_lcs_at_point(
         self,
         center: Vector,
     ):
-        def get_uv(p: Vector):
-            dmin = None
-            pint = None
-            fmin: Part.Face = None
-            vert = Part.Vertex(p.x, p.y, p.z)
-            for f in self.shape.Faces:
-                distance, points, info = f.distToShape(vert)
-                if (not fmin) or (distance < dmin):
-                    dmin = distance
-                    pint = points[0][0]
-                    fmin = f
-            return (fmin.Surface.parameter(pint), fmin)
-
-        def get_normal_projected(point: Vector):
-            ((u, v), surface) = get_uv(point)
-            return surface.valueAt(u, v), surface.normalAt(u, v)
-
-        p, normal = get_normal_projected(center)
+        p, normal = self.projector.project_point(center)
         return self._get_lcs_at_point(p, normal)
 
+    # batch of (Q, 3) points projected onto the shape, returns (Q, 3, 3)
+    # rotation matrices matching get_lcs_at_point().toMatrix()
+    def get_lcs_at_points(
+        self,
+        centers: np.ndarray,
+    ):
+        _, _, points, normals = self.projector.project(centers)
+        return self.get_lcs_batch(points, normals)
+
     # use by external alignment tools
     def get_tex_coord_at_point(
         self,
@@ -147,35 +463,63 @@ class Draper:
         offset_angle_deg: float = 0,
     ):
         # save texture coordinates for rendering pattern in 3d
-        tri_global, tri_fabric = self._get_facet(point)
-        lam = calc_lambda_vec(point, tri_global)
-        return z_rotation(offset_angle_deg) * eval_lam(lam, tri_fabric)
+        p = [point.x, point.y, point.z]
+        return Vector(*self.get_tex_coords_at_points(p, offset_angle_deg)[0])
+
+    # batch of (Q, 3) points to (Q, 3) texture coordinates
+    def get_tex_coords_at_points(
+        self,
+        points: np.ndarray,
+        offset_angle_deg: float = 0,
+    ):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        facets, _ = self.locator.locate(points)
+        first = self.facets[facets, 0]
+        fabric = self.fabric_points[first, :2] + np.einsum(
+            "qij,qj->qi",
+            self.jacobians[facets],
+            points - self.points[first],
+        )
+        return transform_points(fibre_frame(offset_angle_deg), fabric)
 
     # operations across whole mesh
 
-    # use by grid rendering
+    # use by grid rendering, returns (P, 3) array
+    def get_tex_coords_array(
+        self,
+        offset_angle_deg: float = 0,
+    ):
+        return transform_points(
+            fibre_frame(offset_angle_deg),
+            self.fabric_points,
+        )
+
     def get_tex_coords(
         self,
         offset_angle_deg: float = 0,
     ):
         # save texture coordinates for rendering pattern in 3d
-        T = z_rotation(offset_angle_deg)
-        return [T * p for p in self.fabric_points]
+        return [Vector(*p) for p in self.get_tex_coords_array(offset_angle_deg)]
+
+    # use by texture plan, returns list of (K, 3) arrays
+    def get_boundaries_array(
+        self,
+        offset_angle_deg: float = 0,
+    ):
+        T = placement_matrix(self.T_fo)
+        T[:3, :3] = T[:3, :3] @ fibre_frame(offset_angle_deg)
+        return [transform_points(T, edge) for edge in self.flat_boundaries]
 
-    # use by texture plan
     def get_boundaries(
         self,
         offset_angle_deg: float = 0,
     ):
-        T = self.T_fo * z_rotation(offset_angle_deg)
-        wires = []
-        boundaries = self.flattener.getFlatBoundaryNodes()
-        for edge in boundaries:
-            points = [T * Vector(*node) for node in edge]
-            wires.append(points)
-        return wires
-
-    # use by ? texture plan analysis or grid rendering
+        return [
+            [Vector(*node) for node in edge]
+            for edge in self.get_boundaries_array(offset_angle_deg)
+        ]
+
+    # per-facet reference for calc_facet_strains
     def calc_strain(self, facet: np.intp):
         # https://www.ce.memphis.edu/7117/notes/presentations/chapter_06a.pdf
 
@@ -201,3 +545,99 @@ class Draper:
         eyy = gamma.dot(v)
         exy = gamma.dot(u) + beta.dot(v)
         return np.array([exx, eyy, exy]) / two_area
+
+
+# seam tolerance of mirrored drapes, relative to the median edge length
+mirror_tolerance = 1.0e-4
+
+
+def _mirror_mesh(points, facets, mirror):
+    tris = np.asarray(points, dtype=np.float64)[facets]
+    edges = np.linalg.norm(tris - np.roll(tris, -1, axis=1), axis=-1)
+    return mirror_mesh(
+        points,
+        facets,
+        *mirror,
+        mirror_tolerance * float(np.median(edges)),
+    )
+
+
+def mirror_seam(points, facets, mirror):
+    # indices of the half's seam nodes for the plane mirror, which the
+    # unwrap keeps on a straight line; None without a mirror
+    if mirror is None:
+        return None
+    return np.flatnonzero(_mirror_mesh(points, facets, mirror)[2])
+
+
+def mirror_drape(points, facets, ze_nodes, mirror):
+    # Points, facets, flat nodes and flat boundaries of a shell mirror
+    # symmetric about the plane mirror = (origin, normal), from the mesh
+    # and flat nodes of the half that normal points to, unwrapped with
+    # its mirror_seam() held straight
+    points, facets, seam = _mirror_mesh(points, facets, mirror)
+    ze_nodes = mirror_flat(ze_nodes, seam)
+    flat_boundaries = [
+        ze_nodes[np.append(loop, loop[0])] for loop in boundary_loops(facets)
+    ]
+    return points, facets, ze_nodes, flat_boundaries
+
+
+def ply_drape_order(offsets):
+    # (ply, neighbour) pairs in draping order: outwards from the ply
+    # nearest the drape surface, which starts from the drape itself (-1)
+    offsets = np.asarray(offsets, dtype=np.float64)
+    by_z = np.argsort(offsets, kind="stable")
+    m = int(np.argmin(np.abs(offsets[by_z])))
+    order = [(int(by_z[m]), -1)]
+    order += [(int(by_z[i]), int(by_z[i - 1])) for i in range(m + 1, len(by_z))]
+    order += [(int(by_z[i]), int(by_z[i + 1])) for i in range(m - 1, -1, -1)]
+    return order
+
+
+def ply_unwrap_job(draper, offsets, lcs, flattener="FaceUnwrapper", angle=0.0):
+    # unwrap_chain() arguments draping the drape mesh offset along its
+    # vertex normals by each of the (L,) ply offsets. The offset meshes
+    # share the drape topology, so each ply warm starts from the flat
+    # nodes of its neighbour nearer the drape surface.
+    initial = draper.ze_nodes[:, :2]
+    return (
+        offset_surfaces(
+            draper.points,
+            vertex_normals(draper.points, draper.facets),
+            offsets,
+        ),
+        draper.facets,
+        ply_drape_order(offsets),
+        initial,
+        *Draper.unwrap_options(flattener, initial),
+        lcs_seed(lcs, angle) if flattener == "Kinematic" else None,
+    )
+
+
+def unwrap_plies(*job, progress=None):
+    # flat nodes of each ply of a ply_unwrap_job() in this process
+    flats, timings = unwrap_chain(*job, progress=progress)
+    log_timings(job[6], timings)
+    return flats
+
+
+def place_plies(draper, surfaces, flats, lcs):
+    quads = len(draper.quads) > 0
+    return [
+        Draper.from_flat(
+            surface,
+            draper.facets,
+            *flat,
+            lcs,
+            draper.shape,
+            quads=quads,
+        )
+        for surface, flat in zip(surfaces, flats)
+    ]
+
+
+def drape_offsets(draper, offsets, lcs, flattener="FaceUnwrapper", angle=0.0):
+    # drapes of the plies of ply_unwrap_job(), in the order of offsets
+    job = ply_unwrap_job(draper, offsets, lcs, flattener, angle)
+    return place_plies(draper, job[0], unwrap_plies(*job), lcs)
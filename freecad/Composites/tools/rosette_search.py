@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Search for the rosette placement with the least drape distortion. All
+# candidates, seed points with fibre angles, are evaluated on one drape
+# mesh. Energy based flatteners do not depend on the seed, so their flat
+# nodes are computed once and only the fibre frame changes between
+# candidates; the kinematic drape of each seed runs in the drape
+# scheduler's process pool. Costs are vectorized over the facets.
+
+from collections import namedtuple
+
+import numpy as np
+
+from ..util.drape_util import (
+    FacetLocator,
+    as_points3,
+    facet_jacobians,
+    facet_normals,
+    shear_angles,
+    strains_from_jacobians,
+    z_rotation_matrix,
+)
+from .drape_scheduler import DrapeScheduler
+from .draper import Draper, flatten_arrays
+
+# origin (3,) and rotation (3, 3) of the rosette LCS, fibre angle in
+# degrees about its z axis, and the support sub-element giving the origin
+RosetteCandidate = namedtuple(
+    "RosetteCandidate",
+    ["origin", "rotation", "angle", "support"],
+    defaults=(None,),
+)
+RosetteSearchResult = namedtuple("RosetteSearchResult", ["best", "cost", "costs"])
+
+MEASURES = ["shear", "strain"]
+WEIGHTINGS = ["peak", "area"]
+
+
+def candidate_seed(candidate):
+    # origin and fibre direction of the kinematic drape of a candidate
+    direction = candidate.rotation @ z_rotation_matrix(candidate.angle)[:, 0]
+    return np.asarray(candidate.origin, dtype=np.float64), direction
+
+
+class RosetteSearch:
+    # Locator, facet normals and areas of one drape mesh, shared by all
+    # candidates. measure is the fabric shear angle in degrees ("shear")
+    # or the largest strain magnitude ("strain") of each facet, weighting
+    # takes its "peak" or "area" weighted mean over the mesh.
+
+    # frames costed at once, bounds the (chunk, N, 2, 3) Jacobians
+    chunk = 64
+
+    def __init__(self, points, facets, measure="shear", weighting="peak"):
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown drape measure {measure}")
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"Unknown drape weighting {weighting}")
+        self.points = np.asarray(points, dtype=np.float64)
+        self.facets = np.asarray(facets, dtype=np.int32)
+        self.measure = measure
+        self.weighting = weighting
+        self.locator = FacetLocator(self.points, self.facets)
+        tris = self.locator.tris
+        self.normals = facet_normals(tris)
+        self.areas = 0.5 * np.linalg.norm(
+            np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=-1
+        )
+
+    def frame_angles(self, ze_nodes, candidates):
+        # (C,) angle in degrees of each candidate's fibre direction in the
+        # flat nodes: its LCS x axis mapped at the origin, as in
+        # Draper.place(), turned by the fibre angle
+        located, _ = self.locator.locate([c.origin for c in candidates])
+        simp = self.facets[located]
+        J = facet_jacobians(self.points[simp], as_points3(ze_nodes)[simp])
+        x = np.einsum("cij,cj->ci", J, [c.rotation[:, 0] for c in candidates])
+        return np.degrees(np.arctan2(x[:, 1], x[:, 0])) + [c.angle for c in candidates]
+
+    def costs(self, ze_nodes, angles):
+        # (C,) distortion of a drape measured in fibre frames at each of
+        # the (C,) angles in its flat nodes
+        J = facet_jacobians(self.locator.tris, as_points3(ze_nodes)[self.facets])
+        angles = np.atleast_1d(angles)
+        return np.concatenate(
+            [
+                self._frame_costs(J, angles[k : k + self.chunk])
+                for k in range(0, len(angles), self.chunk)
+            ]
+        )
+
+    def _frame_costs(self, J, angles):
+        # fabric coordinates in each frame, stacked as (C * N, 2, 3)
+        R = np.stack([z_rotation_matrix(-a)[:2, :2] for a in angles])
+        J = np.einsum("cij,njk->cnik", R, J).reshape(-1, 2, 3)
+        if self.measure == "shear":
+            values = np.abs(shear_angles(J))
+        else:
+            normals = np.tile(self.normals, (len(R), 1))
+            values = np.abs(strains_from_jacobians(J, normals)).max(axis=-1)
+        values = values.reshape(len(R), len(self.facets))
+        if self.weighting == "peak":
+            return values.max(axis=-1)
+        return values @ self.areas / self.areas.sum()
+
+    def search(
+        self, candidates, flattener="FaceUnwrapper", ze_nodes=None, workers=None
+    ):
+        # best of the candidates, pass the flat nodes of the current drape
+        # to reuse them for energy based flatteners. Candidates whose
+        # drape fails cost inf.
+        if flattener != "Kinematic":
+            if ze_nodes is None:
+                ze_nodes, _ = flatten_arrays(
+                    self.points,
+                    self.facets,
+                    *Draper.unwrap_options(flattener),
+                )
+            costs = self.costs(ze_nodes, self.frame_angles(ze_nodes, candidates))
+        else:
+            jobs = [
+                (
+                    self.points,
+                    self.facets,
+                    *Draper.unwrap_options(flattener),
+                    None,
+                    candidate_seed(c),
+                )
+                for c in candidates
+            ]
+            costs = np.full(len(candidates), np.inf)
+            flats = DrapeScheduler(workers).unwrap_all(jobs)
+            for k, (candidate, (flat, _)) in enumerate(zip(candidates, flats)):
+                if flat is not None:
+                    angles = self.frame_angles(flat[0], [candidate])
+                    costs[k] = self.costs(flat[0], angles)[0]
+        best = int(np.argmin(costs))
+        return RosetteSearchResult(candidates[best], float(costs[best]), costs)
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Content-addressed on-disk cache of numpy arrays with size-bounded
+# least-recently-used eviction.
+
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+# bumped whenever the arrays stored under a key change meaning, so that
+# entries written by older code are never reused
+FORMAT_VERSION = 3
+
+
+def make_key(*parts) -> str:
+    h = hashlib.sha256()
+    h.update(f"v{FORMAT_VERSION}".encode())
+    h.update(b"\0")
+    for p in parts:
+        h.update(repr(p).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ArrayCache:
+    suffix = ".npz"
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + self.suffix)
+
+    def load(self, key: str, required=()) -> dict | None:
+        # None on a miss; unreadable entries, e.g. truncated, or entries
+        # without all required arrays are deleted and count as misses
+        fname = self._file(key)
+        if not os.path.exists(fname):
+            return None
+        try:
+            with np.load(fname, allow_pickle=False) as data:
+                arrays = {k: data[k] for k in data.files}
+            missing = [k for k in required if k not in arrays]
+            if missing:
+                raise KeyError(missing[0])
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            self.discard(key)
+            return None
+        # mark as recently used
+        try:
+            os.utime(fname)
+        except OSError:
+            pass
+        return arrays
+
+    def store(self, key: str, arrays: dict):
+        os.makedirs(self.path, exist_ok=True)
+        # write to a temporary file so readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez_compressed(fh, **arrays)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def discard(self, key: str):
+        try:
+            os.unlink(self._file(key))
+        except OSError:
+            pass
+
+    def entries(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                st = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.path, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for _, _, name in self.entries():
+            try:
+                os.unlink(os.path.join(self.path, name))
+            except OSError:
+                pass
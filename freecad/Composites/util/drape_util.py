@@ -0,0 +1,451 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Batched (whole mesh) drape calculations on numpy arrays.
+# Triangle arrays are (N, 3, 3): facet, vertex, coordinate.
+# Quad arrays are (M, 4, 3) with corners in order around the facet.
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+ZERO_AREA_TOL = 1.0e-16
+
+
+def normalize_rows(v):
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(n > 0, n, 1.0)
+
+
+def as_points3(a):
+    # (N, 2) flat nodes or (N, 3) points as float64 (N, 3)
+    a = np.asarray(a, dtype=np.float64)
+    if a.shape[-1] == 3:
+        return a
+    pad = np.zeros(a.shape[:-1] + (3 - a.shape[-1],))
+    return np.concatenate([a, pad], axis=-1)
+
+
+def z_rotation_matrix(angle_deg):
+    c = np.cos(np.radians(angle_deg))
+    s = np.sin(np.radians(angle_deg))
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def transform_points(matrix, points):
+    # apply a 3x3 rotation or 4x4 homogeneous transform to (N, 3) points
+    matrix = np.asarray(matrix, dtype=np.float64)
+    out = as_points3(points) @ matrix[:3, :3].T
+    if matrix.shape == (4, 4):
+        out += matrix[:3, 3]
+    return out
+
+
+def facet_normals(tri):
+    return normalize_rows(
+        np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 1]),
+    )
+
+
+def vertex_normals(points, facets):
+    # area weighted average of the facet normals around each vertex
+    tri = np.asarray(points, dtype=np.float64)[facets]
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 1])
+    normals = np.zeros((len(points), 3))
+    for k in range(3):
+        np.add.at(normals, facets[:, k], cross)
+    return normalize_rows(normals)
+
+
+def offset_surfaces(points, normals, offsets):
+    # (P, 3) points moved along their normals by each of the (L,)
+    # offsets, as (L, P, 3)
+    offsets = np.asarray(offsets, dtype=np.float64)
+    return points[None, :, :] + offsets[:, None, None] * normals[None, :, :]
+
+
+def mirror_mesh(points, facets, origin, normal, tolerance):
+    # Mesh of one half of a shell, on the side of the plane through
+    # origin that unit normal points to, completed by its mirror image.
+    # Vertices within tolerance of the plane form the seam and are shared,
+    # the mirrored half follows the others in order and its facets are
+    # reversed to keep their orientation. Returns the points, facets and
+    # the (H,) seam mask of the half's vertices.
+    points = np.asarray(points, dtype=np.float64)
+    normal = np.asarray(normal, dtype=np.float64)
+    distance = (points - origin) @ normal
+    seam = np.abs(distance) < tolerance
+    index = np.arange(len(points))
+    index[~seam] = len(points) + np.arange(np.count_nonzero(~seam))
+    mirrored = points[~seam] - 2.0 * distance[~seam, None] * normal
+    return (
+        np.concatenate([points, mirrored]),
+        np.concatenate([facets, index[facets][:, ::-1]]).astype(np.int32),
+        seam,
+    )
+
+
+def mirror_flat(ze_nodes, seam):
+    # Flat nodes of a mirror_mesh() from those of its half, mirrored about
+    # the least squares line of the seam. A symmetric drape maps the seam
+    # to a straight line, the half must be unwrapped keeping it straight.
+    flat = np.asarray(ze_nodes, dtype=np.float64)[:, :2]
+    if np.count_nonzero(seam) < 2:
+        raise ValueError("Symmetry plane does not cut the shell")
+    centre = flat[seam].mean(axis=0)
+    direction = np.linalg.svd(flat[seam] - centre)[2][0]
+    along = (flat - centre) @ direction
+    mirrored = 2.0 * (centre + along[:, None] * direction) - flat
+    return np.concatenate([flat, mirrored[~seam]])
+
+
+def inv2(m):
+    # inverses of a stack of 2x2 matrices
+    det = m[..., 0, 0] * m[..., 1, 1] - m[..., 0, 1] * m[..., 1, 0]
+    adj = np.stack(
+        [
+            np.stack([m[..., 1, 1], -m[..., 0, 1]], axis=-1),
+            np.stack([-m[..., 1, 0], m[..., 0, 0]], axis=-1),
+        ],
+        axis=-2,
+    )
+    return adj / det[..., None, None]
+
+
+def _affine_jacobians(E, F):
+    # E (N, 3, 2) global and F (N, 2, 2) fabric tangent pairs
+    det = F[:, 0, 0] * F[:, 1, 1] - F[:, 0, 1] * F[:, 1, 0]
+    gram = np.einsum("nij,nik->njk", E, E)
+    gram_det = gram[:, 0, 0] * gram[:, 1, 1] - gram[:, 0, 1] ** 2
+    if np.any(det**2 < ZERO_AREA_TOL) or np.any(gram_det < ZERO_AREA_TOL):
+        raise ValueError("zero area triangle")
+    return F @ inv2(gram) @ np.swapaxes(E, 1, 2)
+
+
+def facet_jacobians(tri_global, tri_fabric):
+    # Jacobian of the affine map from each global facet to its fabric
+    # triangle, as (N, 2, 3): fabric x, y per global displacement, with
+    # the displacement projected onto the facet plane.
+    # Closed form of mesh_util.axes_mapped(lam, tri_fabric, tri_global).
+    E = np.stack(
+        [
+            tri_global[:, 1] - tri_global[:, 0],
+            tri_global[:, 2] - tri_global[:, 0],
+        ],
+        axis=-1,
+    )
+    F = np.stack(
+        [
+            tri_fabric[:, 1, :2] - tri_fabric[:, 0, :2],
+            tri_fabric[:, 2, :2] - tri_fabric[:, 0, :2],
+        ],
+        axis=-1,
+    )
+    return _affine_jacobians(E, F)
+
+
+def quad_tangents(quad):
+    # derivatives of the bilinear map over each quad at its centre,
+    # (M, D, 2) for (M, 4, D) corners
+    a = 0.5 * (quad[:, 2] - quad[:, 0])
+    b = 0.5 * (quad[:, 1] - quad[:, 3])
+    return np.stack([a + b, a - b], axis=-1)
+
+
+def quad_normals(quad):
+    return normalize_rows(
+        np.cross(quad[:, 2] - quad[:, 0], quad[:, 3] - quad[:, 1]),
+    )
+
+
+def quad_jacobians(quad_global, quad_fabric):
+    # facet_jacobians() for quads, from the bilinear fabric mapping
+    # evaluated at the quad centres, as (M, 2, 3)
+    return _affine_jacobians(
+        quad_tangents(np.asarray(quad_global, dtype=np.float64)),
+        quad_tangents(np.asarray(quad_fabric, dtype=np.float64)[..., :2]),
+    )
+
+
+def jacobian_axes(jacobians):
+    # Fabric x and y axes drawn on each global facet, as (N, 3, 2),
+    # i.e. the in-plane inverse of the facet Jacobians.
+    J = jacobians
+    return np.swapaxes(J, 1, 2) @ inv2(J @ np.swapaxes(J, 1, 2))
+
+
+def fabric_axes_mapped(tri_global, tri_fabric):
+    # Closed form of mesh_util.axes_mapped(lam, tri_global, tri_fabric)
+    return jacobian_axes(facet_jacobians(tri_global, tri_fabric))
+
+
+def facet_frames(normals, x_hint):
+    # Rows are the local x, y, z axes, matching
+    # Rotation(x_hint, y, normal, "ZXY").inverted().toMatrix()
+    z = normalize_rows(normals)
+    x = normalize_rows(x_hint - np.sum(x_hint * z, axis=-1, keepdims=True) * z)
+    y = np.cross(z, x)
+    return np.stack([x, y, z], axis=1)
+
+
+def calc_facet_strains(tri_global, tri_fabric, jacobians=None):
+    # Vectorised Draper.calc_strain for all facets, returns (N, 3) array
+    # of exx, eyy, exy. Pass jacobians from facet_jacobians() to reuse them.
+    # https://www.ce.memphis.edu/7117/notes/presentations/chapter_06a.pdf
+    G = np.asarray(tri_global, dtype=np.float64)
+    F = np.asarray(tri_fabric, dtype=np.float64)
+
+    if jacobians is None:
+        jacobians = facet_jacobians(G, F)
+    d = jacobian_axes(jacobians)
+    R = facet_frames(facet_normals(G), d[:, :, 0])
+
+    Gp = np.einsum("nij,nkj->nki", R, G)
+    u = Gp[:, :, 0] - F[:, :, 0]
+    v = Gp[:, :, 1] - F[:, :, 1]
+
+    fx = F[:, :, 0]
+    fy = F[:, :, 1]
+    beta = np.stack(
+        [fy[:, 1] - fy[:, 2], fy[:, 2] - fy[:, 0], fy[:, 0] - fy[:, 1]],
+        axis=-1,
+    )
+    gamma = np.stack(
+        [fx[:, 2] - fx[:, 1], fx[:, 0] - fx[:, 2], fx[:, 1] - fx[:, 0]],
+        axis=-1,
+    )
+
+    two_area = np.abs(
+        (fx[:, 1] - fx[:, 0]) * (fy[:, 2] - fy[:, 0])
+        - (fy[:, 1] - fy[:, 0]) * (fx[:, 2] - fx[:, 0]),
+    )
+    exx = np.sum(beta * u, axis=-1)
+    eyy = np.sum(gamma * v, axis=-1)
+    exy = np.sum(gamma * u, axis=-1) + np.sum(beta * v, axis=-1)
+    return np.stack([exx, eyy, exy], axis=-1) / two_area[:, None]
+
+
+def strains_from_jacobians(jacobians, normals):
+    # exx, eyy, exy as (N, 3) from the stretch of the fabric axes drawn
+    # on each facet, equal to calc_facet_strains() for triangles
+    d = jacobian_axes(jacobians)
+    R = facet_frames(normals, d[:, :, 0])
+    H = R[:, :2] @ d
+    return np.stack(
+        [H[:, 0, 0] - 1.0, H[:, 1, 1] - 1.0, H[:, 0, 1] + H[:, 1, 0]],
+        axis=-1,
+    )
+
+
+def shear_angles(jacobians):
+    # fabric shear angle in degrees on each facet: how far the angle
+    # between the warp and weft drawn on it closes from 90 degrees
+    d = jacobian_axes(jacobians)
+    cos = np.sum(normalize_rows(d[:, :, 0]) * normalize_rows(d[:, :, 1]), axis=-1)
+    return np.degrees(np.arcsin(np.clip(cos, -1.0, 1.0)))
+
+
+def vertex_average(points, facets, values):
+    # area weighted average of (N,) facet values around each vertex
+    tri = np.asarray(points, dtype=np.float64)[facets]
+    area = np.linalg.norm(
+        np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]),
+        axis=-1,
+    )
+    total = np.zeros(len(points))
+    weight = np.zeros(len(points))
+    for k in range(3):
+        np.add.at(total, facets[:, k], area * values)
+        np.add.at(weight, facets[:, k], area)
+    return total / np.where(weight > 0, weight, 1.0)
+
+
+def calc_quad_strains(quad_global, quad_fabric, jacobians=None):
+    # strains at the quad centres, returns (M, 3) array of exx, eyy, exy
+    G = np.asarray(quad_global, dtype=np.float64)
+    if jacobians is None:
+        jacobians = quad_jacobians(G, quad_fabric)
+    return strains_from_jacobians(jacobians, quad_normals(G))
+
+
+def pair_triangles(points, facets, max_skew_deg=30.0, max_fold_deg=20.0):
+    # Quad-dominant grouping of a triangle mesh: pairs of triangles
+    # sharing an edge are merged, best shaped quads first. A pair is
+    # kept if the quad is convex, its corner angles are within
+    # max_skew_deg of square and the triangles fold by at most
+    # max_fold_deg. Returns quads (M, 4) of point indices, ordered like
+    # the facets, and the triangle pair of each quad (M, 2).
+    points = np.asarray(points, dtype=np.float64)
+    facets = np.asarray(facets)
+    n = len(facets)
+    empty = np.empty((0, 4), dtype=np.int32), np.empty((0, 2), dtype=np.intp)
+    if n < 2:
+        return empty
+
+    # directed edge j of facet f runs from corner j to j + 1
+    start = facets.ravel()
+    end = np.roll(facets, -1, axis=1).ravel()
+    _, inverse, counts = np.unique(
+        np.sort(np.stack([start, end], axis=-1), axis=1),
+        axis=0,
+        return_inverse=True,
+        return_counts=True,
+    )
+    inverse = inverse.ravel()
+    shared = np.flatnonzero(counts[inverse] == 2)
+    order = shared[np.argsort(inverse[shared], kind="stable")]
+    a, b = order[0::2], order[1::2]
+    # both triangles must have the same orientation
+    a, b = a[start[a] == end[b]], b[start[a] == end[b]]
+    if not len(a):
+        return empty
+
+    fa, fb = a // 3, b // 3
+    p, q = start[a], end[a]
+    r = facets[fa, (a % 3 + 2) % 3]
+    s = facets[fb, (b % 3 + 2) % 3]
+    quads = np.stack([p, s, q, r], axis=-1)
+
+    corners = points[quads]
+    prev = np.roll(corners, 1, axis=1) - corners
+    succ = np.roll(corners, -1, axis=1) - corners
+    cos = np.sum(normalize_rows(prev) * normalize_rows(succ), axis=-1)
+    skew = np.degrees(np.abs(np.arccos(np.clip(cos, -1.0, 1.0)) - np.pi / 2))
+    score = skew.max(axis=1)
+
+    na = facet_normals(points[facets[fa]])
+    nb = facet_normals(points[facets[fb]])
+    normal = na + nb
+    c = corners
+    # convex if the other diagonal splits the quad into two triangles
+    # facing the same way
+    n1 = np.cross(c[:, 1] - c[:, 0], c[:, 3] - c[:, 0])
+    n2 = np.cross(c[:, 3] - c[:, 2], c[:, 1] - c[:, 2])
+    ok = (
+        (score <= max_skew_deg)
+        & (np.sum(na * nb, axis=-1) >= np.cos(np.radians(max_fold_deg)))
+        & (np.sum(n1 * normal, axis=-1) > 0)
+        & (np.sum(n2 * normal, axis=-1) > 0)
+    )
+
+    used = np.zeros(n, dtype=bool)
+    keep = []
+    for i in np.flatnonzero(ok)[np.argsort(score[ok], kind="stable")]:
+        if not (used[fa[i]] or used[fb[i]]):
+            used[fa[i]] = used[fb[i]] = True
+            keep.append(i)
+    keep = np.array(keep, dtype=np.intp)
+    return (
+        quads[keep].astype(np.int32),
+        np.stack([fa[keep], fb[keep]], axis=-1).reshape(-1, 2),
+    )
+
+
+def barycentric(p, tri):
+    # Barycentric coordinates of points p (..., 3) projected onto the
+    # plane of triangles tri (..., 3, 3), as in mesh_util.calc_lambda_vec
+    a = tri[..., 0, :]
+    v0 = tri[..., 1, :] - a
+    v1 = tri[..., 2, :] - a
+    v2 = p - a
+    d00 = np.sum(v0 * v0, axis=-1)
+    d01 = np.sum(v0 * v1, axis=-1)
+    d11 = np.sum(v1 * v1, axis=-1)
+    d20 = np.sum(v2 * v0, axis=-1)
+    d21 = np.sum(v2 * v1, axis=-1)
+    denom = d00 * d11 - d01 * d01
+    denom = np.where(np.abs(denom) < ZERO_AREA_TOL, np.inf, denom)
+    lam1 = (d11 * d20 - d01 * d21) / denom
+    lam2 = (d00 * d21 - d01 * d20) / denom
+    return np.stack([1.0 - lam1 - lam2, lam1, lam2], axis=-1)
+
+
+class FacetLocator:
+    # Nearest facet lookup for points on or near a triangle mesh.
+    # Candidate facets come from a KD-tree over facet centroids, the
+    # facet actually containing the projected point is then selected.
+
+    n_candidates = 8
+    chunk_size = 4096
+    # query x centroid pairs compared at once without scipy
+    brute_force_block = 1 << 20
+    # barycentric tolerance for a projected point inside a facet
+    inside_tol = 1.0e-9
+
+    def __init__(self, points, facets):
+        self.tris = np.asarray(points, dtype=np.float64)[facets]
+        self.centroids = self.tris.mean(axis=1)
+        self.tree = cKDTree(self.centroids) if cKDTree else None
+        # largest distance from a centroid to its facet, bounds how much
+        # nearer than its centroid any facet can be
+        self.radius = (
+            np.linalg.norm(self.tris - self.centroids[:, None], axis=-1).max()
+            if len(self.tris)
+            else 0.0
+        )
+
+    def _candidates(self, query, k):
+        # k nearest centroids of each query, the k-th nearest last
+        if self.tree is not None:
+            _, idx = self.tree.query(query, k=k)
+            return idx.reshape(len(query), k)
+        # brute force fallback without scipy, in blocks of queries
+        step = max(1, self.brute_force_block // max(len(self.centroids), 1))
+        if len(query) > step:
+            return np.concatenate(
+                [
+                    self._candidates(query[i : i + step], k)
+                    for i in range(0, len(query), step)
+                ]
+            )
+        d = np.sum((query[:, None, :] - self.centroids[None, :, :]) ** 2, axis=-1)
+        if k == len(self.centroids):
+            return np.argsort(d, axis=1)
+        idx = np.argpartition(d, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(d, idx, axis=1), axis=1)
+        return np.take_along_axis(idx, order, axis=1)
+
+    def _locate_chunk(self, query, k):
+        k = min(k, len(self.centroids))
+        cand = self._candidates(query, k)
+        tris = self.tris[cand]
+        lam = barycentric(query[:, None, :], tris)
+
+        # distance to the nearest point on each candidate, which is the
+        # distance to the plane for facets containing the projected point
+        clamped = np.clip(lam, 0.0, None)
+        clamped /= np.sum(clamped, axis=-1, keepdims=True)
+        nearest = np.einsum("qkv,qkvj->qkj", clamped, tris)
+        dist = np.linalg.norm(nearest - query[:, None, :], axis=-1)
+
+        best = np.argmin(dist, axis=1)
+        rows = np.arange(len(query))
+        facets, lam, dist = cand[rows, best], lam[rows, best], dist[rows, best]
+        if k == len(self.centroids):
+            return facets, lam
+
+        # queries in none of the candidates, with facets beyond the k-th
+        # centroid possibly nearer, e.g. among slivers, are located again
+        # with twice the candidates, in chunks of similar size
+        reach = np.linalg.norm(query - self.centroids[cand[:, -1]], axis=-1)
+        retry = np.flatnonzero(
+            (lam.min(axis=1) < -self.inside_tol) & (dist > reach - self.radius)
+        )
+        step = max(1, self.chunk_size * self.n_candidates // (2 * k))
+        for i in range(0, len(retry), step):
+            s = retry[i : i + step]
+            facets[s], lam[s] = self._locate_chunk(query[s], 2 * k)
+        return facets, lam
+
+    def locate(self, query):
+        # returns facet indices (Q,) and barycentric coordinates (Q, 3)
+        query = np.atleast_2d(np.asarray(query, dtype=np.float64))
+        facets = np.empty(len(query), dtype=np.intp)
+        lam = np.empty((len(query), 3))
+        for i in range(0, len(query), self.chunk_size):
+            s = slice(i, i + self.chunk_size)
+            facets[s], lam[s] = self._locate_chunk(query[s], self.n_candidates)
+        return facets, lam
@@ -0,0 +1,291 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Mesh flattening on numpy arrays, an alternative to
+# flatmesh.FaceUnwrapper that needs no FreeCAD modules: a least squares
+# conformal map (LSCM) start followed by as-rigid-as-possible (ARAP)
+# local/global relaxation. Meshes are (P, 3) points and (N, 3) facets.
+
+import time
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import splu
+except ImportError:
+    sp = None
+
+
+def boundary_loops(facets):
+    # closed boundary vertex loops, following the facet orientation
+    facets = np.asarray(facets)
+    edges = np.concatenate([facets[:, [0, 1]], facets[:, [1, 2]], facets[:, [2, 0]]])
+    _, inverse, counts = np.unique(
+        np.sort(edges, axis=1),
+        axis=0,
+        return_inverse=True,
+        return_counts=True,
+    )
+    boundary = edges[counts[inverse.ravel()] == 1].tolist()
+    following = dict(boundary)
+    loops = []
+    seen = set()
+    for start, _ in boundary:
+        if start in seen:
+            continue
+        loop = [start]
+        seen.add(start)
+        v = following[start]
+        while v != start and v not in seen:
+            loop.append(v)
+            seen.add(v)
+            v = following.get(v, start)
+        loops.append(np.array(loop, dtype=np.int32))
+    return loops
+
+
+def triangle_frames(points, facets):
+    # each facet in its own plane as (N, 3, 2), first vertex at the origin
+    # and first edge along x
+    tri = np.asarray(points, dtype=np.float64)[facets]
+    e1 = tri[:, 1] - tri[:, 0]
+    e2 = tri[:, 2] - tri[:, 0]
+    x = e1 / np.linalg.norm(e1, axis=-1, keepdims=True)
+    n = np.cross(e1, e2)
+    y = np.cross(n, x)
+    y /= np.linalg.norm(y, axis=-1, keepdims=True)
+    frames = np.zeros((len(tri), 3, 2))
+    frames[:, 1, 0] = np.linalg.norm(e1, axis=-1)
+    frames[:, 2, 0] = np.sum(e2 * x, axis=-1)
+    frames[:, 2, 1] = np.sum(e2 * y, axis=-1)
+    return frames
+
+
+def signed_areas(uv, facets):
+    tri = uv[facets]
+    a = tri[:, 1] - tri[:, 0]
+    b = tri[:, 2] - tri[:, 0]
+    return 0.5 * (a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0])
+
+
+def cotangents(frames):
+    # cotangent of the angle at each vertex, (N, 3)
+    a = np.roll(frames, -1, axis=1) - frames
+    b = np.roll(frames, -2, axis=1) - frames
+    dot = np.sum(a * b, axis=-1)
+    cross = np.abs(a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0])
+    return dot / np.maximum(cross, 1.0e-300)
+
+
+def _edges(facets):
+    # edge (i, j) of each facet opposite vertex k, as (N, 3) index arrays
+    return np.roll(facets, -1, axis=1), np.roll(facets, -2, axis=1)
+
+
+def _least_squares(A, rhs):
+    if sp is not None and sp.issparse(A):
+        return splu((A.T @ A).tocsc()).solve(A.T @ rhs)
+    return np.linalg.lstsq(np.asarray(A), rhs, rcond=None)[0]
+
+
+def _far_boundary_pair(points, facets):
+    loops = boundary_loops(facets)
+    candidates = np.concatenate(loops) if loops else np.arange(len(points))
+    p = points[candidates]
+    a = candidates[np.argmax(np.linalg.norm(p - p[0], axis=-1))]
+    b = candidates[np.argmax(np.linalg.norm(p - points[a], axis=-1))]
+    return a, b
+
+
+def lscm(points, facets):
+    # least squares conformal map, pinning the two boundary vertices
+    # farthest apart at their 3d distance
+    points = np.asarray(points, dtype=np.float64)
+    n_points = len(points)
+    frames = triangle_frames(points, facets)
+    d = np.roll(frames, -2, axis=1) - np.roll(frames, -1, axis=1)
+    area2 = np.abs(d[:, 0, 0] * d[:, 1, 1] - d[:, 0, 1] * d[:, 1, 0])
+    s = 1.0 / np.sqrt(np.maximum(area2, 1.0e-300))
+    wr = d[..., 0] * s[:, None]
+    wi = d[..., 1] * s[:, None]
+
+    n = len(facets)
+    t = np.repeat(np.arange(n), 3)
+    j = np.asarray(facets).ravel()
+    rows = np.concatenate([t, t, n + t, n + t])
+    cols = np.concatenate([j, n_points + j, j, n_points + j])
+    vals = np.concatenate([wr.ravel(), -wi.ravel(), wi.ravel(), wr.ravel()])
+
+    a, b = _far_boundary_pair(points, facets)
+    pinned = np.array([a, b, n_points + a, n_points + b])
+    pinned_values = np.array([0.0, np.linalg.norm(points[b] - points[a]), 0.0, 0.0])
+    free = np.setdiff1d(np.arange(2 * n_points), pinned)
+
+    if sp is not None:
+        A = sp.csr_matrix((vals, (rows, cols)), shape=(2 * n, 2 * n_points)).tocsc()
+    else:
+        A = np.zeros((2 * n, 2 * n_points))
+        np.add.at(A, (rows, cols), vals)
+    rhs = -(A[:, pinned] @ pinned_values)
+    x = np.empty(2 * n_points)
+    x[pinned] = pinned_values
+    x[free] = _least_squares(A[:, free], rhs)
+    uv = np.stack([x[:n_points], x[n_points:]], axis=-1)
+    if np.sum(signed_areas(uv, facets)) < 0:
+        uv[:, 1] = -uv[:, 1]
+    return uv
+
+
+class Flattener:
+    # Base of the flatteners on numpy arrays, with the interface of
+    # flatmesh.FaceUnwrapper: findFlatNodes(), ze_nodes and
+    # getFlatBoundaryNodes(). timings holds a record per stage; progress,
+    # if set, is called as progress(fraction, stage) and may raise to
+    # abort.
+
+    def __init__(self, points, facets):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.facets = np.asarray(facets, dtype=np.int32)
+        self.ze_nodes = None
+        self.timings = []
+        self.progress = None
+
+    def _record(self, stage, iteration, start, energy=None):
+        self.timings.append(
+            {
+                "stage": stage,
+                "iteration": iteration,
+                "seconds": time.perf_counter() - start,
+                "energy": energy,
+            }
+        )
+
+    def getFlatBoundaryNodes(self):
+        return [
+            self.ze_nodes[np.append(loop, loop[0])]
+            for loop in boundary_loops(self.facets)
+        ]
+
+
+class ArapFlattener(Flattener):
+    # Pass initial (P, 2) flat nodes to warm start from a previous
+    # solution instead of the LSCM map, and seam node indices to keep them
+    # on a straight line, as the symmetry seam of a mirrored half drape is.
+    # Each findFlatNodes step runs iterations_per_step ARAP iterations,
+    # reporting progress after each.
+
+    iterations_per_step = 4
+    tolerance = 1.0e-5
+
+    def __init__(self, points, facets, initial=None, seam=None):
+        super().__init__(points, facets)
+        self.frames = triangle_frames(self.points, self.facets)
+        self.weights = 0.5 * cotangents(self.frames)
+        self.dx = np.roll(self.frames, -1, axis=1) - np.roll(self.frames, -2, axis=1)
+        self.initial = None if initial is None else np.asarray(initial)[:, :2]
+        self.seam = None if seam is None else np.asarray(seam, dtype=np.intp)
+
+    def _rotations(self, uv):
+        # best fit rotation of each facet frame onto its flat triangle
+        fi, fj = _edges(self.facets)
+        du = uv[fi] - uv[fj]
+        M = np.einsum("ne,nei,nej->nij", self.weights, du, self.dx)
+        U, _, Vt = np.linalg.svd(M)
+        R = U @ Vt
+        flip = np.linalg.det(R) < 0
+        U[flip, :, 1] = -U[flip, :, 1]
+        R[flip] = U[flip] @ Vt[flip]
+        return R, du
+
+    def _energy(self, R, du):
+        r = du - np.einsum("nij,nej->nei", R, self.dx)
+        return float(np.sum(self.weights * np.sum(r * r, axis=-1)))
+
+    def _laplacian(self):
+        fi, fj = _edges(self.facets)
+        w = self.weights.ravel()
+        fi, fj = fi.ravel(), fj.ravel()
+        n = len(self.points)
+        rows = np.concatenate([fi, fj, fi, fj])
+        cols = np.concatenate([fi, fj, fj, fi])
+        vals = np.concatenate([w, w, -w, -w])
+        if sp is not None:
+            return sp.csr_matrix((vals, (rows, cols)), shape=(n, n)).tocsc()
+        L = np.zeros((n, n))
+        np.add.at(L, (rows, cols), vals)
+        return L
+
+    def _system(self, L, fixed):
+        # (fixed, free, coupling, solve) of one flat coordinate, the fixed
+        # nodes keeping their values
+        fixed = np.asarray(fixed, dtype=np.intp)
+        free = np.setdiff1d(np.arange(L.shape[0]), fixed)
+        if sp is not None:
+            coupling = L[free][:, fixed].toarray()
+            return fixed, free, coupling, splu(L[free][:, free].tocsc()).solve
+        L_inv = np.linalg.inv(L[np.ix_(free, free)])
+        return fixed, free, L[np.ix_(free, fixed)], lambda b: L_inv @ b
+
+    def _factorize(self):
+        # one anchor removes the translation freedom; seam nodes are held
+        # on the x axis, which removes the rotation freedom as well
+        L = self._laplacian()
+        u = self._system(L, [0] if self.seam is None else self.seam[:1])
+        v = u if self.seam is None else self._system(L, self.seam)
+        self.systems = (u, v)
+
+    def _align_seam(self, uv):
+        # rigid motion of the flat nodes taking the least squares line of
+        # the seam nodes onto the x axis, then the seam onto that line
+        centre = uv[self.seam].mean(axis=0)
+        d = np.linalg.svd(uv[self.seam] - centre)[2][0]
+        uv = (uv - centre) @ np.array([[d[0], -d[1]], [d[1], d[0]]])
+        uv[self.seam, 1] = 0.0
+        return uv
+
+    def _global_step(self, R, uv):
+        fi, fj = _edges(self.facets)
+        r = self.weights[..., None] * np.einsum("nij,nej->nei", R, self.dx)
+        b = np.zeros_like(uv)
+        np.add.at(b, fi.ravel(), r.reshape(-1, 2))
+        np.add.at(b, fj.ravel(), -r.reshape(-1, 2))
+        new = uv.copy()
+        for k, (fixed, free, coupling, solve) in enumerate(self.systems):
+            new[free, k] = solve(b[free, k] - coupling @ uv[fixed, k])
+        return new
+
+    def findFlatNodes(self, steps, relax_weight):
+        start = time.perf_counter()
+        if self.initial is not None:
+            uv = self.initial.astype(np.float64, copy=True)
+            self._record("warm start", 0, start)
+        else:
+            uv = lscm(self.points, self.facets)
+            self._record("lscm", 0, start)
+
+        if self.seam is not None:
+            uv = self._align_seam(uv)
+
+        # the ARAP system only depends on the 3d mesh
+        start = time.perf_counter()
+        self._factorize()
+        self._record("factorize", 0, start)
+
+        energy = None
+        n_iterations = steps * self.iterations_per_step
+        for iteration in range(1, n_iterations + 1):
+            start = time.perf_counter()
+            R, _ = self._rotations(uv)
+            new = self._global_step(R, uv)
+            uv = relax_weight * new + (1.0 - relax_weight) * uv
+            R, du = self._rotations(uv)
+            previous, energy = energy, self._energy(R, du)
+            self._record("arap", iteration, start, energy)
+            if self.progress is not None:
+                self.progress(iteration / n_iterations, "arap")
+            if previous is not None and previous - energy <= self.tolerance * max(
+                previous, 1.0e-300
+            ):
+                break
+        self.ze_nodes = uv
@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Hotspots of a drape: connected regions of facets over a strain or shear
+# limit, e.g. wrinkling in compression or bridging in tension. Facets are
+# connected through shared edges. Meshes are MeshArrays, fields are per
+# facet.
+
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    connected_components = None
+
+# facets are indices into the mesh, peak is the value furthest past the
+# limit, in the units of the field
+Hotspot = namedtuple("Hotspot", ["kind", "area", "centroid", "peak", "facets"])
+
+
+def label_components(n, pairs):
+    # connected component label 0.. of each of n nodes joined by (K, 2)
+    # pairs
+    if connected_components is not None:
+        graph = coo_matrix(
+            (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+            shape=(n, n),
+        )
+        return connected_components(graph, directed=False)[1]
+
+    # union-find: hook the larger root of each pair onto the smaller one,
+    # then compress the paths, until every pair shares a root
+    labels = np.arange(n)
+    a, b = labels[pairs[:, 0]], labels[pairs[:, 1]]
+    while np.any(a != b):
+        low = np.minimum(a, b)
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        while np.any(labels != labels[labels]):
+            labels = labels[labels]
+        a, b = labels[pairs[:, 0]], labels[pairs[:, 1]]
+    return np.unique(labels, return_inverse=True)[1]
+
+
+class HotspotFinder:
+    # facet areas, centroids and adjacency of a mesh, reused for every
+    # field checked
+
+    def __init__(self, mesh):
+        self.areas = mesh.areas
+        self.centroids = mesh.centroids
+        self.adjacency = mesh.facet_pairs
+
+    def regions(self, kind, values, over):
+        # Hotspots of the connected facets where over is set
+        index = np.flatnonzero(over)
+        if not len(index):
+            return []
+        local = np.full(len(over), -1)
+        local[index] = np.arange(len(index))
+        pairs = local[self.adjacency]
+        labels = label_components(len(index), pairs[np.all(pairs >= 0, axis=1)])
+
+        n = labels.max() + 1
+        areas = np.bincount(labels, weights=self.areas[index], minlength=n)
+        centroids = np.stack(
+            [
+                np.bincount(labels, weights=self.areas[index] * c, minlength=n)
+                for c in self.centroids[index].T
+            ],
+            axis=-1,
+        ) / areas[:, None]
+        # peak of each region: last of its facets ordered by magnitude
+        order = np.lexsort((np.abs(values[index]), labels))
+        last = np.flatnonzero(np.diff(np.append(labels[order], n)))
+        peaks = values[index][order[last]]
+        members = np.split(
+            index[np.argsort(labels, kind="stable")],
+            np.cumsum(np.bincount(labels, minlength=n))[:-1],
+        )
+        return [
+            Hotspot(kind, float(areas[k]), centroids[k], float(peaks[k]), members[k])
+            for k in range(n)
+        ]
+
+    def find(
+        self,
+        strains,
+        shear_angles=None,
+        tension=None,
+        compression=None,
+        shear=None,
+        locking_angle=None,
+    ):
+        # hotspots of all limits given, largest first. Fibre direction
+        # strains are checked for bridging in tension and wrinkling in
+        # compression, shear strain and the fabric shear angle (degrees)
+        # against their magnitude limits.
+        strains = np.asarray(strains, dtype=np.float64)
+        stretch = strains[:, :2].max(axis=1)
+        shrink = strains[:, :2].min(axis=1)
+        checks = []
+        if tension is not None:
+            checks.append(("bridging", stretch, stretch > tension))
+        if compression is not None:
+            checks.append(("wrinkling", shrink, shrink < -compression))
+        if shear is not None:
+            checks.append(("shear", strains[:, 2], np.abs(strains[:, 2]) > shear))
+        if locking_angle is not None and shear_angles is not None:
+            checks.append(
+                ("locking", shear_angles, np.abs(shear_angles) > locking_angle)
+            )
+        hotspots = [h for check in checks for h in self.regions(*check)]
+        return sorted(hotspots, key=lambda h: h.area, reverse=True)
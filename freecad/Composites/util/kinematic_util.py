@@ -0,0 +1,209 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Kinematic (pin-jointed net, "fishnet") drape of a woven fabric over a
+# triangle mesh. Warp and weft generators are marched from the origin
+# along the two fibre directions, then the net is filled one front at a
+# time: node (i, j) lies on the surface one cell from nodes (i - 1, j)
+# and (i, j - 1), and all nodes of a front |i| + |j| = k are solved
+# together. Fibres keep their length while the net shears freely; mesh
+# vertices get the fabric coordinates (i, j) * cell of the net around
+# them. Meshes are (P, 3) points and (N, 3) facets.
+
+import time
+
+import numpy as np
+
+from .drape_util import FacetLocator, facet_normals, inv2, normalize_rows
+from .flatten_util import Flattener
+
+
+def _tangent(v, n):
+    return normalize_rows(v - np.sum(v * n, axis=-1, keepdims=True) * n)
+
+
+class KinematicFlattener(Flattener):
+    # seed is the (3,) origin and (3,) warp direction of the drape, by
+    # default the mesh centre and global x. The net is a single pass,
+    # findFlatNodes ignores steps and weight and reports progress after
+    # each front.
+
+    newton_steps = 6
+    # node distance error, relative to the cell size
+    tolerance = 1.0e-3
+    # how far past the mesh boundary a node may project, in cells
+    boundary_tolerance = 0.01
+    # cell size per median mesh edge length
+    cell_scale = 1.0
+
+    def __init__(self, points, facets, seed=None):
+        super().__init__(points, facets)
+        self.locator = FacetLocator(self.points, self.facets)
+        self.normals = facet_normals(self.locator.tris)
+        if seed is None:
+            seed = (self.points.mean(axis=0), (1.0, 0.0, 0.0))
+        self.origin, self.direction = (np.asarray(v, dtype=np.float64) for v in seed)
+        edges = self.locator.tris - np.roll(self.locator.tris, -1, axis=1)
+        self.cell = self.cell_scale * float(
+            np.median(np.linalg.norm(edges, axis=-1)),
+        )
+
+    def _project(self, query):
+        # projections onto the plane of the nearest facet, its normals
+        # and how far the projections fall outside the mesh, in cells.
+        # Projections are not clamped to the facets, so nodes near the
+        # boundary do not slide along it.
+        facets, lam = self.locator.locate(query)
+        tris = self.locator.tris[facets]
+        clamped = np.clip(lam, 0.0, None)
+        clamped /= np.sum(clamped, axis=-1, keepdims=True)
+        nearest = np.einsum("qv,qvj->qj", clamped, tris)
+        projected = np.einsum("qv,qvj->qj", lam, tris)
+        outside = np.linalg.norm(projected - nearest, axis=-1) / self.cell
+        return projected, self.normals[facets], np.nan_to_num(outside, nan=np.inf)
+
+    def _march(self, start, directions, max_nodes):
+        # geodesic fibres from start along each of the (G, 3) directions,
+        # returns (G, max_nodes + 1, 3) nodes and the count on each fibre
+        nodes = np.full((len(directions), max_nodes + 1, 3), np.nan)
+        nodes[:, 0] = start
+        counts = np.ones(len(directions), dtype=np.intp)
+        step = directions
+        active = np.ones(len(directions), dtype=bool)
+        for k in range(max_nodes):
+            p = nodes[active, k]
+            q = p + self.cell * step[active]
+            for _ in range(self.newton_steps):
+                q, _, _ = self._project(q)
+                q = p + self.cell * normalize_rows(q - p)
+            q, n, outside = self._project(q)
+            ok = (outside < self.boundary_tolerance) & (
+                np.abs(np.linalg.norm(q - p, axis=-1) - self.cell)
+                < self.tolerance * self.cell
+            )
+            rows = np.flatnonzero(active)[ok]
+            nodes[rows, k + 1] = q[ok]
+            counts[rows] += 1
+            # continue straight, in the tangent plane of the new node
+            step[rows] = _tangent(q[ok] - p[ok], n[ok])
+            active[np.flatnonzero(active)[~ok]] = False
+            if not active.any():
+                break
+        return nodes, counts
+
+    def _solve_nodes(self, A, B, P):
+        # nodes one cell from both A and B, on the far side from P
+        C = A + B - P
+        good = np.ones(len(C), dtype=bool)
+        for _ in range(self.newton_steps):
+            C, n, _ = self._project(C)
+            da, db = C - A, C - B
+            ga, gb = normalize_rows(da), normalize_rows(db)
+            e1 = _tangent(ga, n)
+            e2 = np.cross(n, e1)
+            M = np.stack(
+                [
+                    np.stack([np.sum(ga * e1, -1), np.sum(ga * e2, -1)], -1),
+                    np.stack([np.sum(gb * e1, -1), np.sum(gb * e2, -1)], -1),
+                ],
+                axis=-2,
+            )
+            det = M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0]
+            good &= np.abs(det) > 1.0e-6
+            M[~good] = np.eye(2)
+            f = np.stack(
+                [
+                    np.linalg.norm(da, axis=-1) - self.cell,
+                    np.linalg.norm(db, axis=-1) - self.cell,
+                ],
+                axis=-1,
+            )
+            step = -np.einsum("kij,kj->ki", inv2(M), f)
+            C = C + step[:, :1] * e1 + step[:, 1:] * e2
+        C, _, outside = self._project(C)
+        residual = np.maximum(
+            np.abs(np.linalg.norm(C - A, axis=-1) - self.cell),
+            np.abs(np.linalg.norm(C - B, axis=-1) - self.cell),
+        )
+        good &= residual < self.tolerance * self.cell
+        good &= outside < self.boundary_tolerance
+        # reject cells folding back over their parents
+        good &= np.sum((C - P) * (A + B - 2.0 * P), axis=-1) > 0
+        return C, good
+
+    def _net(self):
+        # node positions (S, S, 3) and validity (S, S) of the net, node
+        # (i, j) at index (i + N, j + N)
+        origin, n, _ = self._project(self.origin[None])
+        warp = _tangent(self.direction[None], n)
+        weft = np.cross(n, warp)
+        reach = np.max(np.linalg.norm(self.points - origin, axis=-1))
+        N = int(np.ceil(2.0 * reach / self.cell)) + 1
+        S = 2 * N + 1
+
+        X = np.full((S, S, 3), np.nan)
+        valid = np.zeros((S, S), dtype=bool)
+        fibres, counts = self._march(
+            origin[0], np.concatenate([warp, -warp, weft, -weft]), N
+        )
+        for (di, dj), nodes, count in zip(
+            [(1, 0), (-1, 0), (0, 1), (0, -1)], fibres, counts
+        ):
+            k = np.arange(count)
+            X[N + di * k, N + dj * k] = nodes[:count]
+            valid[N + di * k, N + dj * k] = True
+
+        signs = np.array([(1, 1), (1, -1), (-1, 1), (-1, -1)])
+        fronts = 0
+        for k in range(2, 2 * N + 1):
+            a = np.arange(max(1, k - N), min(k, N + 1))
+            i = (signs[:, None, 0] * a).ravel()
+            j = (signs[:, None, 1] * (k - a)).ravel()
+            si, sj = np.sign(i), np.sign(j)
+            ia, ja = i - si + N, j + N
+            ib, jb = i + N, j - sj + N
+            ip, jp = i - si + N, j - sj + N
+            ok = valid[ia, ja] & valid[ib, jb] & valid[ip, jp]
+            if not ok.any():
+                break
+            C, good = self._solve_nodes(X[ia, ja][ok], X[ib, jb][ok], X[ip, jp][ok])
+            rows, cols = i[ok][good] + N, j[ok][good] + N
+            X[rows, cols] = C[good]
+            valid[rows, cols] = True
+            fronts += 1
+            if self.progress is not None:
+                self.progress(k / (2 * N), "net")
+        return X, valid, N, fronts
+
+    def _net_mesh(self, X, valid, N):
+        # triangles over the valid net cells with their fabric coordinates
+        S = len(valid)
+        index = np.full((S, S), -1, dtype=np.intp)
+        index[valid] = np.arange(np.count_nonzero(valid))
+        ii, jj = np.nonzero(valid)
+        fabric = np.stack([ii - N, jj - N], axis=-1) * self.cell
+
+        c00, c10 = index[:-1, :-1], index[1:, :-1]
+        c11, c01 = index[1:, 1:], index[:-1, 1:]
+        tris = np.concatenate(
+            [
+                np.stack([c00, c10, c11], axis=-1).reshape(-1, 3),
+                np.stack([c00, c11, c01], axis=-1).reshape(-1, 3),
+            ]
+        )
+        tris = tris[np.all(tris >= 0, axis=1)]
+        if not len(tris):
+            raise ValueError("Can't drape shape, fabric net is empty")
+        return X[valid], tris, fabric
+
+    def findFlatNodes(self, steps=None, relax_weight=None):
+        start = time.perf_counter()
+        X, valid, N, fronts = self._net()
+        self._record("net", fronts, start, float(np.count_nonzero(valid)))
+
+        # vertices outside the net extrapolate its nearest cell
+        start = time.perf_counter()
+        net_points, net_tris, net_fabric = self._net_mesh(X, valid, N)
+        located, lam = FacetLocator(net_points, net_tris).locate(self.points)
+        self.ze_nodes = np.einsum("qv,qvj->qj", lam, net_fabric[net_tris[located]])
+        self._record("interpolate", 0, start)
@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Arrays of a triangle mesh, read from a FreeCAD mesh once and shared by
+# the drape, dart and shader code instead of walking mesh.Points and
+# mesh.Topology in Python. Adjacency is stored as CSR: the neighbours of
+# item i are indices[ptr[i]:ptr[i + 1]].
+
+import numpy as np
+
+
+def csr(rows, cols, n):
+    # (n + 1,) row pointers and column indices of the (rows, cols) pairs,
+    # columns of each row in input order
+    order = np.argsort(rows, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=ptr[1:])
+    return ptr, cols[order]
+
+
+class MeshArrays:
+    # points (P, 3) float64 and facets (N, 3) int32, with
+    # - edges (E, 2), sorted point index pairs, facet_edges (N, 3) the edge
+    #   from facets[:, j] to facets[:, j + 1], edge_facets the number of
+    #   facets on each edge and boundary set on edges of one facet;
+    # - vertex_facets_ptr/vertex_facets, the facets around each point;
+    # - facet_facets_ptr/facet_facets, the facets sharing an edge with
+    #   each facet, facets around a non-manifold edge are chained;
+    # - centroids (N, 3), unit normals (N, 3) and areas (N,) of the facets
+
+    def __init__(self, points, facets):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.facets = np.asarray(facets, dtype=np.int32).reshape(-1, 3)
+        n = len(self.facets)
+
+        tri = self.points[self.facets]
+        cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        norm = np.linalg.norm(cross, axis=-1)
+        self.areas = 0.5 * norm
+        self.normals = np.divide(
+            cross,
+            norm[:, None],
+            out=np.zeros_like(cross),
+            where=norm[:, None] > 0,
+        )
+        self.centroids = tri.mean(axis=1)
+
+        # half edges in facet order, j-th edge of facet f at j * N + f
+        half = np.sort(
+            np.concatenate(
+                [
+                    self.facets[:, [0, 1]],
+                    self.facets[:, [1, 2]],
+                    self.facets[:, [2, 0]],
+                ]
+            ),
+            axis=1,
+        )
+        self.edges, inverse, self.edge_facets = np.unique(
+            half, axis=0, return_inverse=True, return_counts=True
+        )
+        self.edges = self.edges.reshape(-1, 2).astype(np.int32)
+        inverse = inverse.ravel()
+        self.facet_edges = inverse.reshape(3, n).T
+        self.boundary = self.edge_facets == 1
+
+        owner = np.tile(np.arange(n), 3)
+        self.vertex_facets_ptr, self.vertex_facets = csr(
+            self.facets.ravel(),
+            np.repeat(np.arange(n), 3),
+            len(self.points),
+        )
+
+        # consecutive half edges of the same edge join their facets
+        order = np.argsort(inverse, kind="stable")
+        same = inverse[order][1:] == inverse[order][:-1]
+        a, b = owner[order][:-1][same], owner[order][1:][same]
+        self.facet_facets_ptr, self.facet_facets = csr(
+            np.concatenate([a, b]),
+            np.concatenate([b, a]),
+            n,
+        )
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        # one read of the points and facets of a FreeCAD Mesh.Mesh
+        points, facets = mesh.Topology
+        return cls(
+            [[p.x, p.y, p.z] for p in points],
+            np.array(facets, dtype=np.int32).reshape(-1, 3),
+        )
+
+    @property
+    def facet_pairs(self):
+        # (K, 2) pairs of facets sharing an edge, each pair once
+        a = np.repeat(np.arange(len(self.facets)), np.diff(self.facet_facets_ptr))
+        keep = a < self.facet_facets
+        return np.stack([a[keep], self.facet_facets[keep]], axis=-1)
+
+    def point_facets(self, indices):
+        # sorted unique facets around the points at indices
+        indices = np.asarray(list(indices), dtype=np.intp)
+        ptr = self.vertex_facets_ptr
+        return np.unique(
+            np.concatenate(
+                [np.empty(0, np.intp)]
+                + [self.vertex_facets[ptr[i] : ptr[i + 1]] for i in indices]
+            )
+        ).astype(np.intp)
+
+    # texture coordinate index of an indexed face set of the facets:
+    # each facet's point indices followed by -1
+    @property
+    def coord_index(self):
+        return np.column_stack(
+            [self.facets, np.full(len(self.facets), -1, np.int32)]
+        ).ravel()
@@ -1,10 +1,14 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 # Copyright 2025 John Wharington jwharington@gmail.com
 
+import hashlib
+from collections import OrderedDict
+
 import Mesh
 import MeshPart
 import numpy as np
-from FreeCAD import Console, Vector
+import Part
+from FreeCAD import Console, Placement, Rotation, Vector
 
 
 def proj(v, vn):
@@ -84,51 +88,135 @@ def calc_lambda_vec(
     return np.array([lam0, lam1, lam2])
 
 
-def shape2MeshLegacy(shape, max_length, seg_min=6, seg_max=40):
-    if not shape.BoundBox.isValid():
-        return Mesh.Mesh()
+def shape_digest(shape, decimals=9):
+    # geometry hash that is stable between sessions, unlike hashCode()
+    def rounded(values):
+        return np.round(np.array(values, dtype=np.float64), decimals).tobytes()
+
+    h = hashlib.sha256()
+    h.update(shape.ShapeType.encode())
+    h.update(rounded([(v.X, v.Y, v.Z) for v in shape.Vertexes]))
+    h.update(rounded([e.Length for e in shape.Edges]))
+    h.update(rounded([f.Area for f in shape.Faces]))
+    for f in shape.Faces:
+        h.update(type(f.Surface).__name__.encode())
+    bb = shape.BoundBox
+    h.update(rounded([bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax]))
+    return h.hexdigest()
+
+
+def arrays2Mesh(points, facets):
+    mesh = Mesh.Mesh()
+    if len(facets):
+        mesh.addFacets(
+            (
+                [Vector(*p) for p in points],
+                [tuple(int(i) for i in f) for f in facets],
+            )
+        )
+    return mesh
 
-    maxl = (
-        float(max_length)
-        if max_length and max_length > 0
-        else shape.BoundBox.DiagonalLength / 32.0
-    )
-    diag = max(shape.BoundBox.DiagonalLength, 1.0e-6)
-    seg = int(diag / max(maxl, 1.0e-6))
-    seg = max(seg_min, min(seg_max, seg))
 
-    return MeshPart.meshFromShape(
-        shape,
-        GrowthRate=0,
-        SegPerEdge=seg,
-        SegPerRadius=seg,
-        SecondOrder=0,
-        Optimize=1,
-        AllowQuad=0,
-    )
+def _max_length(shape, max_length, divisions):
+    if max_length and max_length > 0:
+        return float(max_length)
+    return shape.BoundBox.DiagonalLength / divisions
 
 
-def shape2Mesh(shape, max_length):
-    if not shape.BoundBox.isValid():
-        return Mesh.Mesh()
-
-    maxl = (
-        float(max_length)
-        if max_length and max_length > 0
-        else shape.BoundBox.DiagonalLength / 64.0
-    )
+def _effective_deflection(maxl):
     # OCC tessellation is often conservative for curved shell segments.
     # Tighten effective deflection so MaxLength changes are visible in drape mesh.
-    eff = max(maxl * 0.1, 1.0e-4)
+    return max(maxl * 0.1, 1.0e-4)
+
+
+# Tessellation deflections are snapped down to a ladder of
+# DEFLECTION_STEPS levels per octave, so nearly equal requests, e.g. a
+# dart and a shell whose facet budget moved its deflection slightly, share
+# one tessellation. Snapping down keeps meshes at least as fine as asked.
+DEFLECTION_STEPS = 8
+
+
+def quantize_deflection(deflection):
+    level = np.floor(np.log2(deflection) * DEFLECTION_STEPS + 1.0e-9)
+    return float(2.0 ** (level / DEFLECTION_STEPS))
+
+
+class TessellationCache:
+    # In-process LRU of tessellations keyed on the shape geometry digest
+    # and quantized deflection, so shells and darts on the same support
+    # tessellate once. Meshes are shared between callers and must not be
+    # modified, copy() them first.
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+
+    @staticmethod
+    def mesh_bytes(mesh):
+        # points as 3 doubles, facets as 3 point and 3 neighbour indices
+        points = int(getattr(mesh, "CountPoints", 0) or 0)
+        facets = int(getattr(mesh, "CountFacets", 0) or 0)
+        return 24 * points + 48 * facets
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, mesh):
+        size = self.mesh_bytes(mesh)
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (mesh, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def deflections(self, digest):
+        # quantized deflections of the cached tessellations of a shape
+        return [deflection for key, deflection in self.entries if key == digest]
+
+
+tessellation_cache = TessellationCache()
+
+
+def _tessellate(shape, deflection):
+    deflection = quantize_deflection(deflection)
+    key = (shape_digest(shape), deflection)
+    mesh = tessellation_cache.get(key)
+    if mesh is None:
+        mesh = _tessellate_uncached(shape, deflection)
+        if mesh is not None:
+            tessellation_cache.put(key, mesh)
+    return mesh
+
+
+def shared_deflection(shape, deflection):
+    # coarsest deflection of a cached tessellation of shape at least as
+    # fine as deflection asks for, e.g. the one a shell on the same
+    # support settled on within its facet budget; deflection without one
+    deflection = quantize_deflection(deflection)
+    finer = [
+        cached
+        for cached in tessellation_cache.deflections(shape_digest(shape))
+        if cached <= deflection
+    ]
+    return max(finer, default=deflection)
+
 
+def _tessellate_uncached(shape, deflection):
     # Path 1: direct tessellation with explicit linear deflection.
     try:
-        tess = shape.tessellate(eff)
-        mesh = Mesh.Mesh(tess)
+        mesh = Mesh.Mesh(shape.tessellate(deflection))
         if getattr(mesh, "CountFacets", 0) > 0:
-            Console.PrintLog(
-                f"shape2Mesh tessellate maxl={maxl} eff={eff} -> facets={mesh.CountFacets}\n",
-            )
             return mesh
     except Exception:
         pass
@@ -137,17 +225,48 @@ def shape2Mesh(shape, max_length):
     try:
         mesh = MeshPart.meshFromShape(
             Shape=shape,
-            LinearDeflection=eff,
+            LinearDeflection=deflection,
             AngularDeflection=0.25,
             Relative=False,
         )
         if getattr(mesh, "CountFacets", 0) > 0:
-            Console.PrintLog(
-                f"shape2Mesh linear-deflection maxl={maxl} eff={eff} -> facets={mesh.CountFacets}\n",
-            )
             return mesh
     except Exception:
         pass
+    return None
+
+
+def half_shape(shape, origin, normal):
+    # part of shape on the side of the plane through origin that normal
+    # points to, for meshing one half of a mirror symmetric shell
+    size = 2.0 * max(shape.BoundBox.DiagonalLength, 1.0e-6)
+    box = Part.makeBox(size, size, size, Vector(-size / 2, -size / 2, 0.0))
+    box.Placement = Placement(
+        Vector(*origin),
+        Rotation(Vector(0.0, 0.0, 1.0), Vector(*normal)),
+    )
+    return shape.common(box)
+
+
+# returned meshes may be shared through tessellation_cache, copy() before
+# modifying them
+def shape2Mesh(shape, max_length, share=False):
+    # share reuses a finer cached tessellation of shape, see
+    # shared_deflection()
+    if not shape.BoundBox.isValid():
+        return Mesh.Mesh()
+
+    maxl = _max_length(shape, max_length, 64.0)
+    eff = _effective_deflection(maxl)
+    if share:
+        eff = shared_deflection(shape, eff)
+
+    mesh = _tessellate(shape, eff)
+    if mesh is not None:
+        Console.PrintLog(
+            f"shape2Mesh maxl={maxl} eff={eff} -> facets={mesh.CountFacets}\n",
+        )
+        return mesh
 
     # Path 3: legacy signature; map max_length to segments conservatively.
     diag = max(shape.BoundBox.DiagonalLength, 1.0e-6)
@@ -167,3 +286,109 @@ def shape2Mesh(shape, max_length):
         f"shape2Mesh legacy seg={seg} (maxl={maxl}, eff={eff}) -> facets={mesh.CountFacets}\n",
     )
     return mesh
+
+
+# Facet count model for budget meshing. A facet edge h on a surface of
+# curvature k deviates from it by about k h^2 / 8, so a linear deflection
+# d gives h = sqrt(8 d / k), further limited by the angular deflection
+# (h <= a / k). Planar regions only get the facets needed to close their
+# boundary edges.
+ANGULAR_DEFLECTION = 0.5
+EQUILATERAL_AREA = np.sqrt(3.0) / 4.0
+
+
+def shape_mesh_stats(shape, samples=3):
+    # face areas and curvatures, edge lengths and curvatures
+    def face_curvature(face):
+        try:
+            u0, u1, v0, v1 = face.ParameterRange
+            surface = face.Surface
+            k = 0.0
+            for u in np.linspace(u0, u1, samples):
+                for v in np.linspace(v0, v1, samples):
+                    for kind in ("Max", "Min"):
+                        k = max(k, abs(surface.curvature(u, v, kind)))
+            return k
+        except Exception:
+            return 0.0
+
+    def edge_curvature(edge):
+        try:
+            t0, t1 = edge.ParameterRange
+            return max(abs(edge.curvatureAt(t)) for t in np.linspace(t0, t1, samples))
+        except Exception:
+            return 0.0
+
+    faces = shape.Faces
+    edges = shape.Edges
+    return {
+        "face_area": np.array([f.Area for f in faces], dtype=np.float64),
+        "face_curvature": np.array([face_curvature(f) for f in faces]),
+        "edge_length": np.array([e.Length for e in edges], dtype=np.float64),
+        "edge_curvature": np.array([edge_curvature(e) for e in edges]),
+    }
+
+
+def _chord_length(curvature, deflection):
+    k = np.maximum(curvature, 1.0e-12)
+    return np.minimum(np.sqrt(8.0 * deflection / k), ANGULAR_DEFLECTION / k)
+
+
+def estimate_facet_count(stats, deflection):
+    h_face = _chord_length(stats["face_curvature"], deflection)
+    interior = np.sum(stats["face_area"] / (EQUILATERAL_AREA * h_face**2))
+    h_edge = _chord_length(stats["edge_curvature"], deflection)
+    boundary = np.sum(np.maximum(1.0, np.ceil(stats["edge_length"] / h_edge)))
+    return float(interior + boundary)
+
+
+def deflection_for_facet_count(stats, target, lower, upper, scale=1.0):
+    # bracketed search in log space for the smallest deflection whose
+    # estimated facet count (times the calibration scale) fits the target
+    if scale * estimate_facet_count(stats, lower) <= target:
+        return lower
+    lo, hi = np.log(lower), np.log(upper)
+    for _ in range(48):
+        mid = 0.5 * (lo + hi)
+        if scale * estimate_facet_count(stats, np.exp(mid)) > target:
+            lo = mid
+        else:
+            hi = mid
+    return float(np.exp(hi))
+
+
+def shape2MeshBudget(shape, max_length, max_facets, fill=0.9):
+    # Mesh as fine as MaxLength asks for, but within max_facets using at
+    # most two tessellations: the first from the facet count estimate,
+    # the second after calibrating the estimate against the first result.
+    if not shape.BoundBox.isValid():
+        return Mesh.Mesh()
+
+    maxl = _max_length(shape, max_length, 64.0)
+    eff = _effective_deflection(maxl)
+    diag = max(shape.BoundBox.DiagonalLength, 1.0e-6)
+    upper = max(diag, eff)
+    target = fill * max_facets
+
+    stats = shape_mesh_stats(shape)
+    deflection = deflection_for_facet_count(stats, target, eff, upper)
+    mesh = None
+    for attempt in range(2):
+        mesh = _tessellate(shape, deflection)
+        if mesh is None:
+            return shape2Mesh(shape, max_length)
+        count = mesh.CountFacets
+        Console.PrintLog(
+            f"shape2MeshBudget maxl={maxl} deflection={deflection} "
+            f"-> facets={count} (budget {max_facets})\n",
+        )
+        if count <= max_facets or deflection >= upper:
+            break
+        used = quantize_deflection(deflection)
+        scale = count / max(estimate_facet_count(stats, used), 1.0)
+        # at least one deflection level coarser than the mesh just made
+        deflection = max(
+            deflection_for_facet_count(stats, target, eff, upper, scale),
+            used * 2.0 ** (1.0 / DEFLECTION_STEPS),
+        )
+    return mesh
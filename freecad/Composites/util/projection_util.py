@@ -0,0 +1,167 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Nearest point projection onto the faces of a shape. Face bounding
+# boxes cull candidate faces and a sampled (u, v) grid per face seeds a
+# Gauss-Newton solve, so a query costs a few surface evaluations instead
+# of a distToShape call per face. Culling and seeding are vectorized over
+# the queries, only the surface refinement runs per point.
+
+import numpy as np
+from FreeCAD import Vector
+from Part import Vertex
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+class SurfaceProjector:
+    grid_size = 12
+    # queries seeded at once, bounds the (chunk, samples, 3) differences
+    chunk_size = 4096
+    newton_steps = 8
+    tolerance = 1.0e-9
+
+    def __init__(self, shape):
+        self.faces = list(shape.Faces)
+        self.ranges = np.array([f.ParameterRange for f in self.faces], dtype=np.float64)
+        self.bounds = np.array(
+            [
+                [bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax]
+                for bb in (f.BoundBox for f in self.faces)
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 6)
+
+        uv, points, owners = [], [], []
+        for i, face in enumerate(self.faces):
+            face_uv = self._face_samples(face, self.ranges[i])
+            uv.append(face_uv)
+            points.append([list(face.valueAt(u, v)) for u, v in face_uv])
+            owners.append(np.full(len(face_uv), i))
+        self.sample_uv = np.concatenate(uv) if uv else np.empty((0, 2))
+        self.sample_points = np.array(
+            [p for face_points in points for p in face_points],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        self.sample_face = np.concatenate(owners) if owners else np.empty(0, int)
+        # the samples of face i, sampled in face order, are sample_slices[i]
+        counts = [len(face_uv) for face_uv in uv]
+        self.sample_slices = [
+            slice(end - n, end) for n, end in zip(counts, np.cumsum(counts))
+        ]
+        self.tree = cKDTree(self.sample_points) if cKDTree else None
+
+    def _face_samples(self, face, ranges):
+        u0, u1, v0, v1 = ranges
+        grid = np.stack(
+            np.meshgrid(
+                np.linspace(u0, u1, self.grid_size),
+                np.linspace(v0, v1, self.grid_size),
+            ),
+            axis=-1,
+        ).reshape(-1, 2)
+        # keep samples within the trimmed face where that can be checked
+        try:
+            inside = np.array([face.isPartOfDomain(u, v) for u, v in grid])
+        except Exception:
+            return grid
+        return grid[inside] if inside.any() else grid
+
+    def _nearest_sample_distance(self, query):
+        if self.tree is not None:
+            d, _ = self.tree.query(query)
+            return d
+        d = np.linalg.norm(query[:, None, :] - self.sample_points[None], axis=-1)
+        return d.min(axis=1)
+
+    def _bbox_distance(self, query):
+        # (Q, F) lower bound of the distance from each query to each face
+        lo = self.bounds[None, :, :3]
+        hi = self.bounds[None, :, 3:]
+        q = query[:, None, :]
+        gap = np.maximum(lo - q, 0.0) + np.maximum(q - hi, 0.0)
+        return np.linalg.norm(gap, axis=-1)
+
+    def _solve(self, i, p, uv):
+        # Gauss-Newton on |S(u, v) - p|^2 with finite difference
+        # derivatives, clamped to the face parameter range
+        face = self.faces[i]
+        u0, u1, v0, v1 = self.ranges[i]
+        h = 1.0e-7 * max(u1 - u0, v1 - v0, 1.0e-9)
+        uv = np.array(uv, dtype=np.float64)
+        s = np.array(list(face.valueAt(*uv)))
+        for _ in range(self.newton_steps):
+            su = (np.array(list(face.valueAt(uv[0] + h, uv[1]))) - s) / h
+            sv = (np.array(list(face.valueAt(uv[0], uv[1] + h))) - s) / h
+            J = np.stack([su, sv], axis=-1)
+            step, *_ = np.linalg.lstsq(J, p - s, rcond=None)
+            uv = np.clip(uv + step, [u0, v0], [u1, v1])
+            s = np.array(list(face.valueAt(*uv)))
+            if np.linalg.norm(step) < self.tolerance * max(u1 - u0, v1 - v0, 1.0):
+                break
+        return uv, s
+
+    def _solve_exact(self, i, p):
+        face = self.faces[i]
+        distance, points, _ = face.distToShape(Vertex(*p))
+        uv = np.array(face.Surface.parameter(points[0][0]))
+        return uv, np.array(list(points[0][0]))
+
+    def _seeds(self, query, candidates):
+        # (Q, F) index of the nearest sample of each candidate face to each
+        # query, -1 for faces that are not candidates
+        seeds = np.full(candidates.shape, -1, dtype=np.intp)
+        for i, samples in enumerate(self.sample_slices):
+            rows = np.flatnonzero(candidates[:, i])
+            for k in range(0, len(rows), self.chunk_size):
+                q = rows[k : k + self.chunk_size]
+                d = np.sum(
+                    (query[q, None, :] - self.sample_points[None, samples]) ** 2,
+                    axis=-1,
+                )
+                seeds[q, i] = samples.start + np.argmin(d, axis=1)
+        return seeds
+
+    def _project_one(self, p, bbox_dist, bound, seeds):
+        best = (np.inf, -1, None)
+        for i in np.argsort(bbox_dist):
+            if bbox_dist[i] > min(bound, best[0]):
+                break
+            uv, s = self._solve(i, p, self.sample_uv[seeds[i]])
+            try:
+                inside = self.faces[i].isPartOfDomain(*uv)
+            except Exception:
+                inside = True
+            if not inside:
+                uv, s = self._solve_exact(i, p)
+            dist = np.linalg.norm(s - p)
+            if dist < best[0]:
+                best = (dist, i, uv)
+        return best[1], best[2]
+
+    def project(self, points):
+        # returns face indices (Q,), surface parameters (Q, 2),
+        # projected points (Q, 3) and face normals (Q, 3)
+        query = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        bound = self._nearest_sample_distance(query) * (1.0 + 1.0e-9) + 1.0e-12
+        bbox_dist = self._bbox_distance(query)
+        # faces beyond the nearest sample can't hold the nearest point
+        seeds = self._seeds(query, bbox_dist <= bound[:, None])
+
+        faces = np.empty(len(query), dtype=np.intp)
+        uv = np.empty((len(query), 2))
+        projected = np.empty((len(query), 3))
+        normals = np.empty((len(query), 3))
+        for q, p in enumerate(query):
+            faces[q], uv[q] = self._project_one(p, bbox_dist[q], bound[q], seeds[q])
+            face = self.faces[faces[q]]
+            projected[q] = list(face.valueAt(*uv[q]))
+            normals[q] = list(face.normalAt(*uv[q]))
+        return faces, uv, projected, normals
+
+    def project_point(self, point: Vector):
+        _, _, projected, normals = self.project([[point.x, point.y, point.z]])
+        return Vector(*projected[0]), Vector(*normals[0])
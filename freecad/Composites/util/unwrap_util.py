@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Unwrap (geometry) stage of a drape on plain arrays. Needs no FreeCAD
+# application modules, so the drape worker processes can run it; only
+# the FaceUnwrapper backend loads FreeCAD's flatmesh extension.
+
+import numpy as np
+
+from .flatten_util import ArapFlattener
+from .kinematic_util import KinematicFlattener
+
+
+def error_text(exc):
+    # text of an unwrap exception, which is what drape workers return
+    # since the exception itself can't be relied on to unpickle
+    return f"{type(exc).__name__}: {exc}"
+
+
+def make_flattener(
+    points,
+    facets,
+    method="FaceUnwrapper",
+    initial=None,
+    seed=None,
+    seam=None,
+):
+    # initial flat nodes warm start backends that support it; seam node
+    # indices are held on a straight line by ARAP, the kinematic drape of
+    # a symmetric shell keeps its seam straight by itself
+    match method:
+        case "FaceUnwrapper":
+            import flatmesh
+
+            return flatmesh.FaceUnwrapper(points, facets)
+        case "ARAP":
+            return ArapFlattener(points, facets, initial=initial, seam=seam)
+        case "Kinematic":
+            return KinematicFlattener(points, facets, seed=seed)
+    raise ValueError(f"Unknown flattener {method}")
+
+
+def unwrap_arrays(
+    points,
+    facets,
+    steps,
+    relax_weight,
+    method="FaceUnwrapper",
+    initial=None,
+    seed=None,
+    seam=None,
+    progress=None,
+):
+    # flat nodes, flat boundary node arrays and the stage timings of the
+    # flattener. progress is passed on to flatteners that report it.
+    # seam node indices stay on a straight line, see make_flattener().
+    if not len(points):
+        raise ValueError("Can't flatten shape")
+    flattener = make_flattener(points, facets, method, initial, seed, seam)
+    timings = _find_flat_nodes(flattener, steps, relax_weight, progress)
+    if seam is not None and method == "FaceUnwrapper":
+        # FaceUnwrapper can't hold the seam, relax its flat nodes with it
+        flattener = ArapFlattener(
+            points, facets, initial=flattener.ze_nodes, seam=seam
+        )
+        timings += _find_flat_nodes(flattener, steps, relax_weight, progress)
+    ze_nodes = np.array(flattener.ze_nodes, dtype=np.float64)
+    flat_boundaries = [
+        np.array(edge, dtype=np.float64) for edge in flattener.getFlatBoundaryNodes()
+    ]
+    return ze_nodes, flat_boundaries, timings
+
+
+def _find_flat_nodes(flattener, steps, relax_weight, progress):
+    if hasattr(flattener, "progress"):
+        flattener.progress = progress
+    flattener.findFlatNodes(steps, relax_weight)
+    return list(getattr(flattener, "timings", []))
+
+
+def unwrap_chain(
+    surfaces,
+    facets,
+    order,
+    initial,
+    steps,
+    relax_weight,
+    method="FaceUnwrapper",
+    seed=None,
+    progress=None,
+):
+    # unwraps of surfaces sharing facets, in order of (surface, neighbour)
+    # pairs, each warm started from the flat nodes of its neighbour or,
+    # for neighbour -1, from initial. Returns (ze_nodes, flat_boundaries)
+    # per surface and the timings of all unwraps.
+    flats = [None] * len(surfaces)
+    timings = []
+    for k, (surface, neighbour) in enumerate(order):
+        start = initial if neighbour < 0 else flats[neighbour][0][:, :2]
+        report = None
+        if progress is not None:
+
+            def report(fraction, stage, k=k):
+                progress((k + fraction) / len(order), f"ply {k + 1} {stage}")
+
+        *flat, stage_timings = unwrap_arrays(
+            surfaces[surface],
+            facets,
+            steps,
+            relax_weight,
+            method,
+            start,
+            seed,
+            progress=report,
+        )
+        flats[surface] = tuple(flat)
+        timings += stage_timings
+    return flats, timings
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: LGPL-2.1-or-later
+# Copyright 2025 John Wharington jwharington@gmail.com
+
+# Entry point of the drape worker processes. The workers are spawned as
+# plain Python interpreters, not copies of FreeCAD, so importing the
+# freecad.Composites package (which needs FreeCAD) is bypassed: the
+# packages are registered as bare namespaces and only the FreeCAD-free
+# unwrap module is loaded. The scheduler puts this directory on sys.path
+# so the workers can import the module by its top level name.
+
+import os
+import sys
+import types
+
+COMPOSITES_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _package(name, path):
+    if name not in sys.modules:
+        module = types.ModuleType(name)
+        module.__path__ = [path]
+        sys.modules[name] = module
+
+
+_package("freecad", os.path.dirname(COMPOSITES_PATH))
+_package("freecad.Composites", COMPOSITES_PATH)
+
+from freecad.Composites.util.unwrap_util import (  # noqa: E402
+    error_text,
+    unwrap_arrays,
+    unwrap_chain,
+)
+
+
+def unwrap_job(job):
+    # (ze_nodes, flat_boundaries), timings, error text
+    try:
+        ze_nodes, flat_boundaries, timings = unwrap_arrays(*job)
+    except Exception as exc:
+        return None, [], error_text(exc)
+    return (ze_nodes, flat_boundaries), timings, None
+
+
+def _run(conn, unwrap, job):
+    # unwrap returns (result, timings); sends ("progress", fraction,
+    # stage) messages, then ("done", result, timings) or ("error", text)
+    def progress(fraction, stage):
+        conn.send(("progress", fraction, stage))
+
+    try:
+        conn.send(("done", *unwrap(*job, progress=progress)))
+    except Exception as exc:
+        conn.send(("error", error_text(exc)))
+    finally:
+        conn.close()
+
+
+def run_job(conn, job):
+    # one background drape, result (ze_nodes, flat_boundaries)
+    def unwrap(*job, progress):
+        ze_nodes, flat_boundaries, timings = unwrap_arrays(*job, progress=progress)
+        return (ze_nodes, flat_boundaries), timings
+
+    _run(conn, unwrap, job)
+
+
+def run_ply_job(conn, job):
+    # the plies of a shell, result the flat nodes of each ply
+    _run(conn, unwrap_chain, job)